@@ -0,0 +1,10 @@
+import os
+import sys
+
+# The benchmarked modules live in the application folders next to this one
+# (each folder is a separate program, not a package).
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+for folder in ("py", "py-file-viewer", "py-db-viewer", "py-cli-db-edit"):
+    path = os.path.normpath(os.path.join(ROOT, folder))
+    if path not in sys.path:
+        sys.path.insert(0, path)
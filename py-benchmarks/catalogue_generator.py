@@ -0,0 +1,125 @@
+import json
+import random
+
+import bench_paths  # noqa: F401  (makes the application folders importable)
+import sqlite3_database
+import sqlite_profiles
+
+
+FIRST_NAMES = ["Anna", "Jan", "Maria", "Piotr", "Ewa", "John", "Mary", "Stanislaw", "Olga", "Felix",
+               "Alicia", "Jonathan", "Terry", "Ursula", "Isaac", "Agatha", "Arthur", "Frank"]
+LAST_NAMES = ["Kowalski", "Nowak", "Lem", "Tolkien", "Pratchett", "Le Guin", "Asimov", "Christie",
+              "Clarke", "Herbert", "Sapkowski", "Doe", "Pardner", "Zajdel", "Tokarczuk", "Gaiman"]
+WORDS = ["star", "night", "city", "dragon", "river", "glass", "empire", "winter", "garden", "machine",
+         "shadow", "song", "ocean", "forest", "clock", "silver", "storm", "letter", "island", "memory"]
+PUBLISHERS = ["Prószyński", "Znak", "Rebis", "Penguin", "Tor Books", "Gollancz", "SuperNowa", "Orbit"]
+TAGS = ["Sci-Fi", "Fantasy", "Crime", "Novel", "History", "Poetry", "Suspense", "Classic", "Humor"]
+LANGUAGES = ["PL", "EN", "DE", "FR"]
+
+
+def _isbn13(number):
+    """Valid ISBN-13 (978 prefix, correct check digit) for a sequence number."""
+    body = f"978{number:09d}"
+    total = sum(int(digit) * (1 if i % 2 == 0 else 3) for i, digit in enumerate(body))
+    return body + str((10 - total % 10) % 10)
+
+
+def _title(rng):
+    return " ".join(rng.choice(WORDS) for _ in range(rng.randint(2, 4))).capitalize()
+
+
+def _author(rng):
+    return f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}"
+
+
+def generate_books(count, seed=1, first_number=0):
+    """
+    Yields `count` synthetic books for the books/series schema (dicts with
+    the add_book / add_books_bulk keys). The same seed gives the same catalogue.
+    """
+    rng = random.Random(seed)
+    for i in range(first_number, first_number + count):
+        yield {
+            "authors": [_author(rng) for _ in range(rng.choice((1, 1, 1, 2, 3)))],
+            "title": _title(rng),
+            "edition": str(rng.randint(1, 5)),
+            "language": rng.choice(LANGUAGES),
+            "location": f"Shelf {rng.randint(1, 40)}",
+            "publisher": rng.choice(PUBLISHERS),
+            "release_year": str(rng.randint(1950, 2025)),
+            "isbn_13": _isbn13(i),
+            "pages": str(rng.randint(80, 1200)),
+            "tags": rng.sample(TAGS, rng.randint(1, 3)),
+            "description": " ".join(rng.choice(WORDS) for _ in range(12)),
+            "status": rng.choice(("complete", "incomplete")),
+        }
+
+
+def fill_books_database(db_manager, count, seed=1, series_every=20):
+    """
+    Fills a DatabaseManager database (after create_database) with `count`
+    books and one series per `series_every` books. Returns the add_books_bulk outcomes.
+    """
+    outcomes = db_manager.add_books_bulk(generate_books(count, seed))
+    rng = random.Random(seed + 1)
+    with db_manager._get_connection() as conn:
+        conn.executemany(
+            "INSERT INTO series (title, books_ids, tags, description) VALUES (?, ?, ?, ?)",
+            (
+                (_title(rng), json.dumps(list(range(first + 1, min(first + series_every, count) + 1))),
+                 json.dumps(rng.sample(TAGS, 1)), None)
+                for first in range(0, count, series_every)
+            )
+        )
+    return outcomes
+
+
+def fill_bookcase_database(database_name, count, seed=1):
+    """
+    Creates the bookcase schema of py/sqlite3_database.py in `database_name`
+    and fills it with `count` books, count // 10 comics, count // 10 authors
+    (at least one) and the publishers.
+    """
+    sqlite3_database.bookcase_create_database(database_name)
+
+    rng = random.Random(seed)
+    author_count = max(1, count // 10)
+    connection = sqlite_profiles.connect(database_name, "bulk-load")
+    try:
+        connection.executemany(
+            "INSERT INTO AUTHOR (FIRSTNAME, LASTNAME) VALUES (?, ?)",
+            ((rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)) for _ in range(author_count))
+        )
+        connection.executemany("INSERT INTO COMPANY (NAME) VALUES (?)", ((name,) for name in PUBLISHERS))
+
+        def items(item_count, first_number):
+            for i in range(first_number, first_number + item_count):
+                yield (
+                    json.dumps([rng.randint(1, author_count)] if rng.random() < 0.2 else []),
+                    rng.randint(1, author_count),
+                    json.dumps(rng.sample(TAGS, rng.randint(1, 3))),
+                    _title(rng),
+                    _isbn13(i),
+                    rng.randint(80, 1200),
+                    f"{rng.randint(1950, 2025)}-01-01",
+                    rng.choice(PUBLISHERS),
+                    " ".join(rng.choice(WORDS) for _ in range(12)),
+                    rng.randint(0, 1),
+                    0,
+                )
+
+        columns = "ADDITIONAL_AUTHORS, AUTHOR, CATEGORIES, TITLE, ISBN, PAGES, PUBLISHED_DATE, PUBLISHER, SUMMARY, READ, IN_WISHLIST"
+        placeholders = ", ".join("?" * 11)
+        connection.executemany(f"INSERT INTO BOOK ({columns}) VALUES ({placeholders})", items(count, 0))
+        connection.executemany(f"INSERT INTO COMIC ({columns}) VALUES ({placeholders})", items(count // 10, count))
+        connection.commit()
+    finally:
+        connection.close()
+
+
+def write_text_file(path, line_count, seed=1):
+    """Writes a text file of `line_count` lines for the FileProcessor benchmarks."""
+    rng = random.Random(seed)
+    with open(path, "w", encoding="utf-8") as text_file:
+        for i in range(line_count):
+            text_file.write(f"{i:08d} " + " ".join(rng.choice(WORDS) for _ in range(rng.randint(3, 15))) + "\n")
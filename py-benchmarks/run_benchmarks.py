@@ -0,0 +1,213 @@
+import argparse
+import json
+import os
+import platform
+import random
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+import bench_paths  # noqa: F401  (makes the application folders importable)
+import catalogue_generator
+import chatgpt_v1_connection_pool
+import chatgpt_v1_database
+import db_processing
+import file_processing
+
+
+DEFAULT_SIZES = (10_000, 100_000, 1_000_000)
+SEARCH_TERMS = ("dragon", "tolkien", "star night", "penguin", "sci")
+
+
+def measure(function, repeat=3, ops=1):
+    """
+    Runs function() `repeat` times and returns the timings of one operation
+    (the call is assumed to do `ops` operations).
+    """
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        timings.append((time.perf_counter() - start) / ops)
+    return {
+        "median": statistics.median(timings),
+        "min": min(timings),
+        "max": max(timings),
+        "ops": ops,
+        "repeat": repeat,
+    }
+
+
+def benchmark_books_schema(tmp_dir, size, repeat, seed):
+    """add_books_bulk, add_book, search_books, search_books_page and update_book."""
+    results = {}
+    db_path = os.path.join(tmp_dir, f"books_{size}.db")
+    db_manager = chatgpt_v1_database.DatabaseManager()
+    db_manager.create_database(db_path)
+
+    start = time.perf_counter()
+    catalogue_generator.fill_books_database(db_manager, size, seed)
+    elapsed = time.perf_counter() - start
+    results["add_books_bulk"] = {"median": elapsed / size, "min": elapsed / size, "max": elapsed / size,
+                                 "ops": size, "repeat": 1, "total": elapsed}
+
+    new_books = catalogue_generator.generate_books(200 * repeat, seed + 7, first_number=size)
+    results["add_book"] = measure(
+        lambda: [db_manager.add_book(**next(new_books)) for _ in range(200)], repeat, ops=200
+    )
+
+    results["search_books"] = measure(
+        lambda: [db_manager.search_books(term) for term in SEARCH_TERMS], repeat, ops=len(SEARCH_TERMS)
+    )
+    results["search_books_page"] = measure(
+        lambda: [db_manager.search_books_page(term, 10) for term in SEARCH_TERMS], repeat, ops=len(SEARCH_TERMS)
+    )
+
+    rng = random.Random(seed)
+
+    def update_books():
+        for _ in range(200):
+            db_manager.update_book(rng.randint(1, size), {"pages": str(rng.randint(1, 2000))}, updated_by="benchmark")
+    results["update_book"] = measure(update_books, repeat, ops=200)
+
+    db_manager.close()
+    chatgpt_v1_connection_pool.close_all_pools()
+    return results
+
+
+def benchmark_bookcase_schema(tmp_dir, size, repeat, seed):
+    """DBNavigator paging and search over the AUTHOR/BOOK/COMIC schema."""
+    results = {}
+    db_path = os.path.join(tmp_dir, f"bookcase_{size}.db")
+    catalogue_generator.fill_bookcase_database(db_path, size, seed)
+
+    db_handler = db_processing.DatabaseHandler()
+    db_handler.load_file(db_path)
+    # No read-ahead: the database is measured, not the page cache
+    navigator = db_processing.DBNavigator(db_handler, prefetch=False, cache_budget_bytes=0)
+    navigator.reset_navigation()
+    navigator.current_table = "BOOK"
+
+    pages = min(100, size // navigator.page_size)
+
+    def page_through():
+        navigator.move_first_page()
+        for _ in range(pages):
+            navigator.page_down()
+    results["dbnavigator_page_down"] = measure(page_through, repeat, ops=pages + 1)
+    results["dbnavigator_move_last_page"] = measure(navigator.move_last_page, repeat)
+    results["search_text_in_current_table"] = measure(
+        lambda: [navigator.search_text_in_current_table(term) for term in SEARCH_TERMS],
+        repeat, ops=len(SEARCH_TERMS)
+    )
+
+    db_handler.connection.close()
+    return results
+
+
+def benchmark_file_processing(tmp_dir, size, repeat, seed):
+    """FileProcessor.open_file: first screen and complete line index."""
+    text_path = os.path.join(tmp_dir, f"text_{size}.txt")
+    catalogue_generator.write_text_file(text_path, size, seed)
+    processor = file_processing.FileProcessor()
+
+    def open_first_screen():
+        processor.open_file(text_path)
+        processor.get_lines_in_range(0, 40)
+
+    def open_full_index():
+        processor.open_file(text_path)
+        processor.get_line(size - 1)
+
+    results = {
+        "file_open_first_screen": measure(open_first_screen, repeat),
+        "file_open_full_index": measure(open_full_index, repeat),
+    }
+    processor.close()
+    return results
+
+
+def run(sizes, repeat=3, seed=1):
+    """Runs every benchmark for every size and returns the results document."""
+    report = {
+        "meta": {
+            "date": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            "python": platform.python_version(),
+            "sqlite": sqlite3.sqlite_version,
+            "platform": platform.platform(),
+            "repeat": repeat,
+            "seed": seed,
+        },
+        "results": {},
+    }
+    for size in sizes:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            size_results = {}
+            for benchmark in (benchmark_books_schema, benchmark_bookcase_schema, benchmark_file_processing):
+                print(f"[{size}] {benchmark.__name__} ...", file=sys.stderr, flush=True)
+                size_results.update(benchmark(tmp_dir, size, repeat, seed))
+            report["results"][str(size)] = size_results
+    return report
+
+
+def compare(report, baseline, threshold=0.25):
+    """
+    Compares median timings with a baseline report.
+    Returns a list of (size, operation, baseline, current, ratio) for the
+    operations slower than baseline * (1 + threshold).
+    """
+    regressions = []
+    for size, operations in report["results"].items():
+        for operation, timing in operations.items():
+            base = baseline.get("results", {}).get(size, {}).get(operation)
+            if not base or not base["median"]:
+                continue
+            ratio = timing["median"] / base["median"]
+            if ratio > 1 + threshold:
+                regressions.append((size, operation, base["median"], timing["median"], ratio))
+    return regressions
+
+
+def print_report(report, baseline=None):
+    for size, operations in report["results"].items():
+        print(f"\n== {int(size):,} books ==")
+        for operation, timing in operations.items():
+            line = f"{operation:32} {timing['median'] * 1000:12.3f} ms/op"
+            base = (baseline or {}).get("results", {}).get(size, {}).get(operation)
+            if base and base["median"]:
+                line += f"   ({timing['median'] / base['median']:.2f}x baseline)"
+            print(line)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Catalogue benchmarks for the bookcase programs.")
+    parser.add_argument("--sizes", default=",".join(str(size) for size in DEFAULT_SIZES),
+                        help="comma separated catalogue sizes (default: %(default)s)")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per measurement (median is reported)")
+    parser.add_argument("--seed", type=int, default=1, help="seed of the synthetic catalogue")
+    parser.add_argument("--output", default="benchmark_results.json", help="JSON file with the results")
+    parser.add_argument("--baseline", help="JSON results of an earlier run to compare with")
+    parser.add_argument("--threshold", type=float, default=0.25,
+                        help="allowed slowdown against the baseline (0.25 = 25%%)")
+    args = parser.parse_args()
+
+    sizes = [int(size) for size in args.sizes.split(",") if size.strip()]
+    report = run(sizes, repeat=args.repeat, seed=args.seed)
+    with open(args.output, "w", encoding="utf-8") as output_file:
+        json.dump(report, output_file, indent=2)
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as baseline_file:
+            baseline = json.load(baseline_file)
+    print_report(report, baseline)
+    print(f"\nResults written to {args.output}")
+
+    if baseline:
+        regressions = compare(report, baseline, args.threshold)
+        for size, operation, base, current, ratio in regressions:
+            print(f"REGRESSION [{size}] {operation}: {base * 1000:.3f} -> {current * 1000:.3f} ms/op ({ratio:.2f}x)")
+        sys.exit(1 if regressions else 0)
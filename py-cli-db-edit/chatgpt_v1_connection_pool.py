@@ -0,0 +1,197 @@
+import itertools
+import os
+import queue
+import sys
+import threading
+from contextlib import contextmanager
+
+# sqlite_profiles (and sqlite_instrumentation) are shared by all programs and live in py/
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "py"))
+import sqlite_profiles  # noqa: E402
+
+
+class ConnectionPool:
+    """
+    A small thread-safe pool of SQLite connections to a single database file.
+
+    Connections are opened lazily (up to max_size) and handed back to the pool
+    after use, so callers do not pay for reconnecting on every query.
+    The schema initializer passed to initialize() runs only once per pool,
+    i.e. once per database file.
+
+    A caller that keeps a connection for its whole life (DatabaseManager)
+    takes it with acquire_dedicated(): such connections do not count against
+    max_size, so they never starve the short-lived connections of the pool.
+    """
+    def __init__(self, db_path: str, max_size: int = 5, timeout: float = 30.0, uri: bool = False,
+                 profile: str = None):
+        """
+        :param db_path: Path (or URI, see `uri`) of the SQLite database file.
+        :param max_size: Maximum number of connections open at the same time.
+        :param timeout: Seconds to wait for a free connection before giving up.
+        :param uri: True if db_path is a "file:" URI.
+        :param profile: sqlite_profiles profile applied to every new connection.
+        """
+        self.db_path = db_path
+        self.uri = uri
+        self.profile = profile
+        self.max_size = max_size
+        self.timeout = timeout
+        self._idle = queue.LifoQueue()
+        self._lock = threading.Lock()
+        self._init_lock = threading.Lock()
+        self._opened = 0
+        self._dedicated = set()
+        self._initialized = False
+        self.closed = False
+
+    def _open_connection(self):
+        """Open a new connection that may be used by any (single) thread at a time."""
+        return sqlite_profiles.connect(self.db_path, self.profile, check_same_thread=False, uri=self.uri)
+
+    def initialize(self, initializer):
+        """
+        Run initializer(connection) once for this database file, e.g. to create
+        the schema. Later calls return immediately.
+        """
+        if self._initialized:
+            return
+        with self._init_lock:
+            if self._initialized:
+                return
+            connection = self.acquire()
+            try:
+                initializer(connection)
+                connection.commit()
+            finally:
+                self.release(connection)
+            self._initialized = True
+
+    def acquire(self):
+        """
+        Take a connection from the pool, opening a new one if the pool is not full.
+        Blocks (up to self.timeout seconds) when all connections are in use.
+        """
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+
+        with self._lock:
+            if self._opened < self.max_size:
+                self._opened += 1
+                open_new = True
+            else:
+                open_new = False
+
+        if open_new:
+            try:
+                return self._open_connection()
+            except Exception:
+                with self._lock:
+                    self._opened -= 1
+                raise
+
+        try:
+            return self._idle.get(timeout=self.timeout)
+        except queue.Empty:
+            raise Exception(f"No free database connection for {self.db_path}.")
+
+    def acquire_dedicated(self):
+        """
+        Open a connection outside max_size for a caller that keeps it until it
+        is done with the database. release() closes it instead of keeping it idle.
+        """
+        connection = self._open_connection()
+        with self._lock:
+            self._dedicated.add(connection)
+        return connection
+
+    def release(self, connection):
+        """
+        Give a connection back to the pool. Uncommitted changes are rolled back.
+        Dedicated connections, and every connection once the pool is closed, are closed.
+        """
+        with self._lock:
+            dedicated = connection in self._dedicated
+            self._dedicated.discard(connection)
+        if dedicated:
+            connection.close()
+            return
+        if self.closed:
+            connection.close()
+            with self._lock:
+                self._opened -= 1
+            return
+        if connection.in_transaction:
+            connection.rollback()
+        self._idle.put(connection)
+
+    @contextmanager
+    def connection(self):
+        """
+        Context manager yielding a pooled connection. Commits on success,
+        rolls back on error and always returns the connection to the pool.
+        """
+        connection = self.acquire()
+        try:
+            yield connection
+            connection.commit()
+        except Exception:
+            connection.rollback()
+            raise
+        finally:
+            self.release(connection)
+
+    def close(self):
+        """Close all idle connections. Connections in use are closed when released later."""
+        self.closed = True
+        while True:
+            try:
+                connection = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            connection.close()
+            with self._lock:
+                self._opened -= 1
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+_memory_databases = itertools.count(1)
+
+
+def get_pool(db_path: str, max_size: int = 5, profile: str = None):
+    """
+    Return the shared ConnectionPool for the given database file,
+    creating it on first use. Pools are keyed by absolute path, so
+    "library.db" and "./library.db" share one pool. Asking for an existing
+    pool with another `profile` raises an Exception, since the connections
+    of the pool already use the profile it was created with.
+    """
+    if db_path == ":memory:":
+        # Every plain ':memory:' connection is a separate database, so the pool
+        # shares one private in-memory database between its connections instead
+        memory_uri = f"file:bookcase_memory_{next(_memory_databases)}?mode=memory&cache=shared"
+        return ConnectionPool(memory_uri, max_size=max_size, uri=True, profile=profile)
+
+    key = os.path.abspath(db_path)
+    with _pools_lock:
+        pool = _pools.get(key)
+        if pool is None:
+            pool = ConnectionPool(db_path, max_size=max_size, profile=profile)
+            _pools[key] = pool
+        elif pool.profile != profile:
+            raise Exception(f"The connections to {db_path} use the profile '{pool.profile}', not '{profile}'.")
+        return pool
+
+
+def close_all_pools():
+    """
+    Close idle connections of every pool created by get_pool. Connections still
+    in use are closed when they are released; get_pool creates new pools.
+    """
+    with _pools_lock:
+        for pool in _pools.values():
+            pool.close()
+        _pools.clear()
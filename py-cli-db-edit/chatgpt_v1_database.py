@@ -1,6 +1,67 @@
 import sqlite3
 import json
+import os
+import re
+import sys
 from datetime import datetime
+from itertools import islice
+
+# sqlite_profiles and normalize_isbn (books.isbn_norm) are shared with the programs in py/ -
+# the ISBN cache, the importer and the sync compare their ISBNs with it - so there is one implementation
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "py"))
+import chatgpt_v1_connection_pool  # noqa: E402
+import sqlite_profiles  # noqa: E402
+from chatgpt_v1_records import BookRecord  # noqa: E402
+from isbn_cache import normalize_isbn  # noqa: E402
+
+# Per-row outcomes reported by DatabaseManager.add_books_bulk
+BULK_INSERTED = "inserted"
+BULK_UPDATED = "updated"
+BULK_DUPLICATE = "duplicate"
+BULK_INVALID = "invalid"
+
+# What add_book / add_books_bulk do with a book whose ISBN is already stored
+CONFLICT_IGNORE = "ignore"                  # keep the stored book unchanged
+CONFLICT_UPDATE_MISSING = "update_missing"  # fill only the empty fields of the stored book
+CONFLICT_REPLACE = "replace"                # overwrite the stored book (its id is kept)
+CONFLICT_POLICIES = (CONFLICT_IGNORE, CONFLICT_UPDATE_MISSING, CONFLICT_REPLACE)
+
+BOOK_FIELDS = ("authors", "title", "edition", "language", "location", "publisher",
+               "release_year", "isbn_13", "pages", "tags", "description", "status")
+
+# JSON list columns mirrored into junction tables: (table, column, junction, key column,
+# value column, lookup table or None when the values are ids)
+JUNCTIONS = (
+    ("books", "authors", "book_author", "book_id", "author_id", "authors"),
+    ("books", "tags", "book_tag", "book_id", "tag_id", "tags"),
+    ("series", "books_ids", "series_book", "series_id", "book_id", None),
+    ("series", "tags", "series_tag", "series_id", "tag_id", "tags"),
+)
+
+# Columns searched by the LIKE search (_search_books_like)
+LIKE_SEARCH_COLUMNS = ("authors", "title", "publisher", "isbn_13", "tags", "release_year", "description")
+
+# Largest LIKE result kept in memory to narrow the next search (see _search_books_like)
+NARROWING_LIMIT = 20000
+
+# Version of the schema created by DatabaseManager (stored in PRAGMA user_version)
+SCHEMA_VERSION = 6
+
+# Kinds of change recorded in the 'updates' table (column 'action'; NULL in older entries)
+ACTION_UPDATE = "update"
+ACTION_DELETE = "delete"
+ACTION_UNDELETE = "undelete"
+
+# Books are deleted by setting this status (soft delete); purge_deleted_books removes them for good
+STATUS_DELETED = "deleted"
+
+# Condition selecting the books that are not deleted. Written exactly like the WHERE
+# of books_active_idx, so that SQLite can use that partial index.
+ACTIVE_BOOKS = "books.status IS NOT 'deleted'"
+
+# Columns of the update history entries returned by get_update_history / get_update_history_page
+UPDATE_FIELDS = ("id", "book_id", "series_id", "last_updated", "updated_by", "action", "fields")
+
 
 class DatabaseManager:
     def __init__(self):
@@ -10,19 +71,55 @@ class DatabaseManager:
         """
         self.connection = None
         self.cursor = None
-
-    def create_database(self, db_name: str):
+        self.db_path = None
+        self.pool = None
+        self.profile = None
+        self.fts_enabled = False
+        self._count_cache = {}
+        self._count_cache_version = None
+        self._last_like_search = None
+
+    def create_database(self, db_name: str, profile: str = "interactive"):
         """
         Create (or connect to) a SQLite database file with the given name
         and create the necessary tables if they do not exist.
+
+        Connections come from a pool shared by every DatabaseManager using
+        the same file, and the schema is created only once per file. The
+        manager's own connection (self.connection) is a dedicated one, outside
+        the size limit of the pool.
         
         :param db_name: The name (or path) of the SQLite database file.
+        :param profile: sqlite_profiles profile of the connections (WAL, synchronous, cache, ...).
         """
-        self.connection = sqlite3.connect(db_name)
+        if self.connection:
+            self.close()
+
+        self.db_path = db_name
+        self.profile = profile
+        self.pool = chatgpt_v1_connection_pool.get_pool(db_name, profile=profile)
+        self.pool.initialize(self._create_schema)
+
+        self.connection = self.pool.acquire_dedicated()
         self.cursor = self.connection.cursor()
 
+        self.cursor.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'books_fts'"
+        )
+        self.fts_enabled = self.cursor.fetchone() is not None
+        self._count_cache = {}
+        self._count_cache_version = None
+        self._last_like_search = None
+
+    def _create_schema(self, connection):
+        """
+        Create the tables (and the full-text index) if they do not exist.
+        Called by the connection pool once per database file.
+        """
+        cursor = connection.cursor()
+
         # Create 'books' table
-        self.cursor.execute("""
+        cursor.execute("""
             CREATE TABLE IF NOT EXISTS books (
                 id INTEGER PRIMARY KEY AUTOINCREMENT,
                 authors TEXT,
@@ -41,7 +138,7 @@ class DatabaseManager:
         """)
 
         # Create 'series' table
-        self.cursor.execute("""
+        cursor.execute("""
             CREATE TABLE IF NOT EXISTS series (
                 id INTEGER PRIMARY KEY AUTOINCREMENT,
                 title TEXT NOT NULL,
@@ -52,7 +149,7 @@ class DatabaseManager:
         """)
 
         # Create 'updates' table
-        self.cursor.execute("""
+        cursor.execute("""
             CREATE TABLE IF NOT EXISTS updates (
                 id INTEGER PRIMARY KEY AUTOINCREMENT,
                 book_id INTEGER,
@@ -64,7 +161,274 @@ class DatabaseManager:
             )
         """)
 
-        self.connection.commit()
+        # Full-text index over 'books' (falls back to LIKE when FTS5 is missing)
+        self._create_fts_index(cursor)
+
+        self._migrate_schema(cursor)
+
+    def _migrate_schema(self, cursor):
+        """
+        Bring an existing database up to SCHEMA_VERSION, one version at a time.
+        The current version is kept in PRAGMA user_version.
+
+        Every step (_migrate_to_<version>) runs in its own transaction together
+        with the user_version update, so a step that fails is rolled back
+        completely and simply runs again the next time the database is opened.
+        """
+        connection = cursor.connection
+        version = cursor.execute("PRAGMA user_version").fetchone()[0]
+        for target in range(version + 1, SCHEMA_VERSION + 1):
+            if connection.in_transaction:
+                connection.commit()
+            cursor.execute("BEGIN IMMEDIATE")
+            try:
+                # another program may have migrated the file in the meantime
+                if cursor.execute("PRAGMA user_version").fetchone()[0] < target:
+                    getattr(self, f"_migrate_to_{target}")(cursor)
+                    cursor.execute(f"PRAGMA user_version = {target}")
+                connection.commit()
+            except BaseException:
+                connection.rollback()
+                raise
+
+    def _migrate_to_1(self, cursor):
+        """Normalized ISBN column with a unique index, used by the UPSERT in add_book."""
+        cursor.execute("ALTER TABLE books ADD COLUMN isbn_norm TEXT")
+        seen = set()
+        duplicates = 0
+        rows = cursor.execute("SELECT id, isbn_13 FROM books ORDER BY id").fetchall()
+        for book_id, isbn_13 in rows:
+            isbn_norm = normalize_isbn(isbn_13)
+            if isbn_norm in seen:
+                # Older duplicates stay without a normalized ISBN (NULLs are not unique)
+                duplicates += 1
+                continue
+            seen.add(isbn_norm)
+            cursor.execute("UPDATE books SET isbn_norm = ? WHERE id = ?", (isbn_norm, book_id))
+        cursor.execute("CREATE UNIQUE INDEX IF NOT EXISTS books_isbn_norm_idx ON books (isbn_norm)")
+        if duplicates:
+            print(f"Schema migration: {duplicates} book(s) share an ISBN with an older book.")
+
+    def _migrate_to_2(self, cursor):
+        """Normalized authors/tags: indexed junction tables instead of LIKE over JSON."""
+        self._create_junction_tables(cursor)
+
+    def _migrate_to_3(self, cursor):
+        """
+        Audit log: kind of change and changed fields, indexes for the history queries
+        (newest first by id, per book / series, since a date) and compacted snapshots.
+        """
+        cursor.execute("ALTER TABLE updates ADD COLUMN action TEXT")
+        cursor.execute("ALTER TABLE updates ADD COLUMN fields TEXT")
+        cursor.execute("CREATE INDEX IF NOT EXISTS updates_book_idx ON updates (book_id, id)")
+        cursor.execute("CREATE INDEX IF NOT EXISTS updates_series_idx ON updates (series_id, id)")
+        cursor.execute("CREATE INDEX IF NOT EXISTS updates_last_updated_idx ON updates (last_updated, id)")
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS update_snapshots (
+                id INTEGER PRIMARY KEY,
+                book_id INTEGER,
+                series_id INTEGER,
+                update_count INTEGER NOT NULL,
+                first_updated TEXT,
+                last_updated TEXT,
+                updated_by TEXT,
+                compacted_at TEXT
+            )
+        """)
+        # One snapshot per (book, series) pair; NULL ids would never conflict in a plain unique index
+        cursor.execute("""
+            CREATE UNIQUE INDEX IF NOT EXISTS update_snapshots_entity_idx
+            ON update_snapshots (ifnull(book_id, 0), ifnull(series_id, 0))
+        """)
+
+    def _migrate_to_4(self, cursor):
+        """
+        Soft delete: when and from which status a book was deleted, partial indexes
+        for the active books and for the trash (ordered by deletion time).
+        """
+        cursor.execute("ALTER TABLE books ADD COLUMN deleted_at TEXT")
+        cursor.execute("ALTER TABLE books ADD COLUMN deleted_status TEXT")
+        cursor.execute("UPDATE books SET deleted_at = datetime('now', 'localtime') WHERE status = 'deleted'")
+        # The status before the deletion is not known: undelete_book brings these books back as 'incomplete'
+        cursor.execute("UPDATE books SET deleted_status = 'incomplete' WHERE status = 'deleted'")
+        cursor.execute("CREATE INDEX IF NOT EXISTS books_active_idx ON books (id) WHERE status IS NOT 'deleted'")
+        cursor.execute("CREATE INDEX IF NOT EXISTS books_deleted_idx ON books (deleted_at, id) WHERE status = 'deleted'")
+        # Every way of changing the status (delete_book, edits, imports) keeps deleted_at in step
+        cursor.execute("""
+            CREATE TRIGGER IF NOT EXISTS books_deleted_au AFTER UPDATE OF status ON books
+            WHEN (new.status = 'deleted') IS NOT (old.status = 'deleted') BEGIN
+                UPDATE books SET
+                    deleted_at = CASE WHEN new.status = 'deleted' THEN datetime('now', 'localtime') END,
+                    deleted_status = CASE WHEN new.status = 'deleted' THEN old.status END
+                WHERE id = new.id;
+            END
+        """)
+
+    def _migrate_to_5(self, cursor):
+        """
+        Junction triggers without INSERT OR IGNORE, which the UPSERT of add_book
+        overrode (re-adding a book with known authors or tags failed).
+        """
+        self._create_junction_triggers(cursor)
+
+    def _migrate_to_6(self, cursor):
+        """
+        The unique ISBN index covers only the books that are not deleted, so a
+        book can be added again while an older copy is in the trash. Books
+        deleted before version 4 get a status to return to on undelete.
+        """
+        cursor.execute("DROP INDEX IF EXISTS books_isbn_norm_idx")
+        cursor.execute("CREATE UNIQUE INDEX books_isbn_norm_idx ON books (isbn_norm) WHERE status IS NOT 'deleted'")
+        cursor.execute("UPDATE books SET deleted_status = 'incomplete' WHERE status = 'deleted' AND deleted_status IS NULL")
+
+    def _create_junction_tables(self, cursor):
+        """
+        Create the 'authors' and 'tags' lookup tables and the book_author,
+        book_tag, series_book and series_tag junction tables, fill them from
+        the JSON list columns and add triggers that keep them in sync with
+        every insert, update and delete of 'books' and 'series'.
+        """
+        cursor.execute("CREATE TABLE IF NOT EXISTS authors (id INTEGER PRIMARY KEY, name TEXT NOT NULL UNIQUE COLLATE NOCASE)")
+        cursor.execute("CREATE TABLE IF NOT EXISTS tags (id INTEGER PRIMARY KEY, name TEXT NOT NULL UNIQUE COLLATE NOCASE)")
+
+        for table, column, junction, key_column, value_column, lookup in JUNCTIONS:
+            cursor.execute(f"""
+                CREATE TABLE IF NOT EXISTS {junction} (
+                    {key_column} INTEGER NOT NULL,
+                    {value_column} INTEGER NOT NULL,
+                    position INTEGER NOT NULL,
+                    PRIMARY KEY ({key_column}, {value_column})
+                )
+            """)
+            cursor.execute(f"CREATE INDEX IF NOT EXISTS {junction}_{value_column}_idx ON {junction} ({value_column}, {key_column})")
+
+            # Migration: mirror the rows stored so far
+            fill = self._junction_fill(table, column, junction, key_column, value_column, lookup)
+            migrate = fill.replace("new.id", f"{table}.id").replace("new.", f"{table}.")
+            migrate = migrate.replace(f"FROM json_each", f"FROM {table}, json_each")
+            for statement in migrate.split(";"):
+                if statement.strip():
+                    cursor.execute(statement)
+
+        self._create_junction_triggers(cursor)
+
+    @staticmethod
+    def _junction_fill(table, column, junction, key_column, value_column, lookup):
+        """
+        Statements filling a junction table (and its lookup table) from the JSON
+        list column of the row `new`.
+
+        They are plain INSERTs that skip existing rows with NOT EXISTS / GROUP BY
+        instead of INSERT OR IGNORE: inside a trigger, the conflict policy of the
+        outer statement overrides OR IGNORE, so an UPSERT (ON CONFLICT DO UPDATE)
+        of 'books' would fail on the UNIQUE names of 'authors' and 'tags'.
+        """
+        # Only well-formed JSON arrays are mirrored; anything else counts as empty
+        items = f"json_each(CASE WHEN json_valid(new.{column}) AND json_type(new.{column}) = 'array' THEN new.{column} ELSE '[]' END)"
+        if lookup:
+            return f"""
+                INSERT INTO {lookup} (name)
+                    SELECT value FROM {items} WHERE type = 'text' AND value <> ''
+                    AND NOT EXISTS (SELECT 1 FROM {lookup} WHERE {lookup}.name = value)
+                    GROUP BY value COLLATE NOCASE;
+                INSERT INTO {junction} ({key_column}, {value_column}, position)
+                    SELECT new.id, {lookup}.id, MIN(j.key) FROM {items} AS j
+                    JOIN {lookup} ON {lookup}.name = j.value WHERE j.type = 'text'
+                    AND NOT EXISTS (SELECT 1 FROM {junction} AS x WHERE x.{key_column} = new.id AND x.{value_column} = {lookup}.id)
+                    GROUP BY new.id, {lookup}.id;
+            """
+        return f"""
+            INSERT INTO {junction} ({key_column}, {value_column}, position)
+                SELECT new.id, j.value, MIN(j.key) FROM {items} AS j WHERE j.type = 'integer'
+                AND NOT EXISTS (SELECT 1 FROM {junction} AS x WHERE x.{key_column} = new.id AND x.{value_column} = j.value)
+                GROUP BY new.id, j.value;
+        """
+
+    def _create_junction_triggers(self, cursor):
+        """
+        (Re)create the triggers keeping the junction tables in sync with the
+        JSON list columns; older versions of the triggers are replaced.
+        """
+        for table, column, junction, key_column, value_column, lookup in JUNCTIONS:
+            fill = self._junction_fill(table, column, junction, key_column, value_column, lookup)
+            for suffix in ("ai", "au", "ad"):
+                cursor.execute(f"DROP TRIGGER IF EXISTS {junction}_{suffix}")
+            cursor.execute(f"""
+                CREATE TRIGGER {junction}_ai AFTER INSERT ON {table} BEGIN
+                    {fill}
+                END
+            """)
+            cursor.execute(f"""
+                CREATE TRIGGER {junction}_au AFTER UPDATE OF {column} ON {table} BEGIN
+                    DELETE FROM {junction} WHERE {key_column} = old.id;
+                    {fill}
+                END
+            """)
+            cursor.execute(f"""
+                CREATE TRIGGER {junction}_ad AFTER DELETE ON {table} BEGIN
+                    DELETE FROM {junction} WHERE {key_column} = old.id;
+                END
+            """)
+
+    def _create_fts_index(self, cursor):
+        """
+        Create the FTS5 shadow index 'books_fts' over the searchable columns
+        of 'books', together with the triggers that keep it in sync.
+        Existing databases are migrated by rebuilding the index from 'books'
+        the first time it is created.
+
+        :return: True if the index is available, False if SQLite was built without FTS5.
+        """
+        cursor.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'books_fts'"
+        )
+        index_exists = cursor.fetchone() is not None
+
+        try:
+            cursor.execute("""
+                CREATE VIRTUAL TABLE IF NOT EXISTS books_fts USING fts5(
+                    authors,
+                    title,
+                    publisher,
+                    isbn_13,
+                    tags,
+                    release_year,
+                    description,
+                    content='books',
+                    content_rowid='id',
+                    tokenize='unicode61 remove_diacritics 2'
+                )
+            """)
+        except sqlite3.OperationalError:
+            # SQLite compiled without FTS5 - search_books uses the LIKE path
+            return False
+
+        cursor.execute("""
+            CREATE TRIGGER IF NOT EXISTS books_fts_ai AFTER INSERT ON books BEGIN
+                INSERT INTO books_fts (rowid, authors, title, publisher, isbn_13, tags, release_year, description)
+                VALUES (new.id, new.authors, new.title, new.publisher, new.isbn_13, new.tags, new.release_year, new.description);
+            END
+        """)
+        cursor.execute("""
+            CREATE TRIGGER IF NOT EXISTS books_fts_ad AFTER DELETE ON books BEGIN
+                INSERT INTO books_fts (books_fts, rowid, authors, title, publisher, isbn_13, tags, release_year, description)
+                VALUES ('delete', old.id, old.authors, old.title, old.publisher, old.isbn_13, old.tags, old.release_year, old.description);
+            END
+        """)
+        cursor.execute("""
+            CREATE TRIGGER IF NOT EXISTS books_fts_au AFTER UPDATE ON books BEGIN
+                INSERT INTO books_fts (books_fts, rowid, authors, title, publisher, isbn_13, tags, release_year, description)
+                VALUES ('delete', old.id, old.authors, old.title, old.publisher, old.isbn_13, old.tags, old.release_year, old.description);
+                INSERT INTO books_fts (rowid, authors, title, publisher, isbn_13, tags, release_year, description)
+                VALUES (new.id, new.authors, new.title, new.publisher, new.isbn_13, new.tags, new.release_year, new.description);
+            END
+        """)
+
+        if not index_exists:
+            # Migration of an existing library.db: index the rows already stored
+            cursor.execute("INSERT INTO books_fts (books_fts) VALUES ('rebuild')")
+
+        return True
 
     def add_book(self,
                 authors: list,
@@ -78,7 +442,8 @@ class DatabaseManager:
                 pages: str,
                 tags: list,
                 description: str,
-                status: str):
+                status: str,
+                on_conflict: str = CONFLICT_IGNORE):
         """
         Add a new book to the database.
         
@@ -94,6 +459,9 @@ class DatabaseManager:
         :param tags: List of tags
         :param description: Description or summary of the book
         :param status: One of ['deleted','incomplete','complete','update_requested']
+        :param on_conflict: What to do if a book with the same (normalized) ISBN exists:
+                            CONFLICT_IGNORE, CONFLICT_UPDATE_MISSING or CONFLICT_REPLACE
+        :return: True if the book was inserted (or the existing one updated), False otherwise
         """
         if not self.connection:
             raise Exception("Database not created or connected. Call create_database first.")
@@ -101,20 +469,194 @@ class DatabaseManager:
         authors_json = json.dumps(authors)
         tags_json = json.dumps(tags)
 
-        # dodajemy blokade duplikatu ISBN
-        query = "SELECT isbn_13 FROM books WHERE isbn_13 = '" + str(isbn_13) + "'"
-        self.cursor.execute(query)
-        rows = self.cursor.execute(query).fetchall()
-        if rows:
-            return False
+        # duplikaty ISBN blokuje unikalny indeks na isbn_norm
+        try:
+            self.cursor.execute(self._book_upsert_query(on_conflict),
+                                (authors_json, title, edition, language, location, publisher, release_year,
+                                 isbn_13, pages, tags_json, description, status, normalize_isbn(isbn_13)))
+            self.connection.commit()
+        except Exception:
+            # never leave the shared connection inside a failed transaction
+            self.connection.rollback()
+            raise
+        return self.cursor.rowcount > 0
 
-        self.cursor.execute("""
-            INSERT INTO books (authors,      title, edition, language, location, publisher, release_year, isbn_13, pages, tags,     description, status)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            """,              (authors_json, title, edition, language, location, publisher, release_year, isbn_13, pages, tags_json, description, status))
+    def _book_upsert_query(self, on_conflict: str):
+        """
+        Build the INSERT ... ON CONFLICT statement used by add_book and
+        add_books_bulk for the given conflict policy.
+        """
+        if on_conflict not in CONFLICT_POLICIES:
+            raise ValueError(f"Unknown conflict policy: {on_conflict}. Use one of {CONFLICT_POLICIES}.")
+
+        query = f"""
+            INSERT INTO books ({", ".join(BOOK_FIELDS)}, isbn_norm)
+            VALUES ({", ".join("?" * (len(BOOK_FIELDS) + 1))})
+            ON CONFLICT (isbn_norm) WHERE status IS NOT 'deleted' DO """
+
+        if on_conflict == CONFLICT_IGNORE:
+            return query + "NOTHING"
+
+        if on_conflict == CONFLICT_UPDATE_MISSING:
+            assignments = [
+                f"{field} = CASE WHEN books.{field} IS NULL OR books.{field} IN ('', '[]') "
+                f"THEN excluded.{field} ELSE books.{field} END"
+                for field in BOOK_FIELDS if field != "isbn_13"
+            ]
+        else:
+            assignments = [f"{field} = excluded.{field}" for field in BOOK_FIELDS]
+        return query + "UPDATE SET " + ", ".join(assignments)
 
-        self.connection.commit()
-        return True
+    def add_books_bulk(self, books, chunk_size: int = 1000, on_conflict: str = CONFLICT_IGNORE):
+        """
+        Add many books at once. Rows are read lazily from `books` (any iterable,
+        e.g. a generator over a CSV export) and inserted with executemany in
+        chunks of `chunk_size`, all inside a single transaction.
+
+        Duplicate ISBNs (already stored, or repeated within `books`) are detected
+        in memory, without a SELECT per row, and handled by the `on_conflict` policy.
+
+        :param books: Iterable of dicts with the same keys as the add_book parameters
+        :param chunk_size: Number of rows sent to SQLite per executemany call
+        :param on_conflict: CONFLICT_IGNORE, CONFLICT_UPDATE_MISSING or CONFLICT_REPLACE
+        :return: List of outcomes, one per input row, in input order:
+                 BULK_INSERTED, BULK_UPDATED, BULK_DUPLICATE or BULK_INVALID
+        """
+        if not self.connection:
+            raise Exception("Database not created or connected. Call create_database first.")
+        if chunk_size < 1:
+            raise ValueError("chunk_size must be a positive number.")
+
+        query = self._book_upsert_query(on_conflict)
+        conflict_outcome = BULK_DUPLICATE if on_conflict == CONFLICT_IGNORE else BULK_UPDATED
+
+        known_isbns = self.get_known_isbns()
+
+        # Large imports run with the "bulk-load" profile (no fsync per commit)
+        sqlite_profiles.apply_profile(self.connection, "bulk-load")
+
+        outcomes = []
+        books_iter = iter(books)
+        try:
+            while True:
+                chunk = list(islice(books_iter, chunk_size))
+                if not chunk:
+                    break
+
+                params = []
+                for book in chunk:
+                    row = self._bulk_book_params(book)
+                    if row is None:
+                        outcomes.append(BULK_INVALID)
+                    elif row[-1] in known_isbns:
+                        outcomes.append(conflict_outcome)
+                        if on_conflict != CONFLICT_IGNORE:
+                            params.append(row)
+                    else:
+                        known_isbns.add(row[-1])
+                        params.append(row)
+                        outcomes.append(BULK_INSERTED)
+
+                if params:
+                    self.cursor.executemany(query, params)
+
+            self.connection.commit()
+        except Exception:
+            self.connection.rollback()
+            raise
+        finally:
+            sqlite_profiles.apply_profile(self.connection, self.pool.profile)
+
+        return outcomes
+
+    def search_books_by_author(self, author: str):
+        """
+        Returns the books (rows of 'books') written by the given author
+        (exact name, case-insensitive), using the book_author junction table.
+        """
+        return self._search_books_by_name("authors", "book_author", "author_id", author)
+
+    def search_books_by_tag(self, tag: str):
+        """
+        Returns the books (rows of 'books') with the given tag
+        (exact name, case-insensitive), using the book_tag junction table.
+        """
+        return self._search_books_by_name("tags", "book_tag", "tag_id", tag)
+
+    def _search_books_by_name(self, lookup, junction, value_column, name):
+        query = f"""
+            SELECT books.*
+            FROM {lookup}
+            JOIN {junction} ON {junction}.{value_column} = {lookup}.id
+            JOIN books ON books.id = {junction}.book_id
+            WHERE {lookup}.name = ? AND {ACTIVE_BOOKS}
+            ORDER BY books.id
+        """
+        with self._get_connection() as conn:
+            return conn.execute(query, (name.strip(),)).fetchall()
+
+    def get_authors_for_books(self, book_ids):
+        """
+        Returns {book_id: [author names in order]} for the given book ids.
+        """
+        return self._get_names_for_books("authors", "book_author", "author_id", book_ids)
+
+    def get_tags_for_books(self, book_ids):
+        """
+        Returns {book_id: [tag names in order]} for the given book ids.
+        """
+        return self._get_names_for_books("tags", "book_tag", "tag_id", book_ids)
+
+    def _get_names_for_books(self, lookup, junction, value_column, book_ids):
+        book_ids = list(book_ids)
+        names = {book_id: [] for book_id in book_ids}
+        if not book_ids:
+            return names
+        query = f"""
+            SELECT {junction}.book_id, {lookup}.name
+            FROM {junction}
+            JOIN {lookup} ON {lookup}.id = {junction}.{value_column}
+            WHERE {junction}.book_id IN ({", ".join("?" * len(book_ids))})
+            ORDER BY {junction}.book_id, {junction}.position
+        """
+        with self._get_connection() as conn:
+            for book_id, name in conn.execute(query, book_ids):
+                names[book_id].append(name)
+        return names
+
+    def get_known_isbns(self):
+        """
+        Returns the set of normalized ISBNs (see normalize_isbn) of all books
+        that are not deleted (a deleted book does not stop its ISBN from being added again).
+        """
+        if not self.connection:
+            raise Exception("Database not created or connected. Call create_database first.")
+        self.cursor.execute(f"SELECT isbn_norm FROM books WHERE isbn_norm IS NOT NULL AND {ACTIVE_BOOKS}")
+        return {row[0] for row in self.cursor}
+
+    def _bulk_book_params(self, book):
+        """
+        Convert one add_books_bulk input row into the INSERT parameters tuple
+        (the BOOK_FIELDS values followed by the normalized ISBN).
+        Returns None when the row cannot be stored (missing title or ISBN).
+        """
+        if not isinstance(book, dict):
+            return None
+        title = book.get("title")
+        isbn_norm = normalize_isbn(book.get("isbn_13"))
+        if not title or not isbn_norm:
+            return None
+
+        values = []
+        for field in BOOK_FIELDS:
+            value = book.get(field)
+            if field in ("authors", "tags"):
+                value = json.dumps(value if value is not None else [])
+            elif field == "isbn_13":
+                value = str(value)
+            values.append(value)
+        values.append(isbn_norm)
+        return tuple(values)
 
     def add_series(self, title: str, books_ids: list = [], tags: list = [], description: str = None):
         """
@@ -240,22 +782,189 @@ class DatabaseManager:
             self.cursor.execute(query, params)
             self.connection.commit()
 
+    def get_update_history_page(self, book_id: int = None, series_id: int = None, since: str = None,
+                                page_size: int = 50, after_key: int = None):
+        """
+        Returns one page of the update history, newest entry first.
+
+        Pages are addressed by keyset (the id of the last entry of the previous
+        page), so every page is one indexed range read, however long the
+        history is.
+
+        :param book_id: Only entries of this book (optional).
+        :param series_id: Only entries of this series (optional).
+        :param since: Only entries with last_updated >= since, e.g. "2025-01-31" or "2025-01-31 12:00:00" (optional).
+        :param page_size: Number of entries per page.
+        :param after_key: Key returned with the previous page, None for the first page.
+        :return: (entries, next_key) - entries are dicts with the keys of UPDATE_FIELDS,
+                 next_key is None when this is the last page.
+        """
+        conditions = []
+        params = []
+        if book_id is not None:
+            conditions.append("book_id = ?")
+            params.append(book_id)
+        if series_id is not None:
+            conditions.append("series_id = ?")
+            params.append(series_id)
+        if since is not None:
+            conditions.append("last_updated >= ?")
+            params.append(since)
+        if after_key is not None:
+            conditions.append("id < ?")
+            params.append(after_key)
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        params.append(page_size + 1)
+
+        with self._get_connection() as conn:
+            rows = conn.execute(
+                f"SELECT {', '.join(UPDATE_FIELDS)} FROM updates {where} ORDER BY id DESC LIMIT ?", params
+            ).fetchall()
+
+        page = [self._update_as_dict(row) for row in rows[:page_size]]
+        next_key = page[-1]["id"] if len(rows) > page_size else None
+        return page, next_key
+
+    def get_update_history(self, book_id: int = None, series_id: int = None, since: str = None, limit: int = 50):
+        """
+        Returns the newest `limit` entries of the update history (see
+        get_update_history_page for the filters and paging through all of it).
+        """
+        return self.get_update_history_page(book_id, series_id, since, page_size=limit)[0]
+
+    def get_latest_updates(self, entity: str = "book", limit: int = None):
+        """
+        Returns the most recent update of every book (entity="book") or
+        series (entity="series"), most recently changed first.
+        Each group is resolved from the index on (book_id, id) / (series_id, id).
+        """
+        if entity not in ("book", "series"):
+            raise Exception(f"Unknown entity '{entity}', expected 'book' or 'series'.")
+        key_column = f"{entity}_id"
+        query = f"""
+            SELECT {', '.join(f'updates.{field}' for field in UPDATE_FIELDS)}
+            FROM (SELECT MAX(id) AS id FROM updates WHERE {key_column} IS NOT NULL GROUP BY {key_column}) AS latest
+            JOIN updates ON updates.id = latest.id
+            ORDER BY updates.id DESC
+        """
+        params = []
+        if limit is not None:
+            query += " LIMIT ?"
+            params.append(limit)
+        with self._get_connection() as conn:
+            return [self._update_as_dict(row) for row in conn.execute(query, params)]
+
+    def get_update_snapshots(self, book_id: int = None, series_id: int = None):
+        """
+        Returns the compacted history (see compact_update_history) as dicts:
+        book_id, series_id, update_count, first_updated, last_updated,
+        updated_by (list of names) and compacted_at.
+        """
+        conditions = []
+        params = []
+        if book_id is not None:
+            conditions.append("book_id = ?")
+            params.append(book_id)
+        if series_id is not None:
+            conditions.append("series_id = ?")
+            params.append(series_id)
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        with self._get_connection() as conn:
+            rows = conn.execute(f"""
+                SELECT book_id, series_id, update_count, first_updated, last_updated, updated_by, compacted_at
+                FROM update_snapshots {where} ORDER BY last_updated DESC
+            """, params).fetchall()
+        return [
+            {"book_id": row[0], "series_id": row[1], "update_count": row[2], "first_updated": row[3],
+             "last_updated": row[4], "updated_by": json.loads(row[5] or "[]"), "compacted_at": row[6]}
+            for row in rows
+        ]
+
+    def compact_update_history(self, older_than: str, chunk_size: int = 5000):
+        """
+        Retention job: rolls the update entries older than `older_than` into
+        one snapshot per book/series (number of updates, first and last date,
+        who made them) and deletes them, so the 'updates' table stays small.
+
+        The newest entry of every book and series is always kept, so
+        get_latest_updates is not affected. Entries are processed in chunks of
+        `chunk_size`, each in its own short transaction.
+
+        :param older_than: Entries with last_updated < older_than are compacted, e.g. "2025-01-01".
+        :param chunk_size: Entries compacted per transaction.
+        :return: Number of entries compacted.
+        """
+        compacted = 0
+        last_id = 0
+        now_str = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        while True:
+            with self._get_connection() as conn:
+                # "a newer entry exists" is one lookup in updates_book_idx / updates_series_idx
+                rows = conn.execute("""
+                    SELECT id, book_id, series_id, last_updated, updated_by FROM updates
+                    WHERE id > ? AND last_updated < ?
+                      AND (book_id IS NULL OR EXISTS (SELECT 1 FROM updates AS newer
+                                                      WHERE newer.book_id = updates.book_id AND newer.id > updates.id))
+                      AND (series_id IS NULL OR EXISTS (SELECT 1 FROM updates AS newer
+                                                        WHERE newer.series_id = updates.series_id AND newer.id > updates.id))
+                    ORDER BY id
+                    LIMIT ?
+                """, (last_id, older_than, chunk_size)).fetchall()
+                if not rows:
+                    break
+                last_id = rows[-1][0]
+
+                snapshots = {}
+                for _, book_id, series_id, last_updated, updated_by in rows:
+                    snapshot = snapshots.setdefault((book_id, series_id), [0, last_updated, last_updated, []])
+                    snapshot[0] += 1
+                    snapshot[1] = min(snapshot[1], last_updated)
+                    snapshot[2] = max(snapshot[2], last_updated)
+                    if updated_by is not None and updated_by not in snapshot[3]:
+                        snapshot[3].append(updated_by)
+
+                conn.executemany("""
+                    INSERT INTO update_snapshots
+                        (book_id, series_id, update_count, first_updated, last_updated, updated_by, compacted_at)
+                    VALUES (?, ?, ?, ?, ?, ?, ?)
+                    ON CONFLICT (ifnull(book_id, 0), ifnull(series_id, 0)) DO UPDATE SET
+                        update_count = update_count + excluded.update_count,
+                        first_updated = min(first_updated, excluded.first_updated),
+                        last_updated = max(last_updated, excluded.last_updated),
+                        updated_by = (SELECT json_group_array(value) FROM (
+                            SELECT value FROM json_each(update_snapshots.updated_by)
+                            UNION SELECT value FROM json_each(excluded.updated_by))),
+                        compacted_at = excluded.compacted_at
+                """, [
+                    (book_id, series_id, count, first, last, json.dumps(names), now_str)
+                    for (book_id, series_id), (count, first, last, names) in snapshots.items()
+                ])
+                conn.executemany("DELETE FROM updates WHERE id = ?", [(row[0],) for row in rows])
+            compacted += len(rows)
+        return compacted
+
+    @staticmethod
+    def _update_as_dict(row):
+        entry = dict(zip(UPDATE_FIELDS, row))
+        entry["fields"] = json.loads(entry["fields"]) if entry["fields"] else []
+        return entry
+
     def close(self):
-        """Close the database connection."""
+        """Close the manager's own connection (see create_database)."""
         if self.connection:
-            self.connection.close()
+            self.pool.release(self.connection)
             self.connection = None
             self.cursor = None
 
     def _get_connection(self):
         """
-        Returns a new connection to the SQLite database.
+        Returns a context manager yielding a pooled connection to the
+        database passed to create_database. The transaction is committed
+        when the `with` block ends without an error.
         """
-        # return sqlite3.connect(self.db_path)
-        self.create_database("library.db")
-        if not self.connection:
+        if not self.pool:
             raise Exception("Database not created or connected. Call create_database first.")
-        return self.connection
+        return self.pool.connection()
 
 
     def prompt_search_term(self):
@@ -264,35 +973,264 @@ class DatabaseManager:
         """
         return input("Enter a search term: ").strip()
 
-    def search_books(self, search_term):
+    def search_books(self, search_term, ranked: bool = True):
         """
         Searches the books table for partially matching strings in
-        title, authors, isbn_13, publisher, release_year, and description.
+        title, authors, isbn_13, publisher, tags, release_year, and description.
+
+        When the FTS5 index is available every word of the search term is
+        matched as a prefix ("tolk" finds "Tolkien") and, if ranked is True,
+        the results are ordered by relevance (bm25). Otherwise the LIKE
+        substring search over all columns is used.
 
         Returns a list of matching book records (as tuples or dicts).
         """
-        query = """
-        SELECT
-            *
-        FROM books
-        WHERE authors LIKE ?
-           OR title LIKE ?
-           OR publisher LIKE ?
-           OR isbn_13 LIKE ?
-           OR tags LIKE ?
-           OR release_year LIKE ?
-           OR description LIKE ?
+        fts_query = self._build_fts_query(search_term)
+        if self.fts_enabled and fts_query:
+            query = f"""
+            SELECT
+                books.*
+            FROM books_fts
+            JOIN books ON books.id = books_fts.rowid
+            WHERE books_fts MATCH ? AND {ACTIVE_BOOKS}
+            """
+            if ranked:
+                query += " ORDER BY bm25(books_fts)"
+            try:
+                with self._get_connection() as conn:
+                    cursor = conn.cursor()
+                    cursor.execute(query, (fts_query,))
+                    return cursor.fetchall()
+            except sqlite3.OperationalError as e:
+                # Unusable index - fall back to the LIKE search
+                if not self._fts_failed(e, search_term):
+                    raise
+
+        return self._search_books_like(search_term)
+
+    def _fts_failed(self, error, search_term):
+        """
+        Tells whether an OperationalError of a full-text search for search_term
+        comes from the FTS index itself (a MATCH expression FTS5 rejects, a
+        missing index or FTS5 module); such searches are answered by the LIKE
+        search instead. A missing index also turns FTS off for this manager.
+        Any other error (locked database, datatype mismatch, ...) is not an
+        FTS problem and must be raised.
+        """
+        message = str(error).lower()
+        if message in ("no such table: books_fts", "no such module: fts5"):
+            self.fts_enabled = False
+            return True
+        if message.startswith("fts5: syntax error") or message.startswith("unable to use function match"):
+            return True
+        # FTS5 reports a "column:" filter of the MATCH expression that names no column of the index
+        if message.startswith("no such column: "):
+            fts_query = (self._build_fts_query(search_term) or "").lower()
+            return f"{message[len('no such column: '):]}:" in fts_query
+        return False
+
+    def _build_fts_query(self, search_term):
+        """
+        Turns free text typed by the user into an FTS5 MATCH expression,
+        where every word is quoted (so FTS5 operators are not interpreted)
+        and matched as a prefix. Returns None if there is nothing to match.
+        """
+        terms = []
+        for word in search_term.split():
+            word = word.replace('"', '""')
+            terms.append(f'"{word}"*')
+        return " ".join(terms) if terms else None
+
+    def _search_books_like(self, search_term):
+        """
+        LIKE based fallback for search_books (full table scan).
+
+        The last result is kept in memory: when the next search term extends
+        it ("tolk" -> "tolki") and the database has not changed, the matches
+        can only be a subset, so they are filtered from that result instead
+        of scanning the table again.
+        """
+        last = self._last_like_search
+        version = self._data_version()
+        if (last is not None and last["version"] == version and version is not None
+                and re.match(re.escape(last["term"]), search_term, re.IGNORECASE | re.ASCII)
+                and not any(ch in search_term for ch in "%_")):
+            results = self._narrow_like_results(last, search_term)
+        else:
+            query = f"""
+            SELECT
+                *
+            FROM books
+            WHERE ({" OR ".join(f"{column} LIKE ?" for column in LIKE_SEARCH_COLUMNS)}) AND {ACTIVE_BOOKS}
+            """
+
+            like_term = f"%{search_term}%"
+            params = [like_term] * len(LIKE_SEARCH_COLUMNS)
+
+            with self._get_connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute(query, params)
+                results = cursor.fetchall()
+                column_names = [column[0] for column in cursor.description]
+            last = {"positions": [column_names.index(column) for column in LIKE_SEARCH_COLUMNS]}
+
+        if len(results) <= NARROWING_LIMIT:
+            self._last_like_search = dict(last, term=search_term, version=version, results=results)
+        else:
+            self._last_like_search = None
+        return results
+
+    @staticmethod
+    def _narrow_like_results(last, search_term):
+        """
+        Rows of an earlier LIKE search result that also match search_term,
+        compared the way LIKE does (only ASCII letters case-insensitive).
+        """
+        pattern = re.compile(re.escape(search_term), re.IGNORECASE | re.ASCII)
+        positions = last["positions"]
+        return [
+            row for row in last["results"]
+            if any(row[i] is not None and pattern.search(str(row[i])) for i in positions)
+        ]
+
+    def _data_version(self):
         """
+        Changes whenever the database is modified, by this connection
+        (total_changes) or any other (PRAGMA data_version). None when not connected.
+        """
+        if not self.connection:
+            return None
+        return (
+            self.connection.execute("PRAGMA data_version").fetchone()[0],
+            self.connection.total_changes,
+        )
+
+    def _search_filter(self, search_term, use_fts: bool = True):
+        """
+        Returns (from_sql, where_sql, params, ranked) describing the books
+        matching search_term, shared by search_books_page and count_search_results.
+
+        "author:<name>" and "tag:<name>" select the exact author or tag
+        through the junction tables, other text uses the FTS index (ranked)
+        or, without it or with use_fts=False, the LIKE search. Deleted books never match.
+        """
+        prefix, _, value = search_term.partition(":")
+        prefix = prefix.strip().lower()
+        if value.strip() and prefix in ("author", "tag"):
+            lookup, junction, value_column = (
+                ("authors", "book_author", "author_id") if prefix == "author"
+                else ("tags", "book_tag", "tag_id")
+            )
+            where = f"""books.id IN (
+                SELECT {junction}.book_id FROM {junction}
+                JOIN {lookup} ON {lookup}.id = {junction}.{value_column}
+                WHERE {lookup}.name = ?) AND {ACTIVE_BOOKS}"""
+            return "books", where, [value.strip()], False
+
+        fts_query = self._build_fts_query(search_term)
+        if use_fts and self.fts_enabled and fts_query:
+            return ("books_fts JOIN books ON books.id = books_fts.rowid",
+                    f"books_fts MATCH ? AND {ACTIVE_BOOKS}", [fts_query], True)
 
         like_term = f"%{search_term}%"
-        params = (like_term, like_term, like_term, like_term, like_term, like_term, like_term)
+        where = f"({' OR '.join(f'books.{column} LIKE ?' for column in LIKE_SEARCH_COLUMNS)}) AND {ACTIVE_BOOKS}"
+        return "books", where, [like_term] * len(LIKE_SEARCH_COLUMNS), False
+
+    def search_books_page(self, search_term, page_size: int = 10, after_key=None):
+        """
+        Returns one page of search results, read from the database with LIMIT
+        instead of loading every match.
+
+        Pages are addressed by keyset: pass the key returned for the previous
+        page to get the next one. Ranked (FTS) results are ordered by
+        (bm25 rank, id), all others by id.
+
+        :param search_term: Same syntax as DatabaseTextInterface searches ("author:", "tag:", text).
+        :param page_size: Number of books per page.
+        :param after_key: Key of the last book of the previous page, None for the first page.
+        :return: (rows, next_key) - rows in the layout of BookRecord, next_key is
+                 None when this is the last page.
+        """
+        try:
+            return self._search_page(search_term, page_size, after_key, use_fts=True)
+        except sqlite3.OperationalError as e:
+            if not self._fts_failed(e, search_term):
+                raise
+            # The ranked keyset does not apply to the LIKE order - start again at the first page
+            return self._search_page(search_term, page_size, None, use_fts=False)
+
+    def _search_page(self, search_term, page_size, after_key, use_fts):
+        """One attempt of search_books_page (see _search_filter for use_fts)."""
+        from_sql, where, params, ranked = self._search_filter(search_term, use_fts)
+        columns = ", ".join(f"books.{field}" for field in BookRecord.FIELDS)
+        params = list(params)
+
+        if ranked:
+            order_key = "books_fts.rank, books.id"
+            if after_key is not None:
+                where += " AND (books_fts.rank, books.id) > (?, ?)"
+                params.extend(after_key)
+            key_columns = "books_fts.rank, books.id"
+        else:
+            order_key = "books.id"
+            if after_key is not None:
+                where += " AND books.id > ?"
+                params.append(after_key)
+            key_columns = "books.id"
+
+        query = f"""
+            SELECT {columns}, {key_columns}
+            FROM {from_sql}
+            WHERE {where}
+            ORDER BY {order_key}
+            LIMIT ?
+        """
+        params.append(page_size + 1)
 
         with self._get_connection() as conn:
-            cursor = conn.cursor()
-            cursor.execute(query, params)
-            results = cursor.fetchall()
+            rows = conn.execute(query, params).fetchall()
 
-        return results
+        key_width = 2 if ranked else 1
+        page = rows[:page_size]
+        next_key = None
+        if len(rows) > page_size:
+            last = page[-1][-key_width:]
+            next_key = tuple(last) if ranked else last[0]
+        return [row[:-key_width] for row in page], next_key
+
+    def count_search_results(self, search_term):
+        """
+        Returns the number of books matching search_term. Counts are cached
+        until the database changes (PRAGMA data_version / total_changes).
+        """
+        version = self._data_version()
+        if version is None or version != self._count_cache_version:
+            self._count_cache = {}
+            self._count_cache_version = version
+
+        if search_term not in self._count_cache:
+            try:
+                count = self._count_search(search_term, use_fts=True)
+            except sqlite3.OperationalError as e:
+                if not self._fts_failed(e, search_term):
+                    raise
+                count = self._count_search(search_term, use_fts=False)
+            self._count_cache[search_term] = count
+        return self._count_cache[search_term]
+
+    def _count_search(self, search_term, use_fts):
+        """One attempt of count_search_results (see _search_filter for use_fts)."""
+        from_sql, where, params, _ = self._search_filter(search_term, use_fts)
+        with self._get_connection() as conn:
+            return conn.execute(f"SELECT COUNT(*) FROM {from_sql} WHERE {where}", params).fetchone()[0]
+
+    def get_book(self, book_id):
+        """
+        Returns a single book (row in the layout of BookRecord) or None if it does not exist.
+        """
+        columns = ", ".join(BookRecord.FIELDS)
+        with self._get_connection() as conn:
+            return conn.execute(f"SELECT {columns} FROM books WHERE id = ?", (book_id,)).fetchone()
 
     def prompt_book_selection(self, books):
         """
@@ -418,6 +1356,10 @@ class DatabaseManager:
         # 1) Update the books table
         set_clause = ", ".join(f"{field} = ?" for field in updates.keys())
         values = list(updates.values())
+        if "isbn_13" in updates:
+            # keep the normalized ISBN (unique index) in step with isbn_13
+            set_clause += ", isbn_norm = ?"
+            values.append(normalize_isbn(updates["isbn_13"]))
         values.append(book_id)  # for the WHERE clause
 
         update_query = f"UPDATE books SET {set_clause} WHERE id = ?"
@@ -429,11 +1371,12 @@ class DatabaseManager:
             # 2) Record an update in the updates table
             now_str = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
             updates_insert_query = """
-                INSERT INTO updates (book_id, series_id, last_updated, updated_by)
-                VALUES (?, ?, ?, ?)
+                INSERT INTO updates (book_id, series_id, last_updated, updated_by, action, fields)
+                VALUES (?, ?, ?, ?, ?, ?)
             """
             # For this example, we'll pass series_id as None (or 0 if you prefer).
-            cursor.execute(updates_insert_query, (book_id, None, now_str, updated_by))
+            cursor.execute(updates_insert_query, (book_id, None, now_str, updated_by,
+                                                  ACTION_UPDATE, json.dumps(list(updates))))
             conn.commit()
 
         if updates:
@@ -447,23 +1390,97 @@ class DatabaseManager:
 
     def delete_book(self, book_id, updated_by="script"):
         """
-        Delete the specified book from the books table and record the update in the updates table.
+        Mark the specified book as deleted (status 'deleted'; the books_deleted_au
+        trigger stores deleted_at and the previous status) and record the update
+        in the updates table. The book disappears from searches and can be
+        brought back with undelete_book until purge_deleted_books removes it.
+        """
+        self._set_deleted(book_id, True, updated_by)
+
+    def undelete_book(self, book_id, updated_by="script"):
+        """
+        Restore a deleted book with the status it had before it was deleted
+        and record the update in the updates table. Raises sqlite3.IntegrityError
+        when the ISBN was added again as another book in the meantime.
         """
+        self._set_deleted(book_id, False, updated_by)
+
+    def _set_deleted(self, book_id, deleted, updated_by):
         with self._get_connection() as conn:
             cursor = conn.cursor()
-            # 1) Delete from books table
-            delete_query = "DELETE FROM books WHERE id = ?"
-            cursor.execute(delete_query, (book_id,))
+            # 1) Change the status in the books table
+            if deleted:
+                cursor.execute(f"UPDATE books SET status = ? WHERE id = ? AND {ACTIVE_BOOKS}", (STATUS_DELETED, book_id))
+            else:
+                cursor.execute("UPDATE books SET status = deleted_status WHERE id = ? AND status = ?",
+                               (book_id, STATUS_DELETED))
+            if cursor.rowcount == 0:
+                return
 
             # 2) Record the 'update' in the updates table
             now_str = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
             updates_insert_query = """
-                INSERT INTO updates (book_id, series_id, last_updated, updated_by)
-                VALUES (?, ?, ?, ?)
+                INSERT INTO updates (book_id, series_id, last_updated, updated_by, action)
+                VALUES (?, ?, ?, ?, ?)
             """
-            cursor.execute(updates_insert_query, (book_id, None, now_str, updated_by))
+            cursor.execute(updates_insert_query, (book_id, None, now_str, updated_by,
+                                                  ACTION_DELETE if deleted else ACTION_UNDELETE))
             conn.commit()
 
+    def get_deleted_books(self, limit: int = None):
+        """
+        Returns the deleted books, most recently deleted first, as dicts with
+        the BookRecord fields plus deleted_at. Read from the partial index
+        books_deleted_idx, so the cost follows the size of the trash, not of the catalogue.
+
+        :param limit: Maximum number of books (optional).
+        """
+        columns = ", ".join(BookRecord.FIELDS)
+        query = f"""
+            SELECT {columns}, deleted_at FROM books
+            WHERE status = ?
+            ORDER BY deleted_at DESC, id DESC
+        """
+        params = [STATUS_DELETED]
+        if limit is not None:
+            query += " LIMIT ?"
+            params.append(limit)
+        with self._get_connection() as conn:
+            rows = conn.execute(query, params).fetchall()
+        return [dict(zip(BookRecord.FIELDS + ("deleted_at",), row)) for row in rows]
+
+    def purge_deleted_books(self, older_than: str = None, chunk_size: int = 500):
+        """
+        Permanently removes deleted books together with their update history
+        (entries and snapshots) and, through the triggers, their full-text and
+        junction rows. Books are deleted in chunks of `chunk_size`, each in
+        its own short transaction, so other writers are never locked out for long.
+
+        :param older_than: Only books deleted before this date, e.g. "2025-01-01"; None purges the whole trash.
+        :param chunk_size: Books removed per transaction.
+        :return: Number of books removed.
+        """
+        condition = "status = ?"
+        params = [STATUS_DELETED]
+        if older_than is not None:
+            condition += " AND deleted_at < ?"
+            params.append(older_than)
+
+        purged = 0
+        while True:
+            with self._get_connection() as conn:
+                book_ids = [row[0] for row in conn.execute(
+                    f"SELECT id FROM books WHERE {condition} ORDER BY deleted_at, id LIMIT ?", params + [chunk_size])]
+                if book_ids:
+                    placeholders = ", ".join("?" * len(book_ids))
+                    conn.execute(f"DELETE FROM updates WHERE book_id IN ({placeholders})", book_ids)
+                    conn.execute(f"DELETE FROM update_snapshots WHERE book_id IN ({placeholders})", book_ids)
+                    conn.execute(f"DELETE FROM books WHERE id IN ({placeholders})", book_ids)
+            deleted = len(book_ids)
+            purged += deleted
+            if deleted < chunk_size:
+                return purged
+
     def _get_book_as_dict(self, book_tuple):
         """
         Utility method to convert a book tuple into a dictionary for easier old/new comparison.
@@ -1,66 +1,121 @@
-import sqlite3
-import json
+import os
+import sys
+
+# sqlite_profiles (and sqlite_instrumentation) are shared by all programs and live in py/
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "py"))
+import sqlite_profiles  # noqa: E402
+from chatgpt_v1_records import BookRecord, SeriesRecord, BOOK_COLUMNS, SERIES_COLUMNS
+
+# Keys (in order) of the dicts returned by get_all_books, unchanged since before BookRecord
+ALL_BOOKS_KEYS = ("id", "title", "authors", "publisher", "release_year", "isbn_13", "pages", "tags",
+                  "description", "status")
 
 class DatabaseViewer:
-    def __init__(self, db_name: str):
+    def __init__(self, db_name: str, profile: str = "read-only-viewer"):
         """
         Initialize the viewer by connecting to an existing SQLite database.
         :param db_name: Path to the SQLite database file.
+        :param profile: sqlite_profiles profile of the connection.
         """
-        self.connection = sqlite3.connect(db_name)
+        self.connection = sqlite_profiles.connect(db_name, profile)
         self.cursor = self.connection.cursor()
 
+    def _has_table(self, table):
+        return self.cursor.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (table,)
+        ).fetchone() is not None
+
+    def _get_junction_names(self, query, keys):
+        """
+        Runs a (key, value) query over a junction table for the given keys
+        and returns {key: [values in order]}.
+        """
+        grouped = {key: [] for key in keys}
+        if keys:
+            query = query.format(placeholders=", ".join("?" * len(keys)))
+            for key, value in self.connection.execute(query, keys):
+                grouped[key].append(value)
+        return grouped
+
+    def iter_books(self, batch_size: int = 500):
+        """
+        Generator over all books of the 'books' table as BookRecord objects.
+        Rows are read in batches of batch_size, so the whole catalogue is never
+        held in memory. Authors and tags come from the book_author / book_tag
+        junction tables when the database has them, otherwise they are decoded
+        lazily from the JSON columns.
+        """
+        use_junctions = self._has_table('book_author')
+        cursor = self.connection.execute(f"SELECT {BOOK_COLUMNS} FROM books ORDER BY id")
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                break
+            if not use_junctions:
+                for row in rows:
+                    yield BookRecord(row)
+                continue
+            ids = [row[0] for row in rows]
+            authors = self._get_junction_names("""
+                SELECT book_author.book_id, authors.name FROM book_author
+                JOIN authors ON authors.id = book_author.author_id
+                WHERE book_author.book_id IN ({placeholders})
+                ORDER BY book_author.book_id, book_author.position
+            """, ids)
+            tags = self._get_junction_names("""
+                SELECT book_tag.book_id, tags.name FROM book_tag
+                JOIN tags ON tags.id = book_tag.tag_id
+                WHERE book_tag.book_id IN ({placeholders})
+                ORDER BY book_tag.book_id, book_tag.position
+            """, ids)
+            for row in rows:
+                yield BookRecord(row, authors=authors[row[0]], tags=tags[row[0]])
+
+    def iter_series(self, batch_size: int = 500):
+        """
+        Generator over all series of the 'series' table as SeriesRecord objects,
+        read in batches of batch_size (see iter_books).
+        """
+        use_junctions = self._has_table('series_book')
+        cursor = self.connection.execute(f"SELECT {SERIES_COLUMNS} FROM series ORDER BY id")
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                break
+            if not use_junctions:
+                for row in rows:
+                    yield SeriesRecord(row)
+                continue
+            ids = [row[0] for row in rows]
+            books_ids = self._get_junction_names("""
+                SELECT series_id, book_id FROM series_book
+                WHERE series_id IN ({placeholders})
+                ORDER BY series_id, position
+            """, ids)
+            tags = self._get_junction_names("""
+                SELECT series_tag.series_id, tags.name FROM series_tag
+                JOIN tags ON tags.id = series_tag.tag_id
+                WHERE series_tag.series_id IN ({placeholders})
+                ORDER BY series_tag.series_id, series_tag.position
+            """, ids)
+            for row in rows:
+                yield SeriesRecord(row, books_ids=books_ids[row[0]], tags=tags[row[0]])
+
     def get_all_books(self):
         """
         Retrieve all books from the 'books' table.
         Returns a list of dictionaries, each dictionary containing the book data.
-        JSON fields (authors, tag_genre, tag_story) are converted back into Python lists.
+        Prefer iter_books() for large catalogues.
         """
-        query = "SELECT id, title, authors, publisher, release_year, isbn_13, pages, tags, description, status FROM books"
-        rows = self.cursor.execute(query).fetchall()
-
-        books = []
-        for row in rows:
-            # row = (id, title, authors, publisher, release_year, isbn_13, 
-            #        tag_genre, tag_story, description, status)
-            book = {
-                'id': row[0],
-                'title': row[1],
-                'authors': json.loads(row[2]) if row[2] else [],
-                'publisher': row[3],
-                'release_year': row[4],
-                'isbn_13': row[5],
-                'pages': row[6],
-                'tags': json.loads(row[7]) if row[7] else [],
-                'description': row[7],
-                'status': row[8],
-            }
-            books.append(book)
-
-        return books
+        return [book.to_dict(ALL_BOOKS_KEYS) for book in self.iter_books()]
 
     def get_all_series(self):
         """
         Retrieve all series from the 'series' table.
         Returns a list of dictionaries, each dictionary containing the series data.
-        JSON fields (books) are converted back into Python lists.
+        Prefer iter_series() for large catalogues.
         """
-        query = "SELECT id, title, books_ids, tags, description FROM series"
-        rows = self.cursor.execute(query).fetchall()
-
-        all_series = []
-        for row in rows:
-            # row = (id, title, books)
-            series = {
-                'id': row[0],
-                'title': row[1],
-                'books_ids': json.loads(row[2]) if row[2] else [],
-                'tags': json.loads(row[3]) if row[3] else [],
-                'description': row[4]
-            }
-            all_series.append(series)
-
-        return all_series
+        return [series.to_dict() for series in self.iter_series()]
 
     def get_all_updates(self):
         """
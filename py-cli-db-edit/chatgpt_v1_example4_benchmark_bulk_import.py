@@ -0,0 +1,68 @@
+import os
+import sys
+import tempfile
+import time
+import chatgpt_v1_database
+
+
+def generate_books(count, duplicate_every=50):
+    """
+    Yields synthetic book rows for the benchmark. Every `duplicate_every`-th
+    row repeats an earlier ISBN, so the duplicate detection is exercised too.
+    """
+    for i in range(count):
+        isbn_number = i - 1 if (duplicate_every and i and i % duplicate_every == 0) else i
+        yield {
+            "authors": [f"Author {i % 997}", f"Co-Author {i % 113}"],
+            "title": f"Benchmark Book {i}",
+            "edition": "1",
+            "language": "EN",
+            "location": "Warsaw",
+            "publisher": f"Publisher {i % 37}",
+            "release_year": str(1950 + i % 75),
+            "isbn_13": f"978{isbn_number:010d}",
+            "pages": str(100 + i % 900),
+            "tags": ["Benchmark", f"Tag {i % 23}"],
+            "description": "A synthetic book used to measure import throughput.",
+            "status": "incomplete",
+        }
+
+
+def benchmark_add_book(db_path, count):
+    db_manager = chatgpt_v1_database.DatabaseManager()
+    db_manager.create_database(db_path)
+    start = time.perf_counter()
+    for book in generate_books(count):
+        db_manager.add_book(**book)
+    elapsed = time.perf_counter() - start
+    db_manager.close()
+    return elapsed
+
+
+def benchmark_add_books_bulk(db_path, count, chunk_size):
+    db_manager = chatgpt_v1_database.DatabaseManager()
+    db_manager.create_database(db_path)
+    start = time.perf_counter()
+    outcomes = db_manager.add_books_bulk(generate_books(count), chunk_size=chunk_size)
+    elapsed = time.perf_counter() - start
+    db_manager.close()
+    return elapsed, outcomes
+
+
+if __name__ == "__main__":
+
+    # Usage: python chatgpt_v1_example4_benchmark_bulk_import.py [rows] [chunk_size]
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    chunk_size = int(sys.argv[2]) if len(sys.argv) > 2 else 1000
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        elapsed_single = benchmark_add_book(os.path.join(tmp_dir, "single.db"), count)
+        print(f"add_book:       {count} rows in {elapsed_single:.2f} s "
+              f"({count / elapsed_single:.0f} rows/s)")
+
+        elapsed_bulk, outcomes = benchmark_add_books_bulk(os.path.join(tmp_dir, "bulk.db"), count, chunk_size)
+        print(f"add_books_bulk: {count} rows in {elapsed_bulk:.2f} s "
+              f"({count / elapsed_bulk:.0f} rows/s, chunk_size={chunk_size})")
+
+        summary = {outcome: outcomes.count(outcome) for outcome in set(outcomes)}
+        print(f"Outcomes: {summary}")
@@ -0,0 +1,138 @@
+import json
+
+
+_NOT_DECODED = object()
+
+
+def _decode_list(value):
+    return json.loads(value) if value else []
+
+
+def _column_property(index):
+    return property(lambda self: self._row[index])
+
+
+def _json_property(index, slot):
+    def getter(self):
+        value = getattr(self, slot)
+        if value is _NOT_DECODED:
+            value = _decode_list(self._row[index])
+            setattr(self, slot, value)
+        return value
+    return property(getter)
+
+
+class _Record:
+    """
+    Base of the read-only row records. A record keeps the sqlite3 row tuple
+    as it is and has no per-instance __dict__; JSON list columns are decoded
+    on first access only and then kept.
+
+    record.title and record["title"] return the (decoded) field,
+    record[0] returns the raw column value, as with a plain row tuple.
+    A record equals a dict with the same fields and values (see to_dict).
+    """
+    __slots__ = ("_row",)
+
+    FIELDS = ()
+
+    def __init__(self, row):
+        self._row = row
+
+    def __getitem__(self, key):
+        if isinstance(key, int):
+            return self._row[key]
+        if key not in self.FIELDS:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except (KeyError, IndexError):
+            return default
+
+    def keys(self):
+        return self.FIELDS
+
+    def __iter__(self):
+        return iter(self.FIELDS)
+
+    def __len__(self):
+        return len(self.FIELDS)
+
+    def to_dict(self, fields=None):
+        """
+        Returns the record as a plain dictionary (JSON fields decoded).
+
+        :param fields: Only these fields, in this order (default: all FIELDS).
+        """
+        return {field: getattr(self, field) for field in (fields or self.FIELDS)}
+
+    def __eq__(self, other):
+        if isinstance(other, _Record):
+            return type(self) is type(other) and self.to_dict() == other.to_dict()
+        if isinstance(other, dict):
+            return self.to_dict() == other
+        return NotImplemented
+
+    __hash__ = None
+
+    def __repr__(self):
+        return f"{type(self).__name__}({self.to_dict()!r})"
+
+
+class BookRecord(_Record):
+    """
+    A row of the 'books' table (columns in table order: id, authors, title, ...).
+    Authors and tags already read from the junction tables may be passed in,
+    otherwise they are decoded from the JSON columns when first used.
+    """
+    __slots__ = ("_authors", "_tags")
+
+    FIELDS = ("id", "authors", "title", "edition", "language", "location", "publisher",
+              "release_year", "isbn_13", "pages", "tags", "description", "status")
+
+    def __init__(self, row, authors=None, tags=None):
+        self._row = row
+        self._authors = _NOT_DECODED if authors is None else authors
+        self._tags = _NOT_DECODED if tags is None else tags
+
+    id = _column_property(0)
+    authors = _json_property(1, "_authors")
+    title = _column_property(2)
+    edition = _column_property(3)
+    language = _column_property(4)
+    location = _column_property(5)
+    publisher = _column_property(6)
+    release_year = _column_property(7)
+    isbn_13 = _column_property(8)
+    pages = _column_property(9)
+    tags = _json_property(10, "_tags")
+    description = _column_property(11)
+    status = _column_property(12)
+
+
+class SeriesRecord(_Record):
+    """
+    A row of the 'series' table (id, title, books_ids, tags, description).
+    """
+    __slots__ = ("_books_ids", "_tags")
+
+    FIELDS = ("id", "title", "books_ids", "tags", "description")
+
+    def __init__(self, row, books_ids=None, tags=None):
+        self._row = row
+        self._books_ids = _NOT_DECODED if books_ids is None else books_ids
+        self._tags = _NOT_DECODED if tags is None else tags
+
+    id = _column_property(0)
+    title = _column_property(1)
+    books_ids = _json_property(2, "_books_ids")
+    tags = _json_property(3, "_tags")
+    description = _column_property(4)
+
+
+# Column lists matching the record layouts, for SELECT statements
+BOOK_COLUMNS = ", ".join(BookRecord.FIELDS)
+SERIES_COLUMNS = ", ".join(SeriesRecord.FIELDS)
@@ -1,4 +1,6 @@
 import json
+import sqlite3
+from chatgpt_v1_records import BookRecord
 
 class DatabaseTextInterface:
     def __init__(self, db_manager):
@@ -48,66 +50,65 @@ class DatabaseTextInterface:
         """
         Prompts the user for a search term, displays matching (active) books
         with pagination, and allows selection for further actions.
+
+        Only the current page is read from the database (keyset pagination);
+        page_keys keeps the start key of every page visited so far, so going
+        back does not need OFFSET either.
         """
-        search_term = input("\nEnter search term for books: ").strip()
-        # Assuming db.search_books returns a list of book dictionaries.
+        search_term = input("\nEnter search term for books (author:<name>, tag:<name> or text): ").strip()
         # It is expected that books with status "deleted" are filtered out.
-        books = self.db.search_books(search_term)
-        if not books:
+        page_size = 10
+        total = self.db.count_search_results(search_term)
+        if not total:
             print("No books found matching the search term.")
             return
-        
+        total_pages = (total + page_size - 1) // page_size
+
         page = 0
+        page_keys = [None]
+        page_books, next_key = self.db.search_books_page(search_term, page_size, page_keys[page])
         while True:
-            start = page * 10
-            end = start + 10
-            page_books = books[start:end]
             if not page_books:
                 print("No more books to display.")
                 break
             # print(page_books)
-            print(f"\n--- Books (Page {page+1}) ---")
+            print(f"\n--- Books (Page {page+1} of {total_pages}, {total} books) ---")
             # print(f"{page_books}")
+            # Authors of the whole page in one indexed query instead of json.loads per row
+            page_authors = self.db.get_authors_for_books([book[0] for book in page_books])
             for i, book in enumerate(page_books):
-                book_dict = {
-                    "id": book[0],
-                    "authors": json.loads(book[1]) if book[1] else [],
-                    "title": book[2],
-                    "edition": book[3],
-                    "language": book[4],
-                    "location": book[5],
-                    "publisher": book[6],
-                    "release_year": book[7],
-                    "isbn_13": book[8],
-                    "pages": book[9],
-                    "tags": json.loads(book[10]) if book[10] else [],
-                    "description": book[11],
-                    "status": book[12]
-                    }
-                print(f"{i+1}. {self.display_book_briefly(book_dict)}")
+                record = BookRecord(book, authors=page_authors[book[0]])
+                print(f"{i+1}. {self.display_book_briefly(record)}")
 
             print("\nn: next page, p: previous page, s: select a book, b: back to main menu")
             action = input("Your choice: ").strip().lower()
 
             if action == 'n':
-                if end < len(books):
+                if next_key is not None:
                     page += 1
+                    del page_keys[page:]
+                    page_keys.append(next_key)
+                    page_books, next_key = self.db.search_books_page(search_term, page_size, next_key)
                 else:
                     print("This is the last page.")
             elif action == 'p':
                 if page > 0:
                     page -= 1
+                    page_books, next_key = self.db.search_books_page(search_term, page_size, page_keys[page])
                 else:
                     print("Already at the first page.")
             elif action == 's':
                 try:
                     selection = int(input("Enter the number of the book to select: "))
                     if 1 <= selection <= len(page_books):
+                        book_id = page_books[selection - 1][0]
                         self.book_details_menu(page_books[selection - 1])
-                        books = self.db.search_books(search_term)
-                        if not books:
-                            print("No books found matching the search term.")
-                            return
+                        # Refresh only the selected book instead of repeating the search
+                        refreshed = self.db.get_book(book_id)
+                        if refreshed is None or BookRecord(refreshed).status == "deleted":
+                            del page_books[selection - 1]
+                        else:
+                            page_books[selection - 1] = refreshed
                     else:
                         print("Invalid selection number.")
                 except ValueError:
@@ -134,21 +135,13 @@ class DatabaseTextInterface:
         """
         Displays details for the selected book and provides options to edit or delete.
         """
-        book_dict = {
-            "id": book[0],
-            "authors": ", ".join(json.loads(book[1]) if book[1] else []),
-            "title": book[2],
-            "edition": book[3],
-            "language": book[4],
-            "location": book[5],
-            "publisher": book[6],
-            "release_year": book[7],
-            "isbn_13": book[8],
-            "pages": book[9],
-            "tags": ", ".join(json.loads(book[10]) if book[10] else []),
-            "description": book[11],
-            "status": book[12]
-        }
+        book_dict = BookRecord(
+            book,
+            authors=self.db.get_authors_for_books([book[0]])[book[0]],
+            tags=self.db.get_tags_for_books([book[0]])[book[0]],
+        ).to_dict()
+        book_dict["authors"] = ", ".join(book_dict["authors"])
+        book_dict["tags"] = ", ".join(book_dict["tags"])
         print("\n==== Book Details ====")
         for key in book_dict:
             if (isinstance(book_dict[key], dict)) or (isinstance(book_dict[key], list)):
@@ -226,7 +219,11 @@ class DatabaseTextInterface:
         #     "status": new_status,
         # }
         # print (f"edit_book_menu: updates: {updates}")
-        updates_summary = self.db.update_book(book['id'], updates, updated_by="user")
+        try:
+            updates_summary = self.db.update_book(book['id'], updates, updated_by="user")
+        except sqlite3.IntegrityError:
+            print("Another book with this ISBN already exists, book not updated.")
+            return
         if updates_summary:
             print(f"Book updated: {updates_summary}")
         else:
@@ -297,9 +294,9 @@ class DatabaseTextInterface:
                 try:
                     selection = int(input("Enter the number of the book to undelete: "))
                     if 1 <= selection <= len(page_books):
-                        self.undelete_book(page_books[selection - 1])
-                        # Optionally, remove the book from the list once undeleted.
-                        deleted_books.remove(page_books[selection - 1])
+                        if self.undelete_book(page_books[selection - 1]):
+                            # Optionally, remove the book from the list once undeleted.
+                            deleted_books.remove(page_books[selection - 1])
                     else:
                         print("Invalid selection number.")
                 except ValueError:
@@ -311,10 +308,16 @@ class DatabaseTextInterface:
 
     def undelete_book(self, book):
         """
-        Undeletes a book by updating its status to 'active' (or another appropriate value).
+        Undeletes a book: it gets back the status it had before it was deleted.
+        Returns False when another book with the same ISBN was added in the meantime.
         """
-        self.db.update_book(book['id'], {"status": "active"}, updated_by="user")
+        try:
+            self.db.undelete_book(book['id'], updated_by="user")
+        except sqlite3.IntegrityError:
+            print("Another book with this ISBN already exists, book not undeleted.")
+            return False
         print(f"Book '{book['title']}' has been undeleted.")
+        return True
 
     def search_series_menu(self):
         """
@@ -490,20 +493,49 @@ class DatabaseTextInterface:
 
     def display_update_history(self):
         """
-        Displays the history of book updates. This assumes that the DatabaseManager
-        provides a get_update_history() method.
+        Displays the history of book updates, newest first, paged by 20.
+        Pages are read with keyset pagination (DatabaseManager.get_update_history_page);
+        page_keys keeps the start key of every page visited so far.
         """
-        try:
-            history = self.db.get_update_history()
-        except AttributeError:
+        if not hasattr(self.db, "get_update_history_page"):
             print("DatabaseManager does not support update history retrieval.")
             return
 
+        page_size = 20
+        page = 0
+        page_keys = [None]
+        history, next_key = self.db.get_update_history_page(page_size=page_size)
         if not history:
             print("No update history available.")
-        else:
-            print("\n==== Update History ====")
+            return
+
+        while True:
+            print(f"\n==== Update History (Page {page+1}) ====")
             for update in history:
-                # Update records could be dictionaries or objects; adjust as needed.
-                print(update)
-        input("\nPress Enter to return to the main menu.")
+                target = f"book {update['book_id']}" if update["book_id"] is not None else f"series {update['series_id']}"
+                line = f"{update['last_updated']}  {update['action'] or 'update'} {target} by {update['updated_by']}"
+                if update["fields"]:
+                    line += f" ({', '.join(update['fields'])})"
+                print(line)
+
+            print("\nn: next page, p: previous page, b: back to main menu")
+            action = input("Your choice: ").strip().lower()
+            if action == 'n':
+                if next_key is not None:
+                    page += 1
+                    del page_keys[page:]
+                    page_keys.append(next_key)
+                    history, next_key = self.db.get_update_history_page(page_size=page_size, after_key=next_key)
+                else:
+                    print("This is the last page.")
+            elif action == 'p':
+                if page > 0:
+                    page -= 1
+                    history, next_key = self.db.get_update_history_page(page_size=page_size,
+                                                                        after_key=page_keys[page])
+                else:
+                    print("Already at the first page.")
+            elif action == 'b':
+                break
+            else:
+                print("Invalid option.")
@@ -1,5 +1,21 @@
+import hashlib
+import os
 import sqlite3
 import shutil
+import sys
+import json
+import queue
+import re
+import threading
+from collections import OrderedDict
+
+# sqlite_profiles (and sqlite_instrumentation) are shared by all programs and live in py/
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "py"))
+import sqlite_profiles  # noqa: E402
+
+# The same file is kept in py-db-viewer/ and py-cli-db-list/ (the latter adds
+# DBNavigator.get_table_columns); change both copies together
+# (tests/test_shared_copies.py checks they do not drift apart).
 
 
 class DatabaseHandler:
@@ -10,13 +26,31 @@ class DatabaseHandler:
     def __init__(self):
         self.connection = None
         self.file_path = None
+        self.profile = None
+        self.commit_listeners = []
 
-    def load_file(self, file_path):
-        """Loads a new SQLite file, closing the current one if necessary."""
+    def add_commit_listener(self, callback):
+        """
+        Registers callback() to be called after changes are committed
+        or another file is loaded (e.g. to drop cached rows).
+        """
+        self.commit_listeners.append(callback)
+
+    def _notify_commit(self):
+        for callback in self.commit_listeners:
+            callback()
+
+    def load_file(self, file_path, profile="interactive"):
+        """
+        Loads a new SQLite file, closing the current one if necessary.
+        The connection is configured with the given sqlite_profiles profile.
+        """
         if self.connection:
             self.connection.close()
-        self.connection = sqlite3.connect(file_path)
+        self.connection = sqlite_profiles.connect(file_path, profile)
+        self.profile = profile
         self.file_path = file_path
+        self._notify_commit()
 
     def save_file(self):
         """
@@ -25,6 +59,7 @@ class DatabaseHandler:
         if not self.connection or not self.file_path:
             raise Exception("No file is loaded. Cannot save.")
         self.connection.commit()
+        self._notify_commit()
 
     def save_as_new_file(self, new_file_path):
         """Saves the current database to a new file."""
@@ -32,20 +67,393 @@ class DatabaseHandler:
             raise Exception("No file is loaded. Cannot save as new file.")
 
         self.connection.commit()
+        self._notify_commit()
         try:
             self.connection.execute(f"VACUUM INTO '{new_file_path}'")
         except sqlite3.OperationalError:
+            # Move the WAL contents into the main file before copying it
+            self.connection.execute("PRAGMA wal_checkpoint(TRUNCATE)")
             self.connection.close()
             shutil.copy(self.file_path, new_file_path)
-            self.connection = sqlite3.connect(self.file_path)
+            self.connection = sqlite_profiles.connect(self.file_path, self.profile)
+
+
+def _run_page_query(conn, page_query):
+    """
+    Executes a page query built by DBNavigator and returns (rowids, rows).
+    page_query is (sql, params, descending, with_keys); with_keys means the
+    first selected column is the rowid.
+    """
+    sql, params, descending, with_keys = page_query
+    fetched = conn.execute(sql, params).fetchall()
+    if descending:
+        fetched.reverse()
+    if with_keys:
+        return [row[0] for row in fetched], [row[1:] for row in fetched]
+    return [], fetched
+
+
+def _estimate_page_size(page):
+    """Rough number of bytes held by a cached (rowids, rows) page."""
+    keys, rows = page
+    size = sys.getsizeof(keys) + sys.getsizeof(rows)
+    for row in rows:
+        size += sys.getsizeof(row) + sum(sys.getsizeof(value) for value in row)
+    return size + sum(sys.getsizeof(key) for key in keys)
+
+
+# Query parameters longer than this are kept in PageCache keys as a digest
+PAGE_KEY_MAX_PARAM = 64
+
+
+def _page_cache_key(key):
+    """
+    The (sql, params) key of a page with long text parameters - the
+    json_each list of a narrowed search holds up to CANDIDATE_LIMIT
+    rowids - replaced by their SHA-1 digest, so keys stay small.
+    """
+    sql, params = key
+    return sql, tuple(
+        "sha1:" + hashlib.sha1(value.encode("utf-8")).hexdigest()
+        if isinstance(value, str) and len(value) > PAGE_KEY_MAX_PARAM else value
+        for value in params
+    )
+
+
+def _estimate_key_size(key):
+    """Rough number of bytes held by a PageCache key."""
+    sql, params = key
+    return sys.getsizeof(key) + sys.getsizeof(sql) + sys.getsizeof(params) + sum(sys.getsizeof(value) for value in params)
+
+
+def column_affinity(declared_type):
+    """
+    Type affinity of a column from its declared type, by the rules
+    SQLite uses (https://www.sqlite.org/datatype3.html, section 3.1).
+    """
+    declared = (declared_type or "").upper()
+    if "INT" in declared:
+        return "INTEGER"
+    if "CHAR" in declared or "CLOB" in declared or "TEXT" in declared:
+        return "TEXT"
+    if declared == "" or "BLOB" in declared:
+        return "BLOB"
+    if "REAL" in declared or "FLOA" in declared or "DOUB" in declared:
+        return "REAL"
+    return "NUMERIC"
+
+
+def quote_identifier(name):
+    """A table or column name for SQL text: in double quotes, with '"' inside it doubled."""
+    return '"' + name.replace('"', '""') + '"'
+
+
+def _quote_literal(text):
+    """A string literal for SQL text: in single quotes, with "'" inside it doubled."""
+    return "'" + text.replace("'", "''") + "'"
+
+
+# content=<table> option of an FTS5 table: 'quoted', "quoted" or a bare name
+_FTS_CONTENT = re.compile(r"""content\s*=\s*(?:'((?:[^']|'')*)'|"((?:[^"]|"")*)"|(\w+))""", re.IGNORECASE)
+
+
+def find_fts_table(conn, table_name):
+    """
+    Returns the name of an FTS5 table whose external content is
+    table_name (content='table_name'), or None.
+    """
+    rows = conn.execute(
+        "SELECT name, sql FROM sqlite_master WHERE type = 'table' AND sql LIKE '%USING fts5%'"
+    ).fetchall()
+    for name, sql in rows:
+        match = _FTS_CONTENT.search(sql)
+        if not match:
+            continue
+        single, double, bare = match.groups()
+        content = single.replace("''", "'") if single is not None else (
+            double.replace('""', '"') if double is not None else bare)
+        if content.lower() == table_name.lower():
+            return name
+    return None
+
+
+def _fts_match_query(text):
+    """Every word of `text` quoted and matched as a prefix."""
+    return " ".join('"{}"*'.format(word.replace('"', '""')) for word in text.split())
+
+
+def _prefix_upper_bound(prefix):
+    """Smallest string greater than every string starting with prefix."""
+    return prefix[:-1] + chr(ord(prefix[-1]) + 1)
+
+
+def _parse_number(text):
+    try:
+        return int(text)
+    except ValueError:
+        pass
+    try:
+        return float(text)
+    except ValueError:
+        return None
+
+
+class IndexAdvisor:
+    """
+    Counts which columns are searched and proposes indexes for the most
+    searched ones: a B-tree index for prefix and numeric searches, an
+    FTS5 index for substring (word) searches, which no B-tree can serve.
+    """
+    def __init__(self, min_searches=3):
+        self.min_searches = min_searches
+        self.searches = {}  # (table, column, kind) -> number of searches
+
+    def record(self, table_name, columns, kind):
+        """Counts a search of `columns`; kind is "btree" or "fts"."""
+        for column in columns:
+            key = (table_name, column, kind)
+            self.searches[key] = self.searches.get(key, 0) + 1
+
+    def suggestions(self, conn):
+        """
+        Returns proposed indexes, most searched first, as dicts with
+        table, columns, kind, searches and sql (list of statements).
+        Columns that already lead an index, and tables that already have an
+        FTS index, are skipped.
+        """
+        proposals = []
+        fts_columns = {}
+        for (table_name, column, kind), count in self.searches.items():
+            if count < self.min_searches:
+                continue
+            if kind == "fts":
+                fts_columns.setdefault(table_name, []).append((column, count))
+            elif column not in self._indexed_columns(conn, table_name):
+                proposals.append({
+                    "table": table_name, "columns": [column], "kind": "btree", "searches": count,
+                    "sql": [f"CREATE INDEX IF NOT EXISTS {quote_identifier(f'idx_{table_name}_{column}')} "
+                            f"ON {quote_identifier(table_name)} ({quote_identifier(column)})"],
+                })
+
+        for table_name, searched in fts_columns.items():
+            if find_fts_table(conn, table_name):
+                continue
+            columns = [column for column, _ in searched]
+            proposals.append({
+                "table": table_name, "columns": columns, "kind": "fts",
+                "searches": max(count for _, count in searched),
+                "sql": self._fts_statements(table_name, columns),
+            })
+        return sorted(proposals, key=lambda proposal: proposal["searches"], reverse=True)
+
+    @staticmethod
+    def _indexed_columns(conn, table_name):
+        """Columns that are the first column of an index on the table."""
+        columns = set()
+        for index in conn.execute(f"PRAGMA index_list({quote_identifier(table_name)})").fetchall():
+            info = conn.execute(f"PRAGMA index_info({quote_identifier(index[1])})").fetchall()
+            if info:
+                columns.add(info[0][2])
+        return columns
+
+    @staticmethod
+    def _fts_statements(table_name, columns):
+        """External-content FTS5 table kept in sync with triggers, then filled."""
+        fts = quote_identifier(f"{table_name}_fts")
+        table = quote_identifier(table_name)
+        column_list = ", ".join(quote_identifier(column) for column in columns)
+        new_values = ", ".join(f"new.{quote_identifier(column)}" for column in columns)
+        old_values = ", ".join(f"old.{quote_identifier(column)}" for column in columns)
+        return [
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5({column_list}, "
+            f"content={_quote_literal(table_name)}, content_rowid='rowid', tokenize='unicode61 remove_diacritics 2')",
+            f"CREATE TRIGGER IF NOT EXISTS {quote_identifier(f'{table_name}_fts_ai')} AFTER INSERT ON {table} BEGIN "
+            f"INSERT INTO {fts} (rowid, {column_list}) VALUES (new.rowid, {new_values}); END",
+            f"CREATE TRIGGER IF NOT EXISTS {quote_identifier(f'{table_name}_fts_ad')} AFTER DELETE ON {table} BEGIN "
+            f"INSERT INTO {fts} ({fts}, rowid, {column_list}) VALUES ('delete', old.rowid, {old_values}); END",
+            f"CREATE TRIGGER IF NOT EXISTS {quote_identifier(f'{table_name}_fts_au')} AFTER UPDATE ON {table} BEGIN "
+            f"INSERT INTO {fts} ({fts}, rowid, {column_list}) VALUES ('delete', old.rowid, {old_values}); "
+            f"INSERT INTO {fts} (rowid, {column_list}) VALUES (new.rowid, {new_values}); END",
+            f"INSERT INTO {fts} ({fts}) VALUES ('rebuild')",
+        ]
+
+    def create(self, conn, suggestion):
+        """Creates a suggested index and commits."""
+        for statement in suggestion["sql"]:
+            conn.execute(statement)
+        conn.commit()
+        for column in suggestion["columns"]:
+            self.searches.pop((suggestion["table"], column, suggestion["kind"]), None)
+
+
+class PageCache:
+    """
+    LRU cache of page windows read by DBNavigator, limited by an
+    estimated memory budget (pages and keys). A page is keyed by its query
+    (the SQL names the table, filter and sort order, the parameters hold
+    the seek key); long parameters are stored as a digest (see _page_cache_key).
+
+    The cache belongs to one data version of the database: when the
+    version changes (see DBNavigator._data_version) all pages are dropped.
+    """
+    def __init__(self, budget_bytes=4 * 1024 * 1024):
+        self.budget_bytes = budget_bytes
+        self.version = None
+        self._pages = OrderedDict()
+        self._size_bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.prefetched = 0
+        self.evictions = 0
+
+    def validate(self, version):
+        """Drops all pages if they were read from another data version."""
+        with self._lock:
+            if version != self.version:
+                self._clear()
+                self.version = version
+
+    def clear(self):
+        with self._lock:
+            self._clear()
+            self.version = None
+
+    def _clear(self):
+        self._pages.clear()
+        self._size_bytes = 0
+
+    def __contains__(self, key):
+        key = _page_cache_key(key)
+        with self._lock:
+            return key in self._pages
+
+    def get(self, key):
+        """Returns a copy of the cached (rowids, rows) page, or None."""
+        key = _page_cache_key(key)
+        with self._lock:
+            entry = self._pages.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._pages.move_to_end(key)
+            self.hits += 1
+            keys, rows = entry[0]
+            return list(keys), list(rows)
+
+    def put(self, key, page, version=None, prefetched=False):
+        """
+        Stores a page. Pages read for an older data version
+        (e.g. by a slow prefetch) are ignored.
+        """
+        key = _page_cache_key(key)
+        size = _estimate_page_size(page) + _estimate_key_size(key)
+        with self._lock:
+            if version is not None and version != self.version:
+                return
+            if size > self.budget_bytes:
+                return
+            if key in self._pages:
+                self._size_bytes -= self._pages.pop(key)[1]
+            self._pages[key] = (page, size)
+            self._size_bytes += size
+            if prefetched:
+                self.prefetched += 1
+            while self._size_bytes > self.budget_bytes:
+                _, (_, evicted_size) = self._pages.popitem(last=False)
+                self._size_bytes -= evicted_size
+                self.evictions += 1
+
+    def stats(self):
+        """Returns hit/miss statistics and the current cache size."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": self.hits / lookups if lookups else 0.0,
+                "prefetched": self.prefetched,
+                "evictions": self.evictions,
+                "pages": len(self._pages),
+                "size_bytes": self._size_bytes,
+                "budget_bytes": self.budget_bytes,
+            }
+
+
+class PagePrefetcher:
+    """
+    Reads neighbouring pages into a PageCache on a background thread,
+    using its own connection to the database file.
+    """
+    def __init__(self, page_cache):
+        self.page_cache = page_cache
+        self._requests = queue.Queue()
+        self._thread = None
+        self._connection = None
+        self._file_path = None
+
+    def request(self, file_path, version, page_query):
+        """Queues a page query to be read ahead for the given data version."""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="PagePrefetcher", daemon=True)
+            self._thread.start()
+        self._requests.put((file_path, version, page_query))
+
+    def stop(self):
+        """Stops the background thread and closes its connection."""
+        if self._thread is not None:
+            self._requests.put((None, None, None))
+            self._thread.join()
+            self._thread = None
+
+    def _run(self):
+        while True:
+            file_path, version, page_query = self._requests.get()
+            if file_path is None:
+                break
+            cache_key = page_query[:2]
+            if self.page_cache.version != version or cache_key in self.page_cache:
+                continue
+            try:
+                if file_path != self._file_path:
+                    if self._connection:
+                        self._connection.close()
+                    self._connection = sqlite_profiles.connect(file_path, "read-only-viewer")
+                    self._file_path = file_path
+                page = _run_page_query(self._connection, page_query)
+            except sqlite3.Error:
+                continue
+            self.page_cache.put(cache_key, page, version=version, prefetched=True)
+
+        if self._connection:
+            self._connection.close()
+            self._connection = None
+            self._file_path = None
+
+
+# Largest number of matching rowids kept in memory to narrow the next search
+CANDIDATE_LIMIT = 20000
 
 
 class DBNavigator:
     """
     Handles navigation, viewing, and (optionally) editing 
     of the loaded SQLite file's rows.
+
+    In "keyset" pagination mode (the default) pages are found by seeking
+    on rowid (WHERE rowid > last key), so paging costs the same at the
+    start and at the end of a large table. Tables without a rowid
+    (WITHOUT ROWID tables, views) are paged with LIMIT/OFFSET.
+
+    Pages are kept in an LRU PageCache and the next and previous pages
+    are read ahead in the background, so moving between nearby pages is
+    served from memory. The cache is dropped when the data changes.
+
+    A search (search_text_in_current_table) sets a filter that all page
+    queries include, so the matches are paged like the table itself.
     """
-    def __init__(self, db_handler):
+    def __init__(self, db_handler, pagination_mode="keyset",
+                 cache_budget_bytes=4 * 1024 * 1024, prefetch=True):
         self.db_handler = db_handler
         self.current_table = None
         self.tables = []
@@ -53,6 +461,19 @@ class DBNavigator:
         self.current_row_index = 0
         self.page_size = 10
         self.offset = 0
+        self.pagination_mode = pagination_mode  # "keyset" or "offset"
+        self.page_keys = []  # rowids of current_rows (keyset mode)
+        self._rowid_tables = {}
+        self._row_count_cache = {}
+        self._count_job = None  # running count_rows_async: request, generation, callbacks
+        self._columns_cache = {}
+        self.search_filter = None  # see _build_search_filter
+        self.search_candidates = None  # rowids matching the last search, see _collect_candidates
+        self.index_advisor = IndexAdvisor()
+        self.page_cache = PageCache(cache_budget_bytes)
+        self.prefetch = prefetch
+        self._prefetcher = PagePrefetcher(self.page_cache)
+        db_handler.add_commit_listener(self.page_cache.clear)
 
     def reset_navigation(self):
         """
@@ -66,6 +487,11 @@ class DBNavigator:
         cursor = conn.cursor()
         cursor.execute("SELECT name FROM sqlite_master WHERE type='table' ORDER BY name;")
         self.tables = [row[0] for row in cursor.fetchall()]
+        self._rowid_tables = {}
+        self._row_count_cache = {}
+        self._columns_cache = {}
+        self.search_filter = None
+        self.search_candidates = None
 
         self.current_table = self.tables[0] if self.tables else None
         self.offset = 0
@@ -76,22 +502,321 @@ class DBNavigator:
         """
         Loads rows for the current table, using self.offset
         and self.page_size. Resets current_row_index if needed.
+        In keyset mode the page is re-read starting from its first rowid.
         """
+        page_start = self.page_keys_start
         self.current_rows = []
+        self.page_keys = []
         if not self.current_table:
             return
 
-        conn = self.db_handler.connection
-        cursor = conn.cursor()
-        cursor.execute(
-            f"SELECT * FROM {self.current_table} "
-            f"LIMIT {self.page_size} OFFSET {self.offset}"
+        if self._uses_keyset():
+            if self.offset == 0:
+                keys, rows = self._seek_rows()
+            elif page_start is not None:
+                keys, rows = self._seek_rows("rowid >= ?", page_start)
+            else:
+                keys, rows = self._offset_rows(with_keys=True)
+            self._set_page(keys, rows)
+            return
+
+        _, rows = self._offset_rows()
+        self._set_page([], rows)
+
+    def set_table(self, table_name):
+        """Shows the first page of another table (any search is cleared)."""
+        self.current_table = table_name
+        self.search_filter = None
+        self.offset = 0
+        self.current_row_index = 0
+        self.page_keys = []
+        self.load_current_rows()
+
+    def _active_filter(self):
+        """The search filter if it belongs to the current table, else None."""
+        if self.search_filter and self.search_filter["table"] == self.current_table:
+            return self.search_filter
+        return None
+
+    def _uses_keyset(self):
+        """True if the current table can be paged by seeking on rowid."""
+        return self.pagination_mode == "keyset" and self._has_rowid(self.current_table)
+
+    def _has_rowid(self, table_name):
+        """Checks (once per table) whether the table has a rowid to seek on."""
+        if table_name not in self._rowid_tables:
+            cursor = self.db_handler.connection.cursor()
+            try:
+                cursor.execute(f"SELECT rowid FROM {quote_identifier(table_name)} LIMIT 0")
+                self._rowid_tables[table_name] = True
+            except sqlite3.OperationalError:
+                self._rowid_tables[table_name] = False
+        return self._rowid_tables[table_name]
+
+    def _seek_rows(self, condition=None, key=None, descending=False, limit=None):
+        """
+        Reads one page of the current table ordered by rowid, optionally
+        starting from `key` (condition is e.g. "rowid > ?").
+        Returns (rowids, rows) in ascending rowid order.
+        """
+        return self._fetch_page(self._seek_query(condition, key, descending, limit))
+
+    def _seek_query(self, condition=None, key=None, descending=False, limit=None):
+        """Builds the page query (sql, params, descending, with_keys) used by _seek_rows."""
+        conditions = [condition] if condition else []
+        params = (key,) if condition else ()
+        search_filter = self._active_filter()
+        if search_filter:
+            conditions.append(search_filter["sql"])
+            params += search_filter["params"]
+        where = f"WHERE {' AND '.join(conditions)} " if conditions else ""
+        order = "DESC" if descending else "ASC"
+        sql = (
+            f"SELECT rowid, * FROM {quote_identifier(self.current_table)} "
+            f"{where}ORDER BY rowid {order} LIMIT ?"
         )
-        self.current_rows = cursor.fetchall()
+        return sql, params + (limit if limit is not None else self.page_size,), descending, True
+
+    def _offset_rows(self, with_keys=False, offset=None):
+        """Reads the page at self.offset with LIMIT/OFFSET. Returns (rowids, rows)."""
+        return self._fetch_page(self._offset_query(with_keys, offset))
+
+    def _offset_query(self, with_keys=False, offset=None):
+        """Builds the page query (sql, params, descending, with_keys) used by _offset_rows."""
+        offset = self.offset if offset is None else offset
+        search_filter = self._active_filter()
+        where = f"WHERE {search_filter['sql']} " if search_filter else ""
+        params = search_filter["params"] if search_filter else ()
+        if with_keys:
+            sql = (
+                f"SELECT rowid, * FROM {quote_identifier(self.current_table)} {where}ORDER BY rowid "
+                f"LIMIT {self.page_size} OFFSET {offset}"
+            )
+        else:
+            sql = (
+                f"SELECT * FROM {quote_identifier(self.current_table)} {where}"
+                f"LIMIT {self.page_size} OFFSET {offset}"
+            )
+        return sql, params, False, with_keys
+
+    def _data_version(self):
+        """
+        Identifies the current state of the data: changes made by other
+        connections bump data_version, changes made through this one bump
+        total_changes.
+        """
+        conn = self.db_handler.connection
+        return conn.execute("PRAGMA data_version").fetchone()[0], conn.total_changes
+
+    def _fetch_page(self, page_query):
+        """Returns the (rowids, rows) page for a page query, from the cache if possible."""
+        self.page_cache.validate(self._data_version())
+        cache_key = page_query[:2]
+        page = self.page_cache.get(cache_key)
+        if page is None:
+            page = _run_page_query(self.db_handler.connection, page_query)
+            self.page_cache.put(cache_key, page)
+        return page
+
+    def _prefetch_neighbours(self):
+        """Queues the next and previous pages to be read in the background."""
+        conn = self.db_handler.connection
+        file_path = self.db_handler.file_path
+        if not self.prefetch or not conn or not file_path or file_path == ":memory:":
+            return
+        if conn.in_transaction:
+            # the background connection could not see uncommitted rows
+            return
+
+        if self._uses_keyset():
+            if not self.page_keys:
+                return
+            queries = [self._seek_query("rowid > ?", self.page_keys[-1]),
+                       self._seek_query("rowid < ?", self.page_keys[0], descending=True)]
+        else:
+            queries = [self._offset_query(offset=self.offset + self.page_size)]
+            if self.offset > 0:
+                queries.append(self._offset_query(offset=max(0, self.offset - self.page_size)))
+
+        version = self.page_cache.version
+        for page_query in queries:
+            self._prefetcher.request(file_path, version, page_query)
+
+    def get_cache_stats(self):
+        """Returns hit/miss statistics of the page cache."""
+        return self.page_cache.stats()
+
+    def _set_page(self, keys, rows):
+        """Stores a loaded page and keeps current_row_index within it."""
+        self.page_keys = keys
+        self.current_rows = rows
         # Adjust current_row_index if out of range
         self.current_row_index = min(self.current_row_index, len(self.current_rows) - 1)
         if self.current_row_index < 0:
             self.current_row_index = 0
+        self._prefetch_neighbours()
+
+    @property
+    def page_keys_start(self):
+        """rowid of the first row on the current page (keyset mode), or None."""
+        return self.page_keys[0] if self.page_keys else None
+
+    def get_row_count(self, table_name=None):
+        """
+        Returns the number of rows in a table (the current one by default);
+        for the current table with an active search, the number of matches.
+        The count is cached until the database changes: through this
+        connection (total_changes) or through another one (data_version).
+        """
+        table_name = table_name or self.current_table
+        conn = self.db_handler.connection
+        if not conn or not table_name:
+            return 0
+
+        cached = self.get_cached_row_count(table_name)
+        if cached is not None:
+            return cached
+
+        cache_key, sql, params = self._count_query(table_name)
+        version = self._data_version()
+        total_rows = conn.execute(sql, params).fetchone()[0]
+        self._row_count_cache[cache_key] = (total_rows, version)
+        return total_rows
+
+    def _count_query(self, table_name):
+        """Returns (cache key, sql, params) counting the rows (or matches) of a table."""
+        search_filter = self._active_filter() if table_name == self.current_table else None
+        if search_filter:
+            return ((table_name, search_filter["sql"], search_filter["params"]),
+                    f"SELECT COUNT(*) FROM {quote_identifier(table_name)} WHERE {search_filter['sql']}",
+                    search_filter["params"])
+        return table_name, f"SELECT COUNT(*) FROM {quote_identifier(table_name)}", ()
+
+    def get_cached_row_count(self, table_name=None):
+        """
+        Returns the row count of get_row_count if it is cached for the
+        current data, otherwise None (without running COUNT(*)).
+        """
+        table_name = table_name or self.current_table
+        if not self.db_handler.connection or not table_name:
+            return 0
+        cached = self._row_count_cache.get(self._count_query(table_name)[0])
+        if cached and cached[1] == self._data_version():
+            return cached[0]
+        return None
+
+    # ------------ Background (QueryExecutor) variants ------------
+    def _can_run_in_background(self):
+        """
+        The executor has its own connection, which cannot see uncommitted
+        changes of db_handler.connection.
+        """
+        conn = self.db_handler.connection
+        return (conn is not None and not conn.in_transaction
+                and self.db_handler.file_path not in (None, ":memory:"))
+
+    def count_rows_async(self, executor, on_done, table_name=None):
+        """
+        get_row_count on the executor's worker thread: the count is cached
+        and on_done(count) is called on the Tk thread. A request for the
+        count that is already running only adds on_done to it (once per
+        callback); a request for another count replaces the running one.
+        """
+        table_name = table_name or self.current_table
+        if not table_name or not self._can_run_in_background():
+            on_done(self.get_row_count(table_name))
+            return
+
+        cache_key, sql, params = self._count_query(table_name)
+        version = self._data_version()
+        job = self._count_job
+        if (job is not None and job["request"] == (cache_key, version)
+                and executor.is_current("count", job["generation"])):
+            if on_done not in job["callbacks"]:
+                job["callbacks"].append(on_done)
+            return
+
+        job = {"request": (cache_key, version), "callbacks": [on_done]}
+
+        def done(total_rows):
+            if self._count_job is job:
+                self._count_job = None
+            if self._data_version() == version:
+                self._row_count_cache[cache_key] = (total_rows, version)
+            for callback in job["callbacks"]:
+                callback(total_rows)
+
+        def failed(error):
+            if self._count_job is job:
+                self._count_job = None
+
+        job["generation"] = executor.submit(
+            "count", lambda conn: conn.execute(sql, params).fetchone()[0], done, failed)
+        self._count_job = job
+
+    def search_async(self, executor, text, on_done, mode="contains"):
+        """
+        search_text_in_current_table with the first page of matches read on
+        the executor's worker thread; on_done() is called on the Tk thread
+        when the page is shown. A newer search interrupts this one.
+        """
+        if not self.current_table:
+            return
+        # Results of an older search (still running or read) are not wanted any more
+        executor.cancel("search")
+        executor.cancel("candidates")
+        if not text or not self._can_run_in_background():
+            self.search_text_in_current_table(text, mode)
+            on_done()
+            return
+
+        self.search_filter = self._build_search_filter(text, mode)
+        self.offset = 0
+        self.current_row_index = 0
+        self._set_page([], [])
+        page_query = self._seek_query() if self._uses_keyset() else self._offset_query()
+        version = self._data_version()
+        expected_filter = self.search_filter
+
+        def done(page):
+            if self.search_filter is not expected_filter:
+                return
+            self.page_cache.validate(self._data_version())
+            self.page_cache.put(page_query[:2], page, version=version)
+            self._set_page(*page)
+            on_done()
+            self._collect_candidates(executor, expected_filter)
+
+        executor.submit("search", lambda conn: _run_page_query(conn, page_query), done)
+
+    def _collect_candidates(self, executor, search_filter, limit=CANDIDATE_LIMIT):
+        """
+        Reads (in the background) the rowids of all rows matching a search,
+        if there are at most `limit` of them. A following search for a longer
+        text then only checks these rows (see _narrowing_candidates) instead
+        of scanning the table again.
+        """
+        if not self._has_rowid(search_filter["table"]):
+            return
+        sql = f'SELECT rowid FROM {quote_identifier(search_filter["table"])} WHERE {search_filter["sql"]} LIMIT ?'
+        params = search_filter["params"] + (limit + 1,)
+        version = self._data_version()
+
+        def done(rows):
+            if self.search_filter is not search_filter or self._data_version() != version:
+                return
+            if len(rows) > limit:
+                self.search_candidates = None
+                return
+            self.search_candidates = {
+                "table": search_filter["table"],
+                "text": search_filter["text"],
+                "mode": search_filter["mode"],
+                "rowids": [row[0] for row in rows],
+                "version": version,
+            }
+
+        executor.submit("candidates", lambda conn: conn.execute(sql, params).fetchall(), done)
 
     # ------------ Navigation methods ------------
     def move_first_page(self):
@@ -101,24 +826,85 @@ class DBNavigator:
     def move_last_page(self):
         if not self.current_table:
             return
-        conn = self.db_handler.connection
-        cursor = conn.cursor()
-        cursor.execute(f"SELECT COUNT(*) FROM {self.current_table}")
-        total_rows = cursor.fetchone()[0]
+        total_rows = self.get_row_count()
         if total_rows > 0:
             self.offset = ((total_rows - 1) // self.page_size) * self.page_size
         else:
             self.offset = 0
+
+        if self._uses_keyset():
+            # The last page holds the remainder, exactly as in offset mode
+            keys, rows = self._seek_rows(descending=True, limit=(total_rows - self.offset) or self.page_size)
+            self._set_page(keys, rows)
+            return
         self.load_current_rows()
 
     def page_up(self):
+        if self._uses_keyset() and self.page_keys:
+            if self.offset - self.page_size <= 0:
+                self.move_first_page()
+                return
+            keys, rows = self._seek_rows("rowid < ?", self.page_keys[0], descending=True)
+            if len(rows) < self.page_size:
+                self.move_first_page()
+                return
+            self.offset -= self.page_size
+            self._set_page(keys, rows)
+            return
         self.offset = max(0, self.offset - self.page_size)
         self.load_current_rows()
 
     def page_down(self):
+        if self._uses_keyset() and self.page_keys:
+            keys, rows = self._seek_rows("rowid > ?", self.page_keys[-1])
+            if rows:
+                self.offset += self.page_size
+                self._set_page(keys, rows)
+            return
         self.offset += self.page_size
         self.load_current_rows()
 
+    def scroll_rows(self, delta):
+        """
+        Moves the window of current rows by `delta` rows (negative = up),
+        keeping page_size rows visible. In keyset mode only the rows that
+        scroll into view are read.
+        """
+        if delta == 0 or not self.current_table:
+            return
+
+        if self._uses_keyset() and self.page_keys:
+            if delta > 0:
+                keys, rows = self._seek_rows("rowid > ?", self.page_keys[-1], limit=delta)
+                all_keys = self.page_keys + keys
+                all_rows = self.current_rows + rows
+                dropped = max(0, len(all_keys) - self.page_size)
+                self.offset += dropped
+                self.current_row_index -= dropped
+                self._set_page(all_keys[dropped:], all_rows[dropped:])
+            else:
+                keys, rows = self._seek_rows("rowid < ?", self.page_keys[0], descending=True, limit=-delta)
+                self.offset -= len(keys)
+                self.current_row_index += len(keys)
+                self._set_page((keys + self.page_keys)[:self.page_size],
+                               (rows + self.current_rows)[:self.page_size])
+            return
+
+        self.jump_to_row(self.offset + delta)
+
+    def jump_to_row(self, index):
+        """
+        Shows the window of rows starting at the given row number,
+        e.g. when the scrollbar is dragged. Uses LIMIT/OFFSET once;
+        scrolling from there on seeks on rowid again.
+        """
+        if not self.current_table:
+            return
+        total_rows = self.get_row_count()
+        self.offset = max(0, min(index, total_rows - self.page_size))
+        self.page_keys = []
+        self.load_current_rows()
+
     def move_up_one(self):
         if self.current_rows:
             self.current_row_index = max(0, self.current_row_index - 1)
@@ -147,29 +933,128 @@ class DBNavigator:
             return str(self.current_rows[self.current_row_index])
         return ""
 
-    def search_text_in_current_table(self, text):
-        if not self.current_table:
-            return
+    def get_columns(self, table_name=None):
+        """
+        Returns [(name, declared type, affinity)] for the columns of a table
+        (the current one by default). Read once per table and kept until
+        another file is loaded.
+        """
+        table_name = table_name or self.current_table
+        if table_name not in self._columns_cache:
+            cursor = self.db_handler.connection.execute(f"PRAGMA table_info({quote_identifier(table_name)})")
+            self._columns_cache[table_name] = [
+                (column[1], column[2], column_affinity(column[2])) for column in cursor.fetchall()
+            ]
+        return self._columns_cache[table_name]
+
+    def _build_search_filter(self, text, mode="contains"):
+        """
+        Builds the WHERE condition of a search in the current table.
 
+        - numeric columns are compared for equality, and only when the
+          text is a number (an index on the column can be used),
+        - text columns (and untyped ones) are searched with:
+          "contains": LIKE '%text%' over every text column (a full scan),
+          "words": the table's FTS5 index if it has one - only the indexed
+          columns, every word matched as a word prefix - otherwise as "contains",
+          "prefix": a range text <= column < next string, which an index
+          on the column can serve (case-sensitive).
+        """
         conn = self.db_handler.connection
-        cursor = conn.cursor()
-        cursor.execute(f"PRAGMA table_info({self.current_table})")
-        columns = [col[1] for col in cursor.fetchall()]
-        if not columns:
+        columns = self.get_columns()
+        text_columns = [name for name, _, affinity in columns if affinity in ("TEXT", "BLOB")]
+        numeric_columns = [name for name, _, affinity in columns if affinity in ("INTEGER", "REAL", "NUMERIC")]
+
+        clauses = []
+        params = []
+        number = _parse_number(text.strip())
+        if number is not None:
+            for column in numeric_columns:
+                clauses.append(f"{quote_identifier(column)} = ?")
+                params.append(number)
+            self.index_advisor.record(self.current_table, numeric_columns, "btree")
+
+        fts_table = None
+        if mode == "words" and self._has_rowid(self.current_table):
+            fts_table = find_fts_table(conn, self.current_table)
+        candidates = self._narrowing_candidates(text, mode, number)
+        if fts_table and _fts_match_query(text):
+            fts = quote_identifier(fts_table)
+            clauses.append(f"rowid IN (SELECT rowid FROM {fts} WHERE {fts} MATCH ?)")
+            params.append(_fts_match_query(text))
+        elif mode == "prefix":
+            for column in text_columns:
+                clauses.append(f"({quote_identifier(column)} >= ? AND {quote_identifier(column)} < ?)")
+                params.extend((text, _prefix_upper_bound(text)))
+            self.index_advisor.record(self.current_table, text_columns, "btree")
+        else:
+            escaped = text.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+            for column in text_columns:
+                clauses.append(f"{quote_identifier(column)} LIKE ? ESCAPE '\\'")
+                params.append(f"%{escaped}%")
+            self.index_advisor.record(self.current_table, text_columns, "fts")
+
+        sql = f"({' OR '.join(clauses)})" if clauses else "0"
+        if candidates is not None:
+            # Narrowing: only the rows that matched the shorter text are checked
+            sql = f"(rowid IN (SELECT value FROM json_each(?)) AND {sql})"
+            params.insert(0, json.dumps(candidates))
+        return {
+            "table": self.current_table,
+            "text": text,
+            "mode": mode,
+            "sql": sql,
+            "params": tuple(params),
+        }
+
+    def _narrowing_candidates(self, text, mode, number):
+        """
+        Returns the rowids matching an earlier search whose text `text`
+        extends ("tolk" -> "tolki"): every match of the longer text is among
+        them. None when they cannot be used - other table or mode, data
+        changed since, or a numeric text (numeric columns are compared for
+        equality, so "12" -> "123" does not narrow).
+        """
+        candidates = self.search_candidates
+        if (candidates is None or number is not None
+                or candidates["table"] != self.current_table or candidates["mode"] != mode
+                or candidates["version"] != self._data_version()
+                or not text.startswith(candidates["text"])):
+            return None
+        return candidates["rowids"]
+
+    def search_text_in_current_table(self, text, mode="contains"):
+        """
+        Shows the rows of the current table matching `text` (see
+        _build_search_filter for the modes). The matches are paged with the
+        normal navigation methods; an empty text clears the search.
+        """
+        if not self.current_table:
+            return
+        if not text:
+            self.clear_search()
             return
 
-        where_clauses = []
-        like_params = []
-        for col in columns:
-            where_clauses.append(f"{col} LIKE ?")
-            like_params.append(f"%{text}%")
+        self.search_filter = self._build_search_filter(text, mode)
+        self.offset = 0
+        self.page_keys = []
+        self.current_row_index = 0
+        self.load_current_rows()
 
-        query = (
-            f"SELECT * FROM {self.current_table} "
-            f"WHERE {' OR '.join(where_clauses)} "
-            f"LIMIT {self.page_size} OFFSET 0"
-        )
-        cursor.execute(query, tuple(like_params))
-        self.current_rows = cursor.fetchall()
+    def clear_search(self):
+        """Removes the search filter and shows the first page of the table."""
+        self.search_filter = None
         self.offset = 0
+        self.page_keys = []
         self.current_row_index = 0
+        self.load_current_rows()
+
+    def get_index_suggestions(self):
+        """Indexes proposed by the IndexAdvisor for the searches made so far."""
+        conn = self.db_handler.connection
+        return self.index_advisor.suggestions(conn) if conn else []
+
+    def create_suggested_index(self, suggestion):
+        """Creates an index returned by get_index_suggestions."""
+        self.index_advisor.create(self.db_handler.connection, suggestion)
+        self.db_handler._notify_commit()
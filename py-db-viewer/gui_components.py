@@ -1,5 +1,11 @@
 import tkinter as tk
 from tkinter import ttk
+from tkinter import font as tkfont
+from query_executor import QueryExecutor
+
+
+# Pause in typing (ms) after which a search-as-you-type starts
+SEARCH_DELAY_MS = 250
 
 
 class MainUI(tk.Frame):
@@ -7,6 +13,8 @@ class MainUI(tk.Frame):
         super().__init__(parent, *args, **kwargs)
         self.db_handler = db_handler
         self.db_navigator = db_navigator
+        # Slow queries (COUNT(*), searches) run in the background
+        self.query_executor = QueryExecutor(self)
 
         # -- Search area --
         self.search_var = tk.StringVar()
@@ -18,14 +26,41 @@ class MainUI(tk.Frame):
         self.search_entry.pack(side=tk.LEFT, fill=tk.X, expand=True, padx=5)
         self.search_button = tk.Button(search_frame, text="Search", command=self.search)
         self.search_button.pack(side=tk.LEFT, padx=5)
-
-        # -- Listbox for rows --
-        self.listbox = tk.Listbox(self, width=100, height=10)
-        self.listbox.pack(side=tk.TOP, fill=tk.BOTH, expand=True, padx=5, pady=5)
+        # Search mode (see DBNavigator._build_search_filter): "contains" finds any
+        # substring, "words" uses the table's FTS index, "prefix" can use indexes
+        # on the searched columns (case-sensitive)
+        self.search_mode_var = tk.StringVar(value="contains")
+        tk.OptionMenu(search_frame, self.search_mode_var, "contains", "words", "prefix").pack(side=tk.LEFT)
+        self.clear_search_button = tk.Button(search_frame, text="Clear", command=self.clear_search)
+        self.clear_search_button.pack(side=tk.LEFT, padx=5)
+        # Search as you type: the search starts when typing pauses for SEARCH_DELAY_MS
+        self.search_as_you_type_var = tk.BooleanVar(value=True)
+        tk.Checkbutton(search_frame, text="As you type",
+                       variable=self.search_as_you_type_var).pack(side=tk.LEFT)
+        self.pending_search = None
+        self.search_var.trace_add("write", self.on_search_text_changed)
+
+        # -- Virtualized listbox for rows --
+        # The listbox only holds the rows that fit on screen (db_navigator's
+        # current page); the scrollbar represents the whole table.
+        list_frame = tk.Frame(self)
+        list_frame.pack(side=tk.TOP, fill=tk.BOTH, expand=True, padx=5, pady=5)
+        self.scrollbar = tk.Scrollbar(list_frame, orient=tk.VERTICAL, command=self.on_scrollbar)
+        self.scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.listbox = tk.Listbox(list_frame, width=100, height=10)
+        self.listbox.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        self.rendered_rows = []
+        self.pending_jump = None
         # 1) Left-click a row: update the current selection.
         self.listbox.bind("<<ListboxSelect>>", self.on_listbox_select)
         # 2) Double-click a row: open details in a new window.
         self.listbox.bind("<Double-Button-1>", self.on_double_click)
+        # 3) Resizing the window changes the number of visible rows.
+        self.listbox.bind("<Configure>", self.on_listbox_resize)
+        # 4) Mouse wheel scrolls row by row (Windows/macOS and X11 events).
+        self.listbox.bind("<MouseWheel>", self.on_mouse_wheel)
+        self.listbox.bind("<Button-4>", self.on_mouse_wheel)
+        self.listbox.bind("<Button-5>", self.on_mouse_wheel)
 
         # -- Navigation buttons --
         nav_frame = tk.Frame(self)
@@ -70,21 +105,119 @@ class MainUI(tk.Frame):
     # ---------------------------------------------
     def refresh_listbox(self):
         """
-        Clears and reloads the listbox with the current rows.
+        Redraws the listbox with the current rows. Only the visible rows
+        are in the listbox and only lines whose text changed are replaced,
+        so a redraw costs the same regardless of table size.
         Also highlights the row at db_navigator.current_row_index.
         """
-        self.listbox.delete(0, tk.END)
         rows_text = self.db_navigator.get_current_rows_text()
-        for row in rows_text:
-            self.listbox.insert(tk.END, row)
+        for i, row in enumerate(rows_text):
+            if i >= len(self.rendered_rows):
+                self.listbox.insert(tk.END, row)
+            elif self.rendered_rows[i] != row:
+                self.listbox.delete(i)
+                self.listbox.insert(i, row)
+        if len(self.rendered_rows) > len(rows_text):
+            self.listbox.delete(len(rows_text), tk.END)
+        self.rendered_rows = rows_text
 
         # Highlight the currently selected row, if valid
+        self.listbox.selection_clear(0, tk.END)
         idx = self.db_navigator.current_row_index
         if 0 <= idx < len(rows_text):
             self.listbox.selection_set(idx)
             self.listbox.activate(idx)
             self.listbox.see(idx)
 
+        self.update_scrollbar()
+
+    def on_database_loaded(self, event=None):
+        """A new file was opened: background queries go to that file now."""
+        self.query_executor.set_database(self.db_handler.file_path)
+        self.refresh_listbox()
+
+    def update_scrollbar(self):
+        """
+        Sets the scrollbar slider to the visible part of the whole table.
+        An unknown row count is computed in the background and the slider
+        is updated when it arrives.
+        """
+        total_rows = self.db_navigator.get_cached_row_count()
+        if total_rows is None:
+            self.scrollbar.set(0.0, 1.0)
+            # bound methods: repeated refreshes wait for the same count instead of restarting it
+            self.db_navigator.count_rows_async(self.query_executor, self._scrollbar_count_ready)
+            return
+        if total_rows <= 0:
+            self.scrollbar.set(0.0, 1.0)
+            return
+        first = self.db_navigator.offset / total_rows
+        last = (self.db_navigator.offset + len(self.rendered_rows)) / total_rows
+        self.scrollbar.set(min(first, 1.0), min(last, 1.0))
+
+    def _scrollbar_count_ready(self, total_rows):
+        self.update_scrollbar()
+
+    def on_scrollbar(self, *args):
+        """
+        Scrollbar callback: ("scroll", n, "units"|"pages") moves the
+        window of rows, ("moveto", fraction) jumps to a place in the table.
+        """
+        if not args:
+            return
+        if args[0] == "scroll":
+            amount = int(args[1])
+            if args[2] == "pages":
+                amount *= self.db_navigator.page_size
+            self.db_navigator.scroll_rows(amount)
+            self.refresh_listbox()
+        elif args[0] == "moveto":
+            # Dragging produces many events - only the last one is loaded
+            total_rows = self.db_navigator.get_cached_row_count()
+            if total_rows is None:
+                # still being counted in the background
+                return
+            first_jump = self.pending_jump is None
+            self.pending_jump = int(float(args[1]) * total_rows)
+            if first_jump:
+                self.after_idle(self.apply_pending_jump)
+
+    def apply_pending_jump(self):
+        if self.pending_jump is None:
+            return
+        index, self.pending_jump = self.pending_jump, None
+        self.db_navigator.jump_to_row(index)
+        self.refresh_listbox()
+
+    def on_mouse_wheel(self, event):
+        if event.num == 4 or getattr(event, "delta", 0) > 0:
+            self.db_navigator.scroll_rows(-3)
+        else:
+            self.db_navigator.scroll_rows(3)
+        self.refresh_listbox()
+        return "break"
+
+    def on_listbox_resize(self, event):
+        """
+        Adapts db_navigator.page_size to the number of rows that fit
+        in the listbox, then reloads the current page with that size.
+        """
+        line_font = tkfont.Font(font=self.listbox.cget("font"))
+        line_height = (line_font.metrics("linespace") + 1
+                       + 2 * int(self.listbox.cget("selectborderwidth")))
+        border = int(self.listbox.cget("borderwidth")) + int(self.listbox.cget("highlightthickness"))
+        visible_rows = max(1, (event.height - 2 * border) // line_height)
+        if visible_rows == self.db_navigator.page_size:
+            return
+
+        self.db_navigator.page_size = visible_rows
+        # Re-read the page with the new size, in keyset and offset mode alike
+        # (otherwise the listbox keeps the rows of the old size)
+        self.db_navigator.load_current_rows()
+        self.db_navigator.current_row_index = min(self.db_navigator.current_row_index,
+                                                  max(0, len(self.db_navigator.current_rows) - 1))
+        self.refresh_listbox()
+
     def on_listbox_select(self, event):
         """
         Updates db_navigator.current_row_index 
@@ -102,9 +235,16 @@ class MainUI(tk.Frame):
         self.refresh_listbox()
 
     def file_end(self):
+        if self.db_navigator.get_cached_row_count() is None:
+            # Count the rows in the background first, then jump
+            self.db_navigator.count_rows_async(self.query_executor, self._file_end_count_ready)
+            return
         self.db_navigator.move_last_page()
         self.refresh_listbox()
 
+    def _file_end_count_ready(self, total_rows):
+        self.file_end()
+
     def page_up(self):
         self.db_navigator.page_up()
         self.refresh_listbox()
@@ -114,10 +254,17 @@ class MainUI(tk.Frame):
         self.refresh_listbox()
 
     def move_up_one(self):
+        # At the top of the visible rows the window scrolls up by one row
+        if self.db_navigator.current_row_index == 0:
+            self.db_navigator.scroll_rows(-1)
         self.db_navigator.move_up_one()
         self.refresh_listbox()
 
     def move_down_one(self):
+        # At the bottom of the visible rows the window scrolls down by one row
+        rows = self.db_navigator.current_rows
+        if rows and self.db_navigator.current_row_index == len(rows) - 1:
+            self.db_navigator.scroll_rows(1)
         self.db_navigator.move_down_one()
         self.refresh_listbox()
 
@@ -185,10 +332,7 @@ class MainUI(tk.Frame):
             return
 
         table_name = listbox.get(selection[0])
-        self.db_navigator.current_table = table_name
-        self.db_navigator.offset = 0
-        self.db_navigator.current_row_index = 0
-        self.db_navigator.load_current_rows()
+        self.db_navigator.set_table(table_name)
 
         # Close the "Change Table" window
         window.destroy()
@@ -199,7 +343,41 @@ class MainUI(tk.Frame):
     # ---------------------------------------------
     #        Search functionality
     # ---------------------------------------------
+    def on_search_text_changed(self, *args):
+        """
+        search_var trace: (re)schedules the search, so only the text typed
+        before a pause is searched for.
+        """
+        if self.pending_search is not None:
+            self.after_cancel(self.pending_search)
+            self.pending_search = None
+        if self.search_as_you_type_var.get():
+            self.pending_search = self.after(SEARCH_DELAY_MS, self.search)
+
     def search(self):
+        """
+        Filters the current table; the navigation buttons and the
+        scrollbar then move through the matches only.
+        """
+        if self.pending_search is not None:
+            self.after_cancel(self.pending_search)
+            self.pending_search = None
         text = self.search_var.get()
-        self.db_navigator.search_text_in_current_table(text)
+        mode = self.search_mode_var.get()
+        # The matches are read in the background; a new search replaces a running one
+        self.db_navigator.search_async(self.query_executor, text, self.refresh_listbox, mode=mode)
+        self.refresh_listbox()
+
+    def clear_search(self):
+        self.search_var.set("")
+        if self.pending_search is not None:
+            self.after_cancel(self.pending_search)
+            self.pending_search = None
+        self.query_executor.cancel("search")
+        self.query_executor.cancel("candidates")
+        self.db_navigator.clear_search()
         self.refresh_listbox()
+
+    def destroy(self):
+        self.query_executor.close()
+        super().destroy()
@@ -20,10 +20,7 @@ def main():
     main_ui.pack(fill=tk.BOTH, expand=True)
 
     # When the database is loaded, refresh the UI and highlight the first row
-    def on_database_loaded(event):
-        main_ui.refresh_listbox()
-
-    root.bind("<<DatabaseLoaded>>", on_database_loaded)
+    root.bind("<<DatabaseLoaded>>", main_ui.on_database_loaded)
 
     root.mainloop()
 
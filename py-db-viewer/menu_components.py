@@ -15,6 +15,10 @@ class MainMenu(tk.Menu):
         file_menu.add_command(label="Save As New File", command=self.save_as_new_file)
         self.add_cascade(label="File", menu=file_menu)
 
+        tools_menu = tk.Menu(self, tearoff=False)
+        tools_menu.add_command(label="Index Suggestions", command=self.index_suggestions)
+        self.add_cascade(label="Tools", menu=tools_menu)
+
     def open_file(self):
         file_path = filedialog.askopenfilename(
             filetypes=[
@@ -53,3 +57,23 @@ class MainMenu(tk.Menu):
                 messagebox.showinfo("Success", f"Saved as new file: {file_path}")
             except Exception as e:
                 messagebox.showerror("Error", f"Could not save as new file.\n{e}")
+
+    def index_suggestions(self):
+        """
+        Shows the indexes proposed for the columns searched most often
+        and creates each one the user accepts.
+        """
+        suggestions = self.db_navigator.get_index_suggestions()
+        if not suggestions:
+            messagebox.showinfo("Index Suggestions", "No suggestions - search more, or the searched columns are already indexed.")
+            return
+        for suggestion in suggestions:
+            kind = "Full-text (FTS5) index" if suggestion["kind"] == "fts" else "Index"
+            question = (f"{kind} on {suggestion['table']} ({', '.join(suggestion['columns'])}), "
+                        f"searched {suggestion['searches']} times.\n\nCreate it now?")
+            if not messagebox.askyesno("Index Suggestions", question):
+                continue
+            try:
+                self.db_navigator.create_suggested_index(suggestion)
+            except Exception as e:
+                messagebox.showerror("Error", f"Could not create the index.\n{e}")
@@ -0,0 +1,153 @@
+import os
+import queue
+import sqlite3
+import sys
+import threading
+
+# sqlite_profiles (and sqlite_instrumentation) are shared by all programs and live in py/
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "py"))
+import sqlite_profiles  # noqa: E402
+
+
+class QueryExecutor:
+    """
+    Runs database work on a background thread, so the Tk main loop never
+    waits for SQLite.
+
+    - the worker has its own connection to the file (read-only profile),
+    - results are handed back through a queue that the Tk thread polls with
+      widget.after(), and the callbacks run on the Tk thread,
+    - every job has a key ("count", "search", ...): submitting a job with
+      the same key supersedes the older one - a queued job is skipped, a
+      running one is stopped with connection.interrupt(), and a result that
+      arrives late is dropped.
+    """
+    def __init__(self, widget, poll_interval_ms=16):
+        """
+        :param widget: Any Tk widget (used for after()).
+        :param poll_interval_ms: How often results are collected (16 ms ~ 60 fps).
+        """
+        self.widget = widget
+        self.poll_interval_ms = poll_interval_ms
+        self.file_path = None
+        self._jobs = queue.Queue()
+        self._results = queue.Queue()
+        self._generations = {}     # key -> number of the newest job with that key
+        self._lock = threading.Lock()
+        self._running_key = None
+        self._pending = 0          # jobs submitted and not yet delivered (Tk thread only)
+        self._polling = False
+        self._connection = None
+        self._connection_path = None
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def set_database(self, file_path):
+        """Jobs submitted from now on run against this file."""
+        self.file_path = file_path
+
+    def submit(self, key, work, on_done, on_error=None):
+        """
+        Runs work(connection) on the worker thread and then on_done(result)
+        on the Tk thread, unless a newer job with the same key was submitted
+        in the meantime.
+
+        :param key: Name of the kind of job; a new job replaces older ones with this key.
+        :param work: Function taking a sqlite3 connection; runs on the worker thread.
+        :param on_done: Called with the result of work, on the Tk thread.
+        :param on_error: Called with the exception if work failed (not when superseded).
+        :return: Generation of the job (see is_current).
+        """
+        with self._lock:
+            generation = self._generations.get(key, 0) + 1
+            self._generations[key] = generation
+            if self._running_key == key and self._connection is not None:
+                # the running job is obsolete - stop it
+                self._connection.interrupt()
+        self._pending += 1
+        self._jobs.put((key, generation, self.file_path, work, on_done, on_error))
+        if not self._polling:
+            self._polling = True
+            self.widget.after(self.poll_interval_ms, self._poll)
+        return generation
+
+    def cancel(self, key):
+        """Drops queued, running and undelivered jobs with this key."""
+        with self._lock:
+            self._generations[key] = self._generations.get(key, 0) + 1
+            if self._running_key == key and self._connection is not None:
+                self._connection.interrupt()
+
+    def is_current(self, key, generation):
+        """True until the job returned by submit() is superseded or cancelled."""
+        with self._lock:
+            return self._generations.get(key) == generation
+
+    def _run(self):
+        while True:
+            job = self._jobs.get()
+            if job is None:
+                break
+            key, generation, file_path, work, on_done, on_error = job
+            if not self.is_current(key, generation):
+                self._results.put((key, generation, None, None, None, None))
+                continue
+            try:
+                connection = self._connect(file_path)
+                with self._lock:
+                    self._running_key = key
+                try:
+                    result, error = work(connection), None
+                finally:
+                    with self._lock:
+                        self._running_key = None
+                    if connection.in_transaction:
+                        connection.rollback()
+            except Exception as e:
+                result, error = None, e
+            self._results.put((key, generation, result, error, on_done, on_error))
+
+        if self._connection:
+            self._connection.close()
+
+    def _connect(self, file_path):
+        """The worker's connection, reopened when another file is loaded."""
+        if file_path != self._connection_path:
+            if self._connection:
+                self._connection.close()
+            self._connection = None
+            self._connection_path = None
+            connection = sqlite_profiles.connect(file_path, "read-only-viewer")
+            with self._lock:
+                self._connection = connection
+                self._connection_path = file_path
+        return self._connection
+
+    def _poll(self):
+        """Tk thread: delivers finished jobs, keeps polling while jobs are pending."""
+        while True:
+            try:
+                key, generation, result, error, on_done, on_error = self._results.get_nowait()
+            except queue.Empty:
+                break
+            self._pending -= 1
+            if on_done is None or not self.is_current(key, generation):
+                continue
+            if error is None:
+                on_done(result)
+            elif on_error is not None and not (isinstance(error, sqlite3.OperationalError)
+                                               and "interrupted" in str(error)):
+                on_error(error)
+
+        if self._pending > 0:
+            self.widget.after(self.poll_interval_ms, self._poll)
+        else:
+            self._polling = False
+
+    def close(self):
+        """Stops the worker thread (the running job is interrupted)."""
+        with self._lock:
+            if self._connection is not None:
+                self._connection.interrupt()
+        self._jobs.put(None)
+        self._thread.join()
@@ -1,34 +1,168 @@
+import mmap
+import threading
+from array import array
+
+
 class FileProcessor:
     """
     Handles file loading and basic text retrieval operations.
+
+    The file is memory-mapped instead of read into a list. A compact index
+    of line start offsets (array('Q'), 8 bytes per line) is built in the
+    background, chunk by chunk, so the first lines can be shown at once
+    and memory use does not depend on the file size.
     """
+    # Bytes scanned for line breaks per indexing step
+    INDEX_CHUNK_SIZE = 4 * 1024 * 1024
+
     def __init__(self):
-        self.lines = []
+        self.file = None
+        self.mapped = None
+        self.size = 0
+        self.line_offsets = array('Q')
+        self.indexed_until = 0       # bytes of the file already scanned for line breaks
+        self.index_complete = True
+        self._index_lock = threading.Lock()
+        self._index_thread = None
+        self._stop_indexing = threading.Event()
 
     def open_file(self, filename):
         """
-        Opens the specified text file and reads its lines into a list.
+        Opens the specified text file, memory-maps it and starts
+        indexing its lines in the background.
         """
-        with open(filename, 'r', encoding='utf-8') as file:
-            self.lines = file.readlines()
+        self.close()
+
+        self.file = open(filename, 'rb')
+        self.size = self.file.seek(0, 2)
+        self.line_offsets = array('Q')
+        self.indexed_until = 0
+        self._stop_indexing = threading.Event()
+
+        if self.size == 0:
+            # mmap cannot map an empty file
+            self.mapped = None
+            self.index_complete = True
+            return
+
+        self.mapped = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        self.line_offsets.append(0)
+        self.index_complete = False
+        self._index_thread = threading.Thread(target=self._build_index, daemon=True)
+        self._index_thread.start()
+
+    def close(self):
+        """Stops indexing and releases the currently opened file."""
+        if self._index_thread is not None:
+            self._stop_indexing.set()
+            self._index_thread.join()
+            self._index_thread = None
+        if self.mapped is not None:
+            self.mapped.close()
+            self.mapped = None
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+        self.size = 0
+        self.line_offsets = array('Q')
+        self.indexed_until = 0
+        self.index_complete = True
+
+    def _build_index(self):
+        """Background thread: indexes the whole file, one chunk at a time."""
+        while not self._stop_indexing.is_set():
+            if not self._index_next_chunk():
+                break
+
+    def _index_next_chunk(self):
+        """
+        Records the line starts found in the next INDEX_CHUNK_SIZE bytes.
+        Returns False when the whole file has been indexed.
+        """
+        with self._index_lock:
+            if self.index_complete:
+                return False
+            mapped = self.mapped
+            start = self.indexed_until
+            end = min(start + self.INDEX_CHUNK_SIZE, self.size)
+            offsets = self.line_offsets
+            position = mapped.find(b'\n', start, end)
+            while position != -1:
+                if position + 1 < self.size:
+                    offsets.append(position + 1)
+                position = mapped.find(b'\n', position + 1, end)
+            self.indexed_until = end
+            if end >= self.size:
+                self.index_complete = True
+                return False
+            return True
+
+    def _ensure_indexed(self, index):
+        """
+        Makes sure the start of line `index` (and of the line after it)
+        is known, indexing synchronously if the background thread has not
+        got there yet.
+        """
+        while len(self.line_offsets) <= index + 1 and not self.index_complete:
+            self._index_next_chunk()
 
     def get_total_lines(self):
         """
-        Returns the total number of lines loaded.
+        Returns the total number of lines. While the background indexing
+        is still running this is the number of lines found so far
+        (use has_line to ask about a line that may not be indexed yet).
         """
-        return len(self.lines)
+        return len(self.line_offsets)
+
+    def has_line(self, index):
+        """
+        Tells whether the file has a line `index`, indexing up to it
+        synchronously if the background thread has not got there yet.
+        """
+        if index < 0 or self.mapped is None:
+            return False
+        self._ensure_indexed(index)
+        with self._index_lock:
+            return index < len(self.line_offsets)
 
     def get_line(self, index):
         """
         Returns a single line at the specified index (empty if out of range).
         """
-        if 0 <= index < len(self.lines):
-            return self.lines[index]
-        return ""
+        if index < 0 or self.mapped is None:
+            return ""
+        self._ensure_indexed(index)
+        with self._index_lock:
+            if index >= len(self.line_offsets):
+                return ""
+            start = self.line_offsets[index]
+            end = self.line_offsets[index + 1] if index + 1 < len(self.line_offsets) else self.size
+            data = self.mapped[start:end]
+        return self._decode(data)
 
     def get_lines_in_range(self, start, count=10):
         """
         Returns up to `count` lines starting from `start`.
         """
-        end = start + count
-        return self.lines[start:end]
+        if start < 0 or count <= 0 or self.mapped is None:
+            return []
+        self._ensure_indexed(start + count - 1)
+        with self._index_lock:
+            total = len(self.line_offsets)
+            if start >= total:
+                return []
+            last = min(start + count, total)
+            offsets = self.line_offsets[start:last]
+            end = self.line_offsets[last] if last < total else self.size
+            data = self.mapped[offsets[0]:end]
+        base = offsets[0]
+        bounds = [offset - base for offset in offsets] + [end - base]
+        return [self._decode(data[bounds[i]:bounds[i + 1]]) for i in range(len(offsets))]
+
+    @staticmethod
+    def _decode(data):
+        # Same newline handling as text mode: '\r\n' is returned as '\n'
+        text = data.decode('utf-8', errors='replace')
+        if text.endswith('\r\n'):
+            text = text[:-2] + '\n'
+        return text
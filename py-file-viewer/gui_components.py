@@ -64,8 +64,10 @@ class MainUI:
     def page_down(self):
         """
         Scrolls the view down by 10 lines (if possible), then updates the display.
+        The next page is indexed on demand, so the end of the file can be
+        reached while the background indexing is still running.
         """
-        if self.current_start + 10 < self.file_processor.get_total_lines():
+        if self.file_processor.has_line(self.current_start + 10):
             self.current_start += 10
         self.update_display()
 
@@ -0,0 +1,301 @@
+import argparse
+import base64
+import bz2
+import csv
+import gzip
+import json
+import lzma
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import sqlite_profiles
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:
+    # Parquet export is optional: pip install pyarrow
+    pyarrow = None
+
+
+# Tables exported from each of the two catalogue schemas
+CATALOGUE_TABLES = {
+    # py-cli-db-edit (chatgpt_v1_database.DatabaseManager)
+    "books": ("books", "series", "updates"),
+    # py/sqlite3_database.py (the Android "My Library" model)
+    "bookcase": ("AUTHOR", "COMPANY", "BOOK", "COMIC", "MOVIE", "VIDEO_GAME"),
+}
+
+FORMATS = ("csv", "jsonl", "columns", "parquet")
+EXTENSIONS = {"csv": ".csv", "jsonl": ".jsonl", "columns": ".columns.jsonl", "parquet": ".parquet"}
+COMPRESSIONS = {None: (open, ""), "gzip": (gzip.open, ".gz"), "bz2": (bz2.open, ".bz2"), "xz": (lzma.open, ".xz")}
+
+
+def detect_tables(connection):
+    """
+    Returns the catalogue tables present in the database: those of the
+    first schema in CATALOGUE_TABLES found in the file, in export order.
+    """
+    existing = {row[0] for row in connection.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+    for tables in CATALOGUE_TABLES.values():
+        present = [table for table in tables if table in existing]
+        if present:
+            return present
+    return []
+
+
+def table_columns(connection, table_name):
+    """[(name, declared type)] of a table's columns."""
+    return [(row[1], row[2] or "") for row in connection.execute(f'PRAGMA table_info("{table_name}")')]
+
+
+def iter_batches(connection, table_name, batch_size=5000):
+    """
+    Yields the rows of a table in lists of at most `batch_size` rows.
+
+    The SELECT is stepped by SQLite as the batches are fetched, so only one
+    batch is in memory at a time, whatever the size of the table.
+    """
+    cursor = connection.execute(f'SELECT * FROM "{table_name}"')
+    try:
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                break
+            yield rows
+    finally:
+        cursor.close()
+
+
+def _text_value(value):
+    """Values written to text formats: BLOBs as base64 text."""
+    if isinstance(value, bytes):
+        return base64.b64encode(value).decode("ascii")
+    return value
+
+
+class CsvWriter:
+    """CSV with a header line; NULL is written as an empty field."""
+
+    def __init__(self, output, table_name, columns):
+        self.writer = csv.writer(output)
+        self.writer.writerow([name for name, _ in columns])
+
+    def write(self, rows):
+        self.writer.writerows([_text_value(value) for value in row] for row in rows)
+
+    def close(self):
+        pass
+
+
+class JsonLinesWriter:
+    """One JSON object per row."""
+
+    def __init__(self, output, table_name, columns):
+        self.output = output
+        self.names = [name for name, _ in columns]
+
+    def write(self, rows):
+        self.output.writelines(
+            json.dumps(dict(zip(self.names, map(_text_value, row))), ensure_ascii=False) + "\n" for row in rows
+        )
+
+    def close(self):
+        pass
+
+
+class ColumnsWriter:
+    """
+    Compact columnar format without extra dependencies (JSON Lines):
+    the first line describes the table ({"table", "columns", "types"}),
+    every following line is one batch of rows stored column by column
+    ({"rows": n, "data": [[values of column 1], [values of column 2], ...]}).
+    Column names are not repeated per row, and similar values stay
+    together, which compresses well.
+    """
+
+    def __init__(self, output, table_name, columns):
+        self.output = output
+        header = {"table": table_name, "columns": [name for name, _ in columns],
+                  "types": [declared for _, declared in columns]}
+        output.write(json.dumps(header, ensure_ascii=False) + "\n")
+
+    def write(self, rows):
+        data = [[_text_value(value) for value in column] for column in zip(*rows)]
+        self.output.write(json.dumps({"rows": len(rows), "data": data}, ensure_ascii=False) + "\n")
+
+    def close(self):
+        pass
+
+
+class ParquetWriter:
+    """
+    Parquet file (requires pyarrow); every batch becomes one row group.
+    Column types follow the declared affinity: INTEGER -> int64,
+    REAL -> float64, BLOB -> binary, anything else -> string.
+    """
+
+    def __init__(self, output, table_name, columns, compression="snappy"):
+        if pyarrow is None:
+            raise Exception("Parquet export requires pyarrow (pip install pyarrow).")
+        self.table_name = table_name
+        self.schema = pyarrow.schema([(name, self._arrow_type(declared)) for name, declared in columns])
+        self.writer = pyarrow.parquet.ParquetWriter(output, self.schema, compression=compression or "none")
+
+    @staticmethod
+    def _arrow_type(declared):
+        declared = declared.upper()
+        if "INT" in declared:
+            return pyarrow.int64()
+        if any(name in declared for name in ("REAL", "FLOA", "DOUB")):
+            return pyarrow.float64()
+        if "BLOB" in declared:
+            return pyarrow.binary()
+        return pyarrow.string()
+
+    def _convert(self, values, arrow_type, column_name):
+        # SQLite does not enforce column types - numeric text is accepted, anything else is an error
+        if pyarrow.types.is_string(arrow_type):
+            return [None if value is None else _text_value(value) if isinstance(value, bytes) else str(value)
+                    for value in values]
+        if pyarrow.types.is_binary(arrow_type):
+            return [value.encode("utf-8") if isinstance(value, str) else value for value in values]
+        number = int if pyarrow.types.is_integer(arrow_type) else float
+        converted = []
+        for value in values:
+            if value is None or isinstance(value, number):
+                converted.append(value)
+                continue
+            try:
+                converted.append(number(value))
+            except (TypeError, ValueError):
+                raise Exception(f"{self.table_name}.{column_name}: value {value!r} does not fit the column "
+                                f"type {arrow_type}; export this table as jsonl or columns instead.")
+        return converted
+
+    def write(self, rows):
+        arrays = [
+            pyarrow.array(self._convert(values, field.type, field.name), type=field.type)
+            for field, values in zip(self.schema, zip(*rows))
+        ]
+        self.writer.write_table(pyarrow.Table.from_arrays(arrays, schema=self.schema))
+
+    def close(self):
+        self.writer.close()
+
+
+WRITERS = {"csv": CsvWriter, "jsonl": JsonLinesWriter, "columns": ColumnsWriter, "parquet": ParquetWriter}
+
+
+def export_table(connection, table_name, output_dir, export_format="jsonl", compression=None, batch_size=5000):
+    """
+    Streams one table into a file of output_dir named after the table
+    (e.g. BOOK.jsonl.gz). Returns {"table", "path", "rows", "seconds"}.
+
+    :param connection: Open sqlite3 connection.
+    :param table_name: Table to export.
+    :param output_dir: Directory of the output file (must exist).
+    :param export_format: One of FORMATS.
+    :param compression: None, "gzip", "bz2" or "xz"; for parquet the name of a
+                        Parquet codec instead ("snappy", "zstd", "gzip", ...).
+    :param batch_size: Rows fetched and written at a time.
+    """
+    if export_format not in WRITERS:
+        raise Exception(f"Unknown export format '{export_format}'. Known formats: {', '.join(FORMATS)}.")
+    start = time.perf_counter()
+    columns = table_columns(connection, table_name)
+
+    if export_format == "parquet":
+        if pyarrow is None:
+            raise Exception("Parquet export requires pyarrow (pip install pyarrow).")
+        path = os.path.join(output_dir, table_name + EXTENSIONS[export_format])
+        output = open(path, "wb")
+        writer = ParquetWriter(output, table_name, columns, compression=compression or "snappy")
+    else:
+        if compression not in COMPRESSIONS:
+            raise Exception(f"Unknown compression '{compression}'. Known: {', '.join(filter(None, COMPRESSIONS))}.")
+        open_function, suffix = COMPRESSIONS[compression]
+        path = os.path.join(output_dir, table_name + EXTENSIONS[export_format] + suffix)
+        output = open_function(path, "wt", encoding="utf-8", newline="")
+        writer = WRITERS[export_format](output, table_name, columns)
+
+    rows = 0
+    try:
+        for batch in iter_batches(connection, table_name, batch_size):
+            writer.write(batch)
+            rows += len(batch)
+        writer.close()
+    finally:
+        output.close()
+    return {"table": table_name, "path": path, "rows": rows, "seconds": time.perf_counter() - start}
+
+
+def export_database(database_name, output_dir, tables=None, export_format="jsonl", compression=None,
+                    batch_size=5000, workers=1):
+    """
+    Exports catalogue tables of a database file, one file per table.
+    Returns the export_table results in table order.
+
+    With workers=1 every table is read in one transaction, so the files are
+    a consistent snapshot even while the database is being edited. With
+    more workers the tables are written in parallel, each by a thread with
+    its own connection (and so its own snapshot).
+
+    :param database_name: SQLite file to export.
+    :param output_dir: Directory of the output files (created if needed).
+    :param tables: Table names; None exports the tables found by detect_tables.
+    :param export_format: One of FORMATS.
+    :param compression: See export_table.
+    :param batch_size: Rows fetched and written at a time.
+    :param workers: Number of tables exported at the same time.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    connection = sqlite_profiles.connect(database_name, "read-only-viewer")
+    try:
+        tables = list(tables) if tables else detect_tables(connection)
+        if not tables:
+            raise Exception(f"No catalogue tables found in {database_name}.")
+        if workers <= 1 or len(tables) == 1:
+            connection.execute("BEGIN")
+            try:
+                return [export_table(connection, table_name, output_dir, export_format, compression, batch_size)
+                        for table_name in tables]
+            finally:
+                connection.rollback()
+    finally:
+        connection.close()
+
+    def export_with_own_connection(table_name):
+        table_connection = sqlite_profiles.connect(database_name, "read-only-viewer")
+        try:
+            return export_table(table_connection, table_name, output_dir, export_format, compression, batch_size)
+        finally:
+            table_connection.close()
+
+    # the largest tables are usually listed last (BOOK, updates) - start them first
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        results = dict(zip(reversed(tables), executor.map(export_with_own_connection, reversed(tables))))
+    return [results[table_name] for table_name in tables]
+
+
+if __name__ == "__main__":
+    # Usage: python bookcase_export.py library.db export_dir [--format jsonl] [--compress gzip] [--workers 4]
+    parser = argparse.ArgumentParser(description="Streams the catalogue tables of a database into files.")
+    parser.add_argument("database", help="SQLite file (books/series/updates or AUTHOR/BOOK/... schema)")
+    parser.add_argument("output_dir", help="directory of the exported files")
+    parser.add_argument("--format", choices=FORMATS, default="jsonl")
+    parser.add_argument("--compress", help="gzip, bz2 or xz (for parquet: a Parquet codec, default snappy)")
+    parser.add_argument("--tables", help="comma separated table names (default: every catalogue table)")
+    parser.add_argument("--batch-size", type=int, default=5000)
+    parser.add_argument("--workers", type=int, default=1, help="tables exported in parallel")
+    args = parser.parse_args()
+
+    results = export_database(
+        args.database, args.output_dir,
+        tables=[name.strip() for name in args.tables.split(",")] if args.tables else None,
+        export_format=args.format, compression=args.compress,
+        batch_size=args.batch_size, workers=args.workers,
+    )
+    for result in results:
+        print(f"{result['table']:12} {result['rows']:>10} rows  {result['seconds']:7.2f} s  {result['path']}")
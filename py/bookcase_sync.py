@@ -0,0 +1,483 @@
+import argparse
+import json
+import os
+import re
+import sqlite3
+import time
+
+import sqlite3_database
+import sqlite_profiles
+from isbn_cache import normalize_isbn
+from mylibrary_import import split_person_name
+
+
+# Change data capture between the two catalogue models:
+#   books  - books/series/updates of py-cli-db-edit (chatgpt_v1_database.py)
+#   BOOK   - AUTHOR/BOOK/... of py/sqlite3_database.py ("My Library")
+#
+# Triggers on both sides write every insert/update/delete of a book into a
+# change log. A sync run reads only the log entries after the watermark of
+# the previous run, applies the latest change of every book to the other
+# side and moves the watermarks, so its cost follows the number of changes,
+# not the size of the catalogue. SYNC_MAP pairs books.id with BOOK.ID.
+#
+# Only books <-> BOOK is synchronized: series, COMIC, MOVIE and VIDEO_GAME
+# have no counterpart in the other model.
+#
+# A book moved to the trash (status 'deleted') keeps its BOOK row and its
+# SYNC_MAP pair, so undelete_book finds them again; BOOK is only deleted when
+# the book is purged from books (purge_deleted_books).
+
+# Objects added to the books database (lower case, like the rest of that schema)
+BOOKS_SYNC_SCHEMA = {
+    "tables": {
+        "sync_changelog": [
+            ("seq", "INTEGER PRIMARY KEY AUTOINCREMENT"),
+            ("row_id", "INTEGER NOT NULL"),
+            ("op", "TEXT NOT NULL"),               # 'I', 'U' or 'D'
+            ("changed_at", "TEXT NOT NULL"),
+        ],
+    },
+    "indexes": {},
+    "triggers": {
+        f"books_sync_{name}": f"""CREATE TRIGGER books_sync_{name} AFTER {event} ON books BEGIN
+            INSERT INTO sync_changelog (row_id, op, changed_at) VALUES ({row}.id, '{op}', datetime('now'));
+        END"""
+        for name, event, row, op in (("ai", "INSERT", "new", "I"), ("au", "UPDATE", "new", "U"),
+                                     ("ad", "DELETE", "old", "D"))
+    },
+}
+
+# Objects added to the bookcase database; the map and the watermarks live here too
+BOOKCASE_SYNC_SCHEMA = {
+    "tables": {
+        "SYNC_CHANGELOG": [
+            ("SEQ", "INTEGER PRIMARY KEY AUTOINCREMENT"),
+            ("ROW_ID", "INTEGER NOT NULL"),
+            ("OP", "TEXT NOT NULL"),
+            ("CHANGED_AT", "TEXT NOT NULL"),
+        ],
+        "SYNC_MAP": [
+            ("BOOKS_ID", "INTEGER NOT NULL UNIQUE"),
+            ("BOOK_ID", "INTEGER NOT NULL UNIQUE"),
+        ],
+        "SYNC_STATE": [
+            ("SOURCE", "TEXT PRIMARY KEY"),      # 'books' or 'BOOK'
+            ("LAST_SEQ", "INTEGER NOT NULL"),
+            ("LAST_SYNC", "TEXT"),
+        ],
+    },
+    "indexes": {},
+    "triggers": dict(
+        {
+            f"BOOK_SYNC_{name}": f"""CREATE TRIGGER BOOK_SYNC_{name} AFTER {event} ON BOOK BEGIN
+                INSERT INTO SYNC_CHANGELOG (ROW_ID, OP, CHANGED_AT) VALUES ({row}.ID, '{op}', datetime('now'));
+            END"""
+            for name, event, row, op in (("AI", "INSERT", "new", "I"), ("AU", "UPDATE", "new", "U"),
+                                         ("AD", "DELETE", "old", "D"))
+        },
+        # a renamed author changes the authors of every book referring to it
+        AUTHOR_SYNC_AU="""CREATE TRIGGER AUTHOR_SYNC_AU AFTER UPDATE OF FIRSTNAME, LASTNAME ON AUTHOR BEGIN
+            INSERT INTO SYNC_CHANGELOG (ROW_ID, OP, CHANGED_AT)
+                SELECT ID, 'U', datetime('now') FROM BOOK
+                WHERE AUTHOR = new.ID
+                   OR (json_valid(ADDITIONAL_AUTHORS)
+                       AND EXISTS (SELECT 1 FROM json_each(ADDITIONAL_AUTHORS) WHERE value = new.ID));
+        END""",
+    ),
+}
+
+# What wins when the same book was changed on both sides since the last sync
+PREFER_NEWEST = "newest"    # the later change (ties go to books)
+PREFER_BOOKS = "books"
+PREFER_BOOKCASE = "bookcase"
+
+_YEAR = re.compile(r"\b(\d{4})\b")
+
+
+def published_year(published_date):
+    """'01/01/2018', '2018-05-01' or '2018' -> '2018' (None if there is no year)."""
+    match = _YEAR.search(str(published_date or ""))
+    return match.group(1) if match else None
+
+
+def _json_list(value):
+    """JSON list column -> list ([] for NULL or anything that is not a list)."""
+    try:
+        items = json.loads(value) if value else []
+    except ValueError:
+        return []
+    return items if isinstance(items, list) else []
+
+
+def _author_name(first, last):
+    return " ".join(part.strip() for part in (first, last) if part and part.strip())
+
+
+class BookcaseSync:
+    """
+    Incremental, bidirectional sync of books (books database) and BOOK
+    (bookcase database), see the module comment.
+
+    Both files are opened on one connection (the books file ATTACHed as
+    "books"), and a run is a single BEGIN IMMEDIATE transaction. The change
+    log entries written by the sync's own changes are deleted in that
+    transaction, so changes do not bounce back on the next run.
+    """
+    def __init__(self, books_database, bookcase_database, prefer=PREFER_NEWEST):
+        """
+        :param books_database: File of the books/series/updates model.
+        :param bookcase_database: File of the AUTHOR/BOOK/... model (created if needed).
+        :param prefer: PREFER_NEWEST, PREFER_BOOKS or PREFER_BOOKCASE, for books changed on both sides.
+        """
+        if os.path.abspath(books_database) == os.path.abspath(bookcase_database):
+            raise Exception("The two models must be in different files.")
+        if prefer not in (PREFER_NEWEST, PREFER_BOOKS, PREFER_BOOKCASE):
+            raise Exception(f"Unknown conflict preference '{prefer}'.")
+        self.books_database = books_database
+        self.bookcase_database = bookcase_database
+        self.prefer = prefer
+        self.connection = None
+        self.installed = False      # install() done (or found done) by this object
+        self.author_ids = {}        # author name casefolded -> AUTHOR.ID
+        self.author_names = {}      # AUTHOR.ID -> name
+
+    # ------------ setup ------------
+    def install(self):
+        """
+        Creates the change logs, triggers, map and watermark tables (idempotent).
+        The books file belongs to DatabaseManager: it is opened without a
+        connection profile, so its settings (journal_mode) stay as they are.
+        """
+        books_connection = sqlite3.connect(self.books_database, timeout=30)
+        try:
+            if books_connection.execute("SELECT 1 FROM sqlite_master WHERE name = 'books'").fetchone() is None:
+                raise Exception(f"{self.books_database} has no books table - create it with DatabaseManager first.")
+            sqlite3_database.bookcase_apply_schema(books_connection, BOOKS_SYNC_SCHEMA, migrations=[])
+        finally:
+            books_connection.close()
+        sqlite3_database.bookcase_create_database(self.bookcase_database)
+        bookcase_connection = sqlite_profiles.connect(self.bookcase_database, "interactive")
+        try:
+            sqlite3_database.bookcase_apply_schema(bookcase_connection, BOOKCASE_SYNC_SCHEMA, migrations=[])
+        finally:
+            bookcase_connection.close()
+        self.installed = True
+
+    def is_installed(self):
+        """
+        True if both files already hold every object install() creates.
+        Only sqlite_master is read; nothing is written to either file.
+        """
+        for database, schemas in ((self.books_database, [BOOKS_SYNC_SCHEMA]),
+                                  (self.bookcase_database, [sqlite3_database.BOOKCASE_SCHEMA, BOOKCASE_SYNC_SCHEMA])):
+            if not os.path.exists(database):
+                return False
+            connection = sqlite3.connect(database)
+            try:
+                for schema in schemas:
+                    diff = sqlite3_database.bookcase_schema_diff(connection, schema)
+                    if any(objects for kind, objects in diff.items() if kind != "extra_tables"):
+                        return False
+            finally:
+                connection.close()
+        return True
+
+    def _connect(self):
+        self.connection = sqlite_profiles.connect(self.bookcase_database, "interactive")
+        self.connection.execute("ATTACH DATABASE ? AS books", (self.books_database,))
+
+    # ------------ sync ------------
+    def run(self, full=False):
+        """
+        Runs one sync and returns a report:
+        {"to_bookcase": {"inserted", "updated", "deleted"}, "to_books": {...},
+         "conflicts", "changes_read", "skipped": [(BOOK.ID, reason)], "seconds"}
+
+        BOOK rows that cannot be stored in books (an ISBN already used by
+        another book) are skipped; they are synced again when they change.
+
+        :param full: Queue every book of both sides first (the first sync of
+                     existing catalogues; books are paired by ISBN).
+        """
+        start = time.perf_counter()
+        if not self.installed:
+            if self.is_installed():
+                self.installed = True
+            else:
+                self.install()
+        self._connect()
+        report = {
+            "to_bookcase": {"inserted": 0, "updated": 0, "deleted": 0},
+            "to_books": {"inserted": 0, "updated": 0, "deleted": 0},
+            "conflicts": 0,
+            "changes_read": 0,
+            "skipped": [],
+        }
+        try:
+            self.connection.execute("BEGIN IMMEDIATE")
+            if full:
+                self.connection.execute("""INSERT INTO books.sync_changelog (row_id, op, changed_at)
+                                           SELECT id, 'U', datetime('now') FROM books.books""")
+                self.connection.execute("""INSERT INTO SYNC_CHANGELOG (ROW_ID, OP, CHANGED_AT)
+                                           SELECT ID, 'U', datetime('now') FROM BOOK""")
+
+            books_changes, books_seq = self._read_changes("books.sync_changelog", "seq", "row_id", "op",
+                                                          "changed_at", self._watermark("books"))
+            bookcase_changes, bookcase_seq = self._read_changes("SYNC_CHANGELOG", "SEQ", "ROW_ID", "OP",
+                                                                "CHANGED_AT", self._watermark("BOOK"))
+            report["changes_read"] = len(books_changes) + len(bookcase_changes)
+            self._drop_conflicting(books_changes, bookcase_changes, report)
+
+            # entries above these numbers are written by this run's own changes
+            books_log_end = self.connection.execute("SELECT MAX(seq) FROM books.sync_changelog").fetchone()[0] or 0
+            bookcase_log_end = self.connection.execute("SELECT MAX(SEQ) FROM SYNC_CHANGELOG").fetchone()[0] or 0
+
+            if books_changes or bookcase_changes:
+                self._load_authors()
+            for books_id, (op, _) in books_changes.items():
+                self._apply_to_bookcase(books_id, op, report["to_bookcase"])
+            for book_id, (op, _) in bookcase_changes.items():
+                try:
+                    self._apply_to_books(book_id, op, report["to_books"])
+                except sqlite3.IntegrityError as e:
+                    # books allows one book per ISBN, BOOK does not - the failed statement alone is undone
+                    report["skipped"].append((book_id, str(e)))
+
+            self.connection.execute("DELETE FROM books.sync_changelog WHERE seq > ?", (books_log_end,))
+            self.connection.execute("DELETE FROM SYNC_CHANGELOG WHERE SEQ > ?", (bookcase_log_end,))
+            self._advance("books", books_seq, "books.sync_changelog", "seq")
+            self._advance("BOOK", bookcase_seq, "SYNC_CHANGELOG", "SEQ")
+            self.connection.commit()
+        except BaseException:
+            self.connection.rollback()
+            raise
+        finally:
+            self.connection.close()
+            self.connection = None
+        report["seconds"] = time.perf_counter() - start
+        return report
+
+    def _watermark(self, source):
+        row = self.connection.execute("SELECT LAST_SEQ FROM SYNC_STATE WHERE SOURCE = ?", (source,)).fetchone()
+        return row[0] if row else 0
+
+    def _advance(self, source, last_seq, log_table, seq_column):
+        """Stores the watermark and drops the log entries it covers."""
+        if last_seq is None:
+            return
+        self.connection.execute("""
+            INSERT INTO SYNC_STATE (SOURCE, LAST_SEQ, LAST_SYNC) VALUES (?, ?, datetime('now'))
+            ON CONFLICT (SOURCE) DO UPDATE SET LAST_SEQ = excluded.LAST_SEQ, LAST_SYNC = excluded.LAST_SYNC
+        """, (source, last_seq))
+        self.connection.execute(f"DELETE FROM {log_table} WHERE {seq_column} <= ?", (last_seq,))
+
+    def _read_changes(self, log_table, seq_column, row_column, op_column, time_column, after_seq):
+        """
+        Returns ({row id: (last op, time of the last change)}, highest seq read)
+        for the log entries after the watermark; several changes of one row
+        collapse into the last one.
+        """
+        changes = {}
+        last_seq = None
+        for seq, row_id, op, changed_at in self.connection.execute(
+                f"SELECT {seq_column}, {row_column}, {op_column}, {time_column} FROM {log_table} "
+                f"WHERE {seq_column} > ? ORDER BY {seq_column}", (after_seq,)):
+            if op == "U" and changes.get(row_id, ("U",))[0] == "I":
+                op = "I"
+            changes[row_id] = (op, changed_at)
+            last_seq = seq
+        return changes, last_seq
+
+    def _drop_conflicting(self, books_changes, bookcase_changes, report):
+        """A book changed on both sides keeps only the change chosen by `prefer`."""
+        if not books_changes or not bookcase_changes:
+            return
+        pairs = self.connection.execute(
+            "SELECT BOOKS_ID, BOOK_ID FROM SYNC_MAP WHERE BOOKS_ID IN (SELECT value FROM json_each(?))",
+            (json.dumps(list(books_changes)),)).fetchall()
+        for books_id, book_id in pairs:
+            if book_id not in bookcase_changes:
+                continue
+            report["conflicts"] += 1
+            books_time, bookcase_time = books_changes[books_id][1], bookcase_changes[book_id][1]
+            if self.prefer == PREFER_BOOKS or (self.prefer == PREFER_NEWEST and books_time >= bookcase_time):
+                del bookcase_changes[book_id]
+            else:
+                del books_changes[books_id]
+
+    def _load_authors(self):
+        self.author_ids = {}
+        self.author_names = {}
+        for author_id, first, last in self.connection.execute("SELECT ID, FIRSTNAME, LASTNAME FROM AUTHOR"):
+            name = _author_name(first, last)
+            self.author_names[author_id] = name
+            self.author_ids.setdefault(name.casefold(), author_id)
+
+    def _author_id(self, name):
+        key = " ".join(name.split()).casefold()
+        if key not in self.author_ids:
+            first, last = split_person_name(name)
+            author_id = self.connection.execute(
+                "INSERT INTO AUTHOR (FIRSTNAME, LASTNAME) VALUES (?, ?)", (first or None, last or None)
+            ).lastrowid
+            self.author_ids[key] = author_id
+            self.author_names[author_id] = _author_name(first, last)
+        return self.author_ids[key]
+
+    def _mapped(self, column, value, other_column):
+        row = self.connection.execute(f"SELECT {other_column} FROM SYNC_MAP WHERE {column} = ?", (value,)).fetchone()
+        return row[0] if row else None
+
+    # ------------ books -> BOOK ------------
+    def _apply_to_bookcase(self, books_id, op, counts):
+        book_id = self._mapped("BOOKS_ID", books_id, "BOOK_ID")
+        row = None if op == "D" else self.connection.execute(
+            "SELECT title, authors, publisher, release_year, isbn_13, pages, tags, description, status "
+            "FROM books.books WHERE id = ?", (books_id,)).fetchone()
+        if row is not None and row[-1] == "deleted":
+            # in the trash: BOOK and the pair stay until the book is purged (see the module comment)
+            return
+        if row is None:
+            if book_id is not None:
+                self.connection.execute("DELETE FROM BOOK WHERE ID = ?", (book_id,))
+                self.connection.execute("DELETE FROM SYNC_MAP WHERE BOOKS_ID = ?", (books_id,))
+                counts["deleted"] += 1
+            return
+
+        title, authors, publisher, release_year, isbn_13, pages, tags, description, _ = row
+        author_ids = [self._author_id(name) for name in _json_list(authors) if isinstance(name, str) and name.strip()]
+        values = {
+            "TITLE": title,
+            "AUTHOR": author_ids[0] if author_ids else None,
+            "ADDITIONAL_AUTHORS": json.dumps(author_ids[1:]),
+            "PUBLISHER": publisher,
+            "ISBN": isbn_13 or None,
+            "PAGES": int(pages) if str(pages or "").strip().isdigit() else None,
+            "CATEGORIES": json.dumps(_json_list(tags), ensure_ascii=False),
+            "SUMMARY": description,
+        }
+
+        if book_id is None and isbn_13:
+            # first sync of a book that may already be on the other side
+            match = self.connection.execute("SELECT ID FROM BOOK WHERE ISBN IN (?, ?) AND ID NOT IN "
+                                            "(SELECT BOOK_ID FROM SYNC_MAP) ORDER BY ID",
+                                            (isbn_13, normalize_isbn(isbn_13))).fetchone()
+            book_id = match[0] if match else None
+            if book_id is not None:
+                self.connection.execute("INSERT INTO SYNC_MAP (BOOKS_ID, BOOK_ID) VALUES (?, ?)", (books_id, book_id))
+
+        if book_id is None:
+            values["PUBLISHED_DATE"] = release_year
+            columns = list(values)
+            book_id = self.connection.execute(
+                f"INSERT INTO BOOK ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})",
+                [values[column] for column in columns]
+            ).lastrowid
+            self.connection.execute("INSERT INTO SYNC_MAP (BOOKS_ID, BOOK_ID) VALUES (?, ?)", (books_id, book_id))
+            counts["inserted"] += 1
+            return
+
+        current = self.connection.execute(
+            f"SELECT {', '.join(values)}, PUBLISHED_DATE FROM BOOK WHERE ID = ?", (book_id,)).fetchone()
+        if current is None:
+            return
+        current_values = dict(zip(list(values) + ["PUBLISHED_DATE"], current))
+        # an unchanged year keeps the full date stored in BOOK
+        if published_year(current_values["PUBLISHED_DATE"]) != (release_year or None):
+            values["PUBLISHED_DATE"] = release_year
+        if _json_list(current_values["CATEGORIES"]) == _json_list(values["CATEGORIES"]):
+            del values["CATEGORIES"]
+        if _json_list(current_values["ADDITIONAL_AUTHORS"]) == _json_list(values["ADDITIONAL_AUTHORS"]):
+            del values["ADDITIONAL_AUTHORS"]
+        changed = {column: value for column, value in values.items() if current_values[column] != value}
+        if changed:
+            self.connection.execute(
+                f"UPDATE BOOK SET {', '.join(f'{column} = ?' for column in changed)} WHERE ID = ?",
+                list(changed.values()) + [book_id]
+            )
+            counts["updated"] += 1
+
+    # ------------ BOOK -> books ------------
+    def _apply_to_books(self, book_id, op, counts):
+        books_id = self._mapped("BOOK_ID", book_id, "BOOKS_ID")
+        row = None if op == "D" else self.connection.execute(
+            "SELECT TITLE, AUTHOR, ADDITIONAL_AUTHORS, PUBLISHER, PUBLISHED_DATE, ISBN, PAGES, CATEGORIES, SUMMARY "
+            "FROM BOOK WHERE ID = ?", (book_id,)).fetchone()
+        if row is None:
+            if books_id is not None:
+                # soft delete, like DatabaseManager.delete_book - the book can still be restored from the trash
+                self.connection.execute("UPDATE books.books SET status = 'deleted' "
+                                        "WHERE id = ? AND status IS NOT 'deleted'", (books_id,))
+                self.connection.execute("DELETE FROM SYNC_MAP WHERE BOOK_ID = ?", (book_id,))
+                counts["deleted"] += 1
+            return
+
+        title, author, additional, publisher, published_date, isbn, pages, categories, summary = row
+        author_ids = ([author] if author is not None else []) + \
+            [value for value in _json_list(additional) if value != author]
+        values = {
+            "title": title or "",
+            "authors": json.dumps([self.author_names[value] for value in author_ids if value in self.author_names],
+                                  ensure_ascii=False),
+            "publisher": publisher,
+            "release_year": published_year(published_date),
+            "isbn_13": isbn or "",
+            "pages": str(pages) if pages is not None else None,
+            "tags": json.dumps(_json_list(categories), ensure_ascii=False),
+            "description": summary,
+        }
+        isbn_norm = normalize_isbn(values["isbn_13"])
+
+        if books_id is None and isbn_norm:
+            match = self.connection.execute("SELECT id FROM books.books WHERE isbn_norm = ? AND status IS NOT 'deleted' "
+                                            "AND id NOT IN (SELECT BOOKS_ID FROM SYNC_MAP)", (isbn_norm,)).fetchone()
+            books_id = match[0] if match else None
+            if books_id is not None:
+                self.connection.execute("INSERT INTO SYNC_MAP (BOOKS_ID, BOOK_ID) VALUES (?, ?)", (books_id, book_id))
+
+        if books_id is None:
+            columns = list(values) + ["isbn_norm"]
+            books_id = self.connection.execute(
+                f"INSERT INTO books.books ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})",
+                list(values.values()) + [isbn_norm]
+            ).lastrowid
+            self.connection.execute("INSERT INTO SYNC_MAP (BOOKS_ID, BOOK_ID) VALUES (?, ?)", (books_id, book_id))
+            counts["inserted"] += 1
+            return
+
+        current = self.connection.execute(
+            f"SELECT {', '.join(values)} FROM books.books WHERE id = ?", (books_id,)).fetchone()
+        if current is None:
+            return
+        current_values = dict(zip(values, current))
+        for column in ("authors", "tags"):
+            if _json_list(current_values[column]) == _json_list(values[column]):
+                del values[column]
+        changed = {column: value for column, value in values.items() if current_values[column] != value}
+        if "isbn_13" in changed:
+            changed["isbn_norm"] = isbn_norm
+        if changed:
+            self.connection.execute(
+                f"UPDATE books.books SET {', '.join(f'{column} = ?' for column in changed)} WHERE id = ?",
+                list(changed.values()) + [books_id]
+            )
+            counts["updated"] += 1
+
+
+if __name__ == "__main__":
+    # Usage: python bookcase_sync.py books.db mylibrary.db [--full] [--prefer newest|books|bookcase]
+    parser = argparse.ArgumentParser(description="Synchronizes books (py-cli-db-edit) with BOOK (My Library).")
+    parser.add_argument("books_database")
+    parser.add_argument("bookcase_database")
+    parser.add_argument("--full", action="store_true", help="first sync of existing catalogues (pairs books by ISBN)")
+    parser.add_argument("--prefer", choices=(PREFER_NEWEST, PREFER_BOOKS, PREFER_BOOKCASE), default=PREFER_NEWEST)
+    args = parser.parse_args()
+
+    result = BookcaseSync(args.books_database, args.bookcase_database, prefer=args.prefer).run(full=args.full)
+    for direction in ("to_bookcase", "to_books"):
+        counts = result[direction]
+        print(f"{direction:12} inserted {counts['inserted']}, updated {counts['updated']}, deleted {counts['deleted']}")
+    print(f"{result['changes_read']} changes read, {result['conflicts']} conflicts, {result['seconds']:.2f} s")
+    for book_id, reason in result["skipped"]:
+        print(f"skipped BOOK {book_id}: {reason}")
@@ -13,9 +13,15 @@ import isbn_info
 def show_message(option):
     messagebox.showinfo(" ",f"{option}")
 
-book_data = isbn_info.get_book_info2("9781556341274")
-book_data_text = ""
-book_data_text = ("\n"+book_data["title"]+"\n"+book_data["authors"])
+def show_book_data(isbn):
+    book_data = isbn_info.get_book_info2(isbn)
+    if book_data["status"] != "OK":
+        show_message(book_data["status"])
+        return
+    book_data_text = ""
+    book_data_text = ("\n"+book_data["title"]+"\n"+book_data["authors"])
+    show_message(book_data_text)
+
 #przygotować:
 # na poczatek pusty string
 # potem w petli
@@ -36,4 +42,5 @@ book_data_text = ("\n"+book_data["title"]+"\n"+book_data["authors"])
 # book_data_text ma byc suma poszczegolnych pol
 # gdzie są wymienione wszystkie pola (klucze tych pol) nawet jesli pole jest puste
 # na koniec book_data_text jest prezentowane w okienku.
-show_message(book_data_text)
+if __name__ == "__main__":
+    show_book_data("9781556341274")
@@ -0,0 +1,132 @@
+import json
+import sqlite3
+import threading
+import time
+
+
+def normalize_isbn(isbn):
+    """
+    Normalize an ISBN for comparisons: hyphens and spaces are removed
+    and ISBN-10 numbers are converted to ISBN-13.
+    Returns None if the value contains no usable ISBN characters.
+
+    This is the only implementation: the cache keys, books.isbn_norm of
+    py-cli-db-edit (chatgpt_v1_database imports it from here), the importer
+    and the sync all have to agree on it.
+    """
+    if isbn is None:
+        return None
+    digits = "".join(ch for ch in str(isbn).upper() if ch.isdigit() or ch == "X")
+    if not digits:
+        return None
+    if len(digits) == 10:
+        body = "978" + digits[:9]
+        if body.isdigit():
+            total = sum(int(d) * (1 if i % 2 == 0 else 3) for i, d in enumerate(body))
+            return body + str((10 - total % 10) % 10)
+    return digits
+
+
+class IsbnCache:
+    """
+    Persistent (SQLite) cache of Google Books lookups, keyed by normalized ISBN.
+
+    - found books are kept for `ttl` seconds,
+    - "not found" answers are cached too (negative caching), for `negative_ttl` seconds,
+    - at most `max_entries` entries are kept; the oldest ones are evicted first
+      (the number of entries is tracked in memory, so a put does not count the table),
+    - in offline mode expired entries are still returned, so no network is needed.
+    """
+    def __init__(self, db_path, ttl=30 * 24 * 3600, negative_ttl=24 * 3600,
+                 max_entries=50000, offline=False):
+        """
+        :param db_path: Path of the SQLite file holding the cache.
+        :param ttl: Lifetime (seconds) of a cached book.
+        :param negative_ttl: Lifetime (seconds) of a cached "not found" answer.
+        :param max_entries: Maximum number of cached ISBNs.
+        :param offline: If True, lookups never go to the network.
+        """
+        self.db_path = db_path
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.max_entries = max_entries
+        self.offline = offline
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(db_path, check_same_thread=False)
+        self._connection.execute("""
+            CREATE TABLE IF NOT EXISTS isbn_cache (
+                isbn TEXT PRIMARY KEY,
+                found INTEGER NOT NULL,
+                data TEXT,
+                fetched_at REAL NOT NULL
+            )
+        """)
+        self._connection.execute(
+            "CREATE INDEX IF NOT EXISTS isbn_cache_fetched_at_idx ON isbn_cache (fetched_at)"
+        )
+        self._connection.commit()
+        self._count = self._connection.execute("SELECT COUNT(*) FROM isbn_cache").fetchone()[0]
+
+    def get(self, isbn):
+        """
+        Look up an ISBN.
+
+        :return: (hit, volume_info). hit is False when the ISBN is not cached
+                 (or the entry expired); volume_info is None for a cached "not found".
+        """
+        key = normalize_isbn(isbn)
+        if key is None:
+            return False, None
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT found, data, fetched_at FROM isbn_cache WHERE isbn = ?", (key,)
+            ).fetchone()
+        if row is None:
+            return False, None
+
+        found, data, fetched_at = row
+        lifetime = self.ttl if found else self.negative_ttl
+        if not self.offline and time.time() - fetched_at > lifetime:
+            return False, None
+        return True, (json.loads(data) if found else None)
+
+    def put(self, isbn, volume_info):
+        """
+        Store the answer for an ISBN. volume_info=None records "not found".
+        """
+        key = normalize_isbn(isbn)
+        if key is None:
+            return
+        found = volume_info is not None
+        data = json.dumps(volume_info) if found else None
+        with self._lock:
+            # a primary key lookup tells whether the entry is new
+            exists = self._connection.execute("SELECT 1 FROM isbn_cache WHERE isbn = ?", (key,)).fetchone()
+            self._connection.execute(
+                "INSERT OR REPLACE INTO isbn_cache (isbn, found, data, fetched_at) VALUES (?, ?, ?, ?)",
+                (key, int(found), data, time.time())
+            )
+            if exists is None:
+                self._count += 1
+            self._evict()
+            self._connection.commit()
+
+    def _evict(self):
+        """Removes the oldest entries above max_entries (called with the lock held)."""
+        if self._count > self.max_entries:
+            self._count -= self._connection.execute("""
+                DELETE FROM isbn_cache WHERE isbn IN (
+                    SELECT isbn FROM isbn_cache ORDER BY fetched_at LIMIT ?
+                )
+            """, (self._count - self.max_entries,)).rowcount
+
+    def clear(self):
+        """Remove all cached entries."""
+        with self._lock:
+            self._connection.execute("DELETE FROM isbn_cache")
+            self._connection.commit()
+            self._count = 0
+
+    def close(self):
+        with self._lock:
+            self._connection.close()
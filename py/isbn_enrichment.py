@@ -0,0 +1,286 @@
+import json
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+import requests
+
+import isbn_cache
+import isbn_info
+
+
+class RateLimiter:
+    """
+    Token bucket shared by all worker threads: at most `rate` requests per
+    second, with short bursts up to `burst`. pause() stops every worker for a
+    while, e.g. after the API answered 429 Too Many Requests.
+    """
+    def __init__(self, rate=5.0, burst=5):
+        self.rate = rate
+        self.burst = burst
+        self._tokens = burst
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def wait(self):
+        """Blocks until the next request may be sent."""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                if now >= self._paused_until:
+                    self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+                    self._updated = now
+                    if self._tokens >= 1:
+                        self._tokens -= 1
+                        return
+                    delay = (1 - self._tokens) / self.rate
+                else:
+                    delay = self._paused_until - now
+            time.sleep(delay)
+
+    def pause(self, seconds):
+        with self._lock:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+
+
+def volume_info_to_book(isbn, volume_info):
+    """
+    Maps a Google Books volumeInfo onto the add_book / add_books_bulk fields.
+    """
+    title = volume_info.get('title', '')
+    if volume_info.get('subtitle'):
+        title = f"{title}: {volume_info['subtitle']}"
+    page_count = volume_info.get('pageCount')
+    return {
+        "authors": volume_info.get('authors', []),
+        "title": title,
+        "edition": "",
+        "language": volume_info.get('language', ''),
+        "location": "",
+        "publisher": volume_info.get('publisher', ''),
+        "release_year": volume_info.get('publishedDate', '')[:4],
+        "isbn_13": isbn,
+        "pages": str(page_count) if page_count is not None else "",
+        "tags": volume_info.get('categories', []),
+        "description": volume_info.get('description', ''),
+        "status": "incomplete",
+    }
+
+
+class EnrichmentPipeline:
+    """
+    Looks up many ISBNs in Google Books concurrently and streams the found
+    books into the `books` table through DatabaseManager.add_books_bulk.
+
+    - a bounded thread pool shares one pooled requests.Session,
+    - requests are rate limited; HTTP 429 pauses all workers (Retry-After or
+      exponential backoff) and the ISBN is retried,
+    - answers go through isbn_info's persistent cache,
+    - finished ISBNs are appended to a progress file after they were
+      committed, so an interrupted run continues where it stopped,
+    - an ISBN that fails (lookup, mapping or writing) is recorded in the
+      progress file with status ERROR and the run goes on; ERROR records
+      are not finished, so the next run tries them again.
+    """
+    def __init__(self, db_manager, progress_path=None, workers=8, rate=5.0,
+                 batch_size=200, max_retries=5, on_conflict="update_missing", progress_callback=None):
+        """
+        :param db_manager: DatabaseManager (after create_database) receiving the books.
+        :param progress_path: JSON Lines file recording finished ISBNs (None = not resumable).
+        :param workers: Number of concurrent lookups.
+        :param rate: Maximum number of API requests per second.
+        :param batch_size: Number of found books written per add_books_bulk call.
+        :param max_retries: Attempts per ISBN for throttled or failed requests.
+        :param on_conflict: Conflict policy passed to add_books_bulk.
+        :param progress_callback: Called with a stats dict after every finished ISBN.
+        """
+        self.db_manager = db_manager
+        self.progress_path = progress_path
+        self.workers = workers
+        self.batch_size = batch_size
+        self.max_retries = max_retries
+        self.on_conflict = on_conflict
+        self.progress_callback = progress_callback or print_progress
+        self.rate_limiter = RateLimiter(rate, burst=max(1, workers))
+
+        self.session = requests.Session()
+        adapter = requests.adapters.HTTPAdapter(pool_connections=workers, pool_maxsize=workers)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+        self.stats = {}
+
+    def load_finished(self):
+        """Returns the normalized ISBNs recorded in the progress file (except failed ones)."""
+        finished = set()
+        if self.progress_path and os.path.exists(self.progress_path):
+            with open(self.progress_path, 'r', encoding='utf-8') as progress_file:
+                for line in progress_file:
+                    line = line.strip()
+                    if line:
+                        record = json.loads(line)
+                        if record.get("status") == isbn_info.LOOKUP_ERROR:
+                            # failed ISBNs are retried on the next run
+                            continue
+                        finished.add(record["isbn"])
+        return finished
+
+    def run(self, isbns):
+        """
+        Enrich the given ISBNs. ISBNs already in the database or recorded in
+        the progress file are skipped.
+
+        :return: stats dict (total, skipped, found, not_found, errors, inserted, ...)
+        """
+        skip = self.load_finished() | self.db_manager.get_known_isbns()
+        pending = []
+        seen = set()
+        skipped = 0
+        for isbn in isbns:
+            key = isbn_cache.normalize_isbn(isbn)
+            if key is None or key in seen:
+                continue
+            seen.add(key)
+            if key in skip:
+                skipped += 1
+            else:
+                pending.append(key)
+
+        self.stats = {"total": len(pending), "done": 0, "skipped": skipped, "found": 0,
+                      "not_found": 0, "errors": 0, "inserted": 0, "updated": 0,
+                      "started": time.monotonic()}
+        books = []      # found books waiting to be written
+        finished = []   # progress records of the ISBNs in `books` (and not found ones)
+
+        executor = ThreadPoolExecutor(max_workers=self.workers)
+        in_flight = {}
+        isbn_iter = iter(pending)
+        try:
+            while True:
+                # keep a bounded number of lookups in flight
+                while len(in_flight) < self.workers * 2:
+                    isbn = next(isbn_iter, None)
+                    if isbn is None:
+                        break
+                    in_flight[executor.submit(self._lookup, isbn)] = isbn
+                if not in_flight:
+                    break
+
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    isbn = in_flight.pop(future)
+                    self.stats["done"] += 1
+                    try:
+                        status, volume_info = future.result()
+                        if status == isbn_info.LOOKUP_OK:
+                            books.append(volume_info_to_book(isbn, volume_info))
+                            self.stats["found"] += 1
+                            finished.append({"isbn": isbn, "status": status})
+                        elif status == isbn_info.LOOKUP_NOT_FOUND:
+                            self.stats["not_found"] += 1
+                            finished.append({"isbn": isbn, "status": status})
+                        else:
+                            self._record_error(finished, isbn, "lookup failed")
+                    except Exception as e:
+                        # one bad ISBN (or answer) must not stop the whole run
+                        self._record_error(finished, isbn, e)
+                    self.progress_callback(self.stats)
+
+                if len(books) >= self.batch_size:
+                    self._flush(books, finished)
+        finally:
+            for future in in_flight:
+                future.cancel()
+            executor.shutdown(wait=True)
+            self._flush(books, finished)
+        return self.stats
+
+    def _lookup(self, isbn):
+        """Worker thread: one ISBN, with rate limiting and backoff."""
+        for attempt in range(self.max_retries):
+            self.rate_limiter.wait()
+            status, volume_info, retry_after = isbn_info.lookup_volume_info(isbn, session=self.session)
+            if status == isbn_info.LOOKUP_THROTTLED:
+                self.rate_limiter.pause(retry_after if retry_after is not None else 2 ** attempt)
+                continue
+            if status == isbn_info.LOOKUP_ERROR:
+                time.sleep(min(30, 2 ** attempt))
+                continue
+            return status, volume_info
+        return isbn_info.LOOKUP_ERROR, None
+
+    def _record_error(self, finished, isbn, error):
+        """Counts a failed ISBN and adds its ERROR record to the progress records."""
+        self.stats["errors"] += 1
+        finished.append({"isbn": isbn, "status": isbn_info.LOOKUP_ERROR, "error": str(error)})
+
+    def _flush(self, books, finished):
+        """
+        Writes found books in one transaction, then records them as finished.
+        If the batch fails, the books are written one by one; books that
+        cannot be written (errors or BULK_INVALID rows) are recorded as ERROR.
+        """
+        if books:
+            try:
+                outcomes = self.db_manager.add_books_bulk(books, on_conflict=self.on_conflict)
+            except Exception:
+                outcomes = []
+                for book in books:
+                    try:
+                        outcomes += self.db_manager.add_books_bulk([book], on_conflict=self.on_conflict)
+                    except Exception as e:
+                        outcomes.append(e)
+            failed = {book["isbn_13"]: outcome for book, outcome in zip(books, outcomes)
+                      if isinstance(outcome, Exception) or outcome == "invalid"}
+            for record in finished:
+                if record["isbn"] in failed:
+                    self.stats["found"] -= 1
+                    self.stats["errors"] += 1
+                    error = failed[record["isbn"]]
+                    record.update(status=isbn_info.LOOKUP_ERROR,
+                                  error=str(error) if isinstance(error, Exception) else "invalid book data")
+            self.stats["inserted"] += outcomes.count("inserted")
+            self.stats["updated"] += outcomes.count("updated")
+        if finished and self.progress_path:
+            with open(self.progress_path, 'a', encoding='utf-8') as progress_file:
+                for record in finished:
+                    progress_file.write(json.dumps(record) + "\n")
+        books.clear()
+        finished.clear()
+
+
+def print_progress(stats):
+    """Default progress report: one line, rewritten in place."""
+    elapsed = time.monotonic() - stats["started"]
+    rate = stats["done"] / elapsed if elapsed > 0 else 0.0
+    print(f"\r{stats['done']}/{stats['total']} ISBN "
+          f"(found {stats['found']}, not found {stats['not_found']}, errors {stats['errors']}) "
+          f"{rate:.1f}/s", end="", flush=True)
+
+
+if __name__ == "__main__":
+    # Usage: python isbn_enrichment.py isbn_list.txt [library.db]
+    # (one ISBN per line; progress is kept in isbn_list.txt.progress)
+    sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "py-cli-db-edit"))
+    import chatgpt_v1_database
+
+    isbn_file = sys.argv[1]
+    db_name = sys.argv[2] if len(sys.argv) > 2 else "library.db"
+
+    db_manager = chatgpt_v1_database.DatabaseManager()
+    db_manager.create_database(db_name)
+    with open(isbn_file, 'r', encoding='utf-8') as f:
+        isbns = [line.strip() for line in f if line.strip()]
+
+    pipeline = EnrichmentPipeline(db_manager, progress_path=isbn_file + ".progress")
+    try:
+        stats = pipeline.run(isbns)
+    except KeyboardInterrupt:
+        stats = pipeline.stats
+        print("\nInterrupted - run again to continue.")
+    print(f"\nInserted {stats.get('inserted', 0)}, updated {stats.get('updated', 0)}, "
+          f"skipped {stats.get('skipped', 0)}.")
+    db_manager.close()
@@ -1,89 +1,167 @@
-import requests
-
-def get_book_info(isbn):
-    # URL do Google Books API
-    url = f"https://www.googleapis.com/books/v1/volumes?q=isbn:{isbn}"
-        
-    # Wykonaj zapytanie HTTP
-    response = requests.get(url)
-    
-    # Sprawdź, czy zapytanie zakończyło się sukcesem
-    if response.status_code == 200:
-        data = response.json()
-        
-        # Jeśli książka została znaleziona
-        if 'items' in data:
-            book = data['items'][0]['volumeInfo']
-            
-            print(book)
-            # Wydobywanie informacji o książce
-            title = book.get('title', 'Brak tytułu')
-            authors = ', '.join(book.get('authors', ['Brak autorów']))
-            publisher = book.get('publisher', 'Brak wydawcy')
-            published_date = book.get('publishedDate', 'Brak daty publikacji')
-            description = book.get('description', 'Brak opisu')
-            page_count = book.get('pageCount', 'Brak liczby stron')
-            language = book.get('language', 'Brak języka')
-            thumbnail = book.get('imageLinks', {}).get('thumbnail', 'Brak okładki')
-
-            # Wyświetlenie informacji o książce
-            print(f"Tytuł: {title}")
-            print(f"Autorzy: {authors}")
-            print(f"Wydawca: {publisher}")
-            print(f"Data publikacji: {published_date}")
-            print(f"Liczba stron: {page_count}")
-            print(f"Język: {language}")
-            print(f"Opis: {description}")
-            print(f"Okładka: {thumbnail}")
-        else:
-            print("Nie znaleziono książki o podanym ISBN.")
-    else:
-        print("Błąd w połączeniu z API.")
-
-def get_book_info2(isbn):
-    # URL do Google Books API
-    url = f"https://www.googleapis.com/books/v1/volumes?q=isbn:{isbn}"
-    
-    ISBN_field_list = {}
-
-    # Wykonaj zapytanie HTTP
-    response = requests.get(url)
-    
-    # Sprawdź, czy zapytanie zakończyło się sukcesem
-    if response.status_code == 200:
-        data = response.json()
-        
-        # Jeśli książka została znaleziona
-        if 'items' in data:
-            book = data['items'][0]['volumeInfo']
-            
-            # Wydobywanie informacji o książce
-            title = book.get('title', 'Brak tytułu')
-            authors = ', '.join(book.get('authors', ['Brak autorów']))
-            publisher = book.get('publisher', 'Brak wydawcy')
-            published_date = book.get('publishedDate', 'Brak daty publikacji')
-            description = book.get('description', 'Brak opisu')
-            page_count = book.get('pageCount', 'Brak liczby stron')
-            language = book.get('language', 'Brak języka')
-            thumbnail = book.get('imageLinks', {}).get('thumbnail', 'Brak okładki')
-
-            # Wyświetlenie informacji o książce
-            ISBN_field_list["Okładka"]         = thumbnail
-            ISBN_field_list["title"]           = title
-            ISBN_field_list["authors"]         = authors
-            ISBN_field_list["Wydawca"]         = publisher
-            ISBN_field_list["Data publikacji"] = published_date
-            ISBN_field_list["Liczba stron"]    = page_count
-            ISBN_field_list["Język"]           = language
-            ISBN_field_list["Opis"]            = description
-            ISBN_field_list["status"]          = "OK"
-        else:
-            ISBN_field_list["status"] = "ERROR: Nie znaleziono książki o podanym ISBN."
-    else:
-        ISBN_field_list["status"] = "ERROR: Błąd w połączeniu z API."
-    return ISBN_field_list
-
-# Przykładowe wywołanie funkcji
-isbn = input("Podaj numer ISBN książki: ")
-#print(get_book_info2(isbn))
-get_book_info(isbn)
+import os
+import requests
+import isbn_cache
+
+# URL do Google Books API
+# (ISBN_INFO_API_URL pozwala podstawić np. lokalny serwer testowy)
+GOOGLE_BOOKS_API_URL = os.environ.get("ISBN_INFO_API_URL", "https://www.googleapis.com/books/v1/volumes")
+
+# Plik pamięci podręcznej odpowiedzi API; ISBN_INFO_OFFLINE=1 wyłącza zapytania sieciowe
+ISBN_CACHE_PATH = os.environ.get("ISBN_INFO_CACHE", os.path.join(os.path.dirname(os.path.abspath(__file__)), "isbn_cache.db"))
+ISBN_INFO_OFFLINE = os.environ.get("ISBN_INFO_OFFLINE", "") not in ("", "0")
+
+# Wyniki fetch_volume_info
+LOOKUP_OK = "OK"
+LOOKUP_NOT_FOUND = "NOT_FOUND"
+LOOKUP_ERROR = "ERROR"
+LOOKUP_OFFLINE = "OFFLINE"
+LOOKUP_THROTTLED = "THROTTLED"
+
+_cache = None
+
+
+def get_cache():
+    """
+    Returns the shared IsbnCache, opening it on first use.
+    """
+    global _cache
+    if _cache is None:
+        _cache = isbn_cache.IsbnCache(ISBN_CACHE_PATH, offline=ISBN_INFO_OFFLINE)
+    return _cache
+
+
+def lookup_volume_info(isbn, session=None, timeout=30):
+    """
+    Returns (status, volumeInfo, retry_after) for an ISBN, using the persistent cache first.
+    status is LOOKUP_OK, LOOKUP_NOT_FOUND, LOOKUP_ERROR (API failure or an answer
+    that is not the expected JSON, not cached),
+    LOOKUP_THROTTLED (HTTP 429; retry_after holds the Retry-After seconds, if sent)
+    or LOOKUP_OFFLINE (offline mode and the ISBN is not cached).
+
+    :param session: optional requests.Session to reuse HTTP connections
+    """
+    cache = get_cache()
+    hit, book = cache.get(isbn)
+    if hit:
+        return (LOOKUP_OK, book, None) if book is not None else (LOOKUP_NOT_FOUND, None, None)
+    if cache.offline:
+        return LOOKUP_OFFLINE, None, None
+
+    # Wykonaj zapytanie HTTP
+    http = session or requests
+    try:
+        response = http.get(GOOGLE_BOOKS_API_URL, params={"q": f"isbn:{isbn}"}, timeout=timeout)
+    except requests.RequestException:
+        return LOOKUP_ERROR, None, None
+
+    # Sprawdź, czy zapytanie zakończyło się sukcesem
+    if response.status_code == 429:
+        retry_after = response.headers.get("Retry-After")
+        try:
+            retry_after = float(retry_after) if retry_after is not None else None
+        except ValueError:
+            retry_after = None
+        return LOOKUP_THROTTLED, None, retry_after
+    if response.status_code != 200:
+        return LOOKUP_ERROR, None, None
+
+    # Odpowiedź inna niż oczekiwany JSON (np. strona HTML błędu) to błąd przejściowy - bez zapisu w cache
+    try:
+        data = response.json()
+    except ValueError:
+        return LOOKUP_ERROR, None, None
+    if not isinstance(data, dict) or ("items" not in data and "totalItems" not in data):
+        return LOOKUP_ERROR, None, None
+    try:
+        # Jeśli książka została znaleziona
+        book = data['items'][0]['volumeInfo'] if data.get('items') else None
+    except (LookupError, TypeError):
+        return LOOKUP_ERROR, None, None
+    # "nie znaleziono" trafia do cache tylko jako jawna odpowiedź API (totalItems = 0)
+    cache.put(isbn, book)
+    return (LOOKUP_OK, book, None) if book is not None else (LOOKUP_NOT_FOUND, None, None)
+
+
+def fetch_volume_info(isbn, session=None):
+    """
+    Returns (status, volumeInfo) for an ISBN, see lookup_volume_info.
+    A throttled request is reported as LOOKUP_ERROR.
+    """
+    status, book, _ = lookup_volume_info(isbn, session)
+    if status == LOOKUP_THROTTLED:
+        status = LOOKUP_ERROR
+    return status, book
+
+
+def get_book_info(isbn):
+    status, book = fetch_volume_info(isbn)
+
+    if status in (LOOKUP_OK, LOOKUP_NOT_FOUND):
+        # Jeśli książka została znaleziona
+        if status == LOOKUP_OK:
+            print(book)
+            # Wydobywanie informacji o książce
+            title = book.get('title', 'Brak tytułu')
+            authors = ', '.join(book.get('authors', ['Brak autorów']))
+            publisher = book.get('publisher', 'Brak wydawcy')
+            published_date = book.get('publishedDate', 'Brak daty publikacji')
+            description = book.get('description', 'Brak opisu')
+            page_count = book.get('pageCount', 'Brak liczby stron')
+            language = book.get('language', 'Brak języka')
+            thumbnail = book.get('imageLinks', {}).get('thumbnail', 'Brak okładki')
+
+            # Wyświetlenie informacji o książce
+            print(f"Tytuł: {title}")
+            print(f"Autorzy: {authors}")
+            print(f"Wydawca: {publisher}")
+            print(f"Data publikacji: {published_date}")
+            print(f"Liczba stron: {page_count}")
+            print(f"Język: {language}")
+            print(f"Opis: {description}")
+            print(f"Okładka: {thumbnail}")
+        else:
+            print("Nie znaleziono książki o podanym ISBN.")
+    else:
+        print("Błąd w połączeniu z API.")
+
+def get_book_info2(isbn):
+    ISBN_field_list = {}
+
+    status, book = fetch_volume_info(isbn)
+
+    if status in (LOOKUP_OK, LOOKUP_NOT_FOUND):
+        # Jeśli książka została znaleziona
+        if status == LOOKUP_OK:
+            # Wydobywanie informacji o książce
+            title = book.get('title', 'Brak tytułu')
+            authors = ', '.join(book.get('authors', ['Brak autorów']))
+            publisher = book.get('publisher', 'Brak wydawcy')
+            published_date = book.get('publishedDate', 'Brak daty publikacji')
+            description = book.get('description', 'Brak opisu')
+            page_count = book.get('pageCount', 'Brak liczby stron')
+            language = book.get('language', 'Brak języka')
+            thumbnail = book.get('imageLinks', {}).get('thumbnail', 'Brak okładki')
+
+            # Wyświetlenie informacji o książce
+            ISBN_field_list["Okładka"]         = thumbnail
+            ISBN_field_list["title"]           = title
+            ISBN_field_list["authors"]         = authors
+            ISBN_field_list["Wydawca"]         = publisher
+            ISBN_field_list["Data publikacji"] = published_date
+            ISBN_field_list["Liczba stron"]    = page_count
+            ISBN_field_list["Język"]           = language
+            ISBN_field_list["Opis"]            = description
+            ISBN_field_list["status"]          = "OK"
+        else:
+            ISBN_field_list["status"] = "ERROR: Nie znaleziono książki o podanym ISBN."
+    elif status == LOOKUP_OFFLINE:
+        ISBN_field_list["status"] = "ERROR: Tryb offline - brak książki w pamięci podręcznej."
+    else:
+        ISBN_field_list["status"] = "ERROR: Błąd w połączeniu z API."
+    return ISBN_field_list
+
+if __name__ == "__main__":
+    # Przykładowe wywołanie funkcji
+    isbn = input("Podaj numer ISBN książki: ")
+    #print(get_book_info2(isbn))
+    get_book_info(isbn)
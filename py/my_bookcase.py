@@ -5,7 +5,7 @@ import os
 import tempfile
 
 # obsługa bazy danych SQLite
-import sqlite3
+import sqlite_profiles
 
 # Global variable to store the file content or an error message.
 file_content = None
@@ -166,7 +166,7 @@ root.maxsize(1024, 768)
 ## jeśli nie było pliku zakładamy nową bazę o domyślnej strukturze (-> struktura bazy)
 
 ##### tymczasowe
-mylib_con = sqlite3.connect("mylibrary.db")
+mylib_con = sqlite_profiles.connect("mylibrary.db", "interactive")
 mylib_cur = mylib_con.cursor()
 
 # Ustawienie paska menu w oknie głównym
@@ -0,0 +1,464 @@
+import argparse
+import csv
+import json
+import os
+import sqlite3
+import time
+import xml.etree.ElementTree as ElementTree
+
+import sqlite3_database
+import sqlite_profiles
+from isbn_cache import normalize_isbn
+
+
+# Tables of the "My Library" model (py/sqlite3_database.BOOKCASE_SCHEMA)
+PEOPLE_TABLES = ("AUTHOR", "COMPANY")
+ITEM_TABLES = ("BOOK", "COMIC", "MOVIE", "VIDEO_GAME")
+
+# Columns of the item tables referring to AUTHOR / COMPANY rows:
+# column -> (referenced table, list of ids stored as JSON like ADDITIONAL_AUTHORS = "[41]")
+FOREIGN_KEYS = {
+    "BOOK": {"AUTHOR": ("AUTHOR", False), "ADDITIONAL_AUTHORS": ("AUTHOR", True)},
+    "COMIC": {"AUTHOR": ("AUTHOR", False), "ADDITIONAL_AUTHORS": ("AUTHOR", True)},
+    "MOVIE": {"DIRECTOR": ("AUTHOR", False), "ADDITIONAL_DIRECTORS": ("AUTHOR", True)},
+    "VIDEO_GAME": {"DEVELOPER": ("COMPANY", False), "ADDITIONAL_DEVELOPERS": ("COMPANY", True)},
+}
+
+# Column identifying an item, used to detect items that are already in the library;
+# items without it are identified by TITLE and the main author/director/developer
+ITEM_KEYS = {"BOOK": "ISBN", "COMIC": "ISBN", "MOVIE": "EAN", "VIDEO_GAME": "EAN"}
+MAIN_REFERENCES = {table_name: next(column for column, (_, is_list) in references.items() if not is_list)
+                   for table_name, references in FOREIGN_KEYS.items()}
+
+# What happens with an item that is already in the library
+CONFLICT_SKIP = "skip"          # keep the stored item
+CONFLICT_UPDATE = "update"      # overwrite it with the imported values (its ID is kept)
+
+# Alternative column names used in CSV/XML exports ("Published date" -> PUBLISHED_DATE)
+COLUMN_ALIASES = {
+    "AUTHORS": "AUTHOR",
+    "FIRST_NAME": "FIRSTNAME",
+    "LAST_NAME": "LASTNAME",
+    "DESCRIPTION": "SUMMARY",
+    "WISHLIST": "IN_WISHLIST",
+    "CATEGORY": "CATEGORIES",
+    "TAGS": "CATEGORIES",
+}
+
+# Report counters and the lists of their first messages
+_SAMPLES = {"conflicts": "conflict_samples", "unresolved": "unresolved_samples"}
+
+_TRUE = {"1", "true", "yes", "y", "tak"}
+_FALSE = {"0", "false", "no", "n", "nie"}
+
+
+def normalize_column(name):
+    """Export column / element name -> schema column name ("Published date" -> "PUBLISHED_DATE")."""
+    column = "_".join(name.strip().replace("-", " ").split()).upper()
+    return COLUMN_ALIASES.get(column, column)
+
+
+def read_sqlite_export(path, batch_size=5000):
+    """
+    Yields (table, record) for every row of an exported "My Library" SQLite
+    file: AUTHOR and COMPANY first, so that the item rows referring to them
+    can be resolved. Rows are read with fetchmany, never all at once.
+    """
+    connection = sqlite_profiles.connect(path, "read-only-viewer")
+    try:
+        existing = {row[0] for row in connection.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+        for table_name in PEOPLE_TABLES + ITEM_TABLES:
+            if table_name not in existing:
+                continue
+            cursor = connection.execute(f"SELECT * FROM {table_name}")
+            names = [normalize_column(column[0]) for column in cursor.description]
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                for row in rows:
+                    yield table_name, dict(zip(names, row))
+    finally:
+        connection.close()
+
+
+def read_csv_export(path, table_name=None):
+    """
+    Yields (table, record) for every line of a CSV export of one table.
+    The table is taken from table_name or from the file name (BOOK.csv, book.csv).
+    """
+    table_name = (table_name or os.path.basename(path).split(".")[0]).upper()
+    if table_name not in PEOPLE_TABLES + ITEM_TABLES:
+        raise Exception(f"Cannot tell which table {path} holds - pass the table name.")
+    with open(path, "r", encoding="utf-8-sig", newline="") as csv_file:
+        reader = csv.reader(csv_file)
+        header = next(reader, None)
+        if header is None:
+            return
+        names = [normalize_column(name) for name in header]
+        for row in reader:
+            yield table_name, dict(zip(names, row))
+
+
+def read_xml_export(path):
+    """
+    Yields (table, record) for every element of an XML export named after a
+    table (<book>, <author>, ...); its child elements (and attributes) are the columns.
+    The file is parsed incrementally and every element is dropped once read.
+    AUTHOR/COMPANY elements must come before the items referring to them.
+    """
+    tables = set(PEOPLE_TABLES + ITEM_TABLES)
+    for _, element in ElementTree.iterparse(path, events=("end",)):
+        table_name = element.tag.upper()
+        if table_name not in tables or (len(element) == 0 and not element.attrib):
+            # not a record - e.g. <author>7</author> inside <book> is a column
+            continue
+        record = {normalize_column(child.tag): child.text for child in element}
+        record.update({normalize_column(name): value for name, value in element.attrib.items()})
+        element.clear()
+        yield table_name, record
+
+
+def read_export(path, table_name=None):
+    """Chooses the reader by the file extension (.db/.sqlite, .csv, .xml)."""
+    extension = os.path.splitext(path)[1].lower()
+    if extension == ".csv":
+        return read_csv_export(path, table_name)
+    if extension == ".xml":
+        return read_xml_export(path)
+    return read_sqlite_export(path)
+
+
+def split_person_name(name):
+    """'Tolkien, J.R.R.' or 'J.R.R. Tolkien' -> ('J.R.R.', 'Tolkien')."""
+    name = " ".join(name.split())
+    if "," in name:
+        last, _, first = name.partition(",")
+        return first.strip(), last.strip()
+    first, _, last = name.rpartition(" ")
+    return first, last
+
+
+class MyLibraryImporter:
+    """
+    Streams "My Library" exports (SQLite, CSV, XML) into a bookcase database.
+
+    - AUTHOR and COMPANY references are resolved through dictionaries loaded
+      once (library names -> ids, export ids -> library ids), never with a
+      query per row,
+    - items are written with executemany and committed every `batch_size`
+      items (bulk-load connection profile),
+    - an item whose ISBN/EAN is already in the library is a conflict:
+      skipped or updated (on_conflict), and reported,
+    - in dry-run mode nothing is written; the report tells what would happen.
+    """
+    def __init__(self, database_name, batch_size=10000, on_conflict=CONFLICT_SKIP, dry_run=False,
+                 max_reported_conflicts=1000):
+        """
+        :param database_name: Library file (created if it does not exist, except in dry-run mode).
+        :param batch_size: Items per transaction.
+        :param on_conflict: CONFLICT_SKIP or CONFLICT_UPDATE.
+        :param dry_run: Only report what the import would do.
+        :param max_reported_conflicts: Conflicts kept in the report (all are counted).
+        """
+        if on_conflict not in (CONFLICT_SKIP, CONFLICT_UPDATE):
+            raise Exception(f"Unknown conflict policy '{on_conflict}'.")
+        self.database_name = database_name
+        self.batch_size = batch_size
+        self.on_conflict = on_conflict
+        self.dry_run = dry_run
+        self.max_reported_conflicts = max_reported_conflicts
+        self.connection = None
+        self.columns = {table_name: [name for name, _ in columns]
+                        for table_name, columns in sqlite3_database.BOOKCASE_SCHEMA["tables"].items()}
+        self.integer_columns = {table_name: {name for name, declared in columns if declared.startswith("INTEGER")}
+                                for table_name, columns in sqlite3_database.BOOKCASE_SCHEMA["tables"].items()}
+        # per item table: [(column, referenced table or None, list of references)] without ID
+        self.plans = {
+            table_name: [(column,) + FOREIGN_KEYS[table_name].get(column, (None, False))
+                         for column in self.columns[table_name] if column != "ID"]
+            for table_name in ITEM_TABLES
+        }
+        self.report = None
+        # library maps, loaded once
+        self.author_ids = {}        # (firstname, lastname) casefolded -> ID
+        self.company_ids = {}       # name casefolded -> ID
+        self.item_ids = {}          # table -> {normalized ISBN/EAN -> ID}
+        # export id -> library id, per referenced table
+        self.source_ids = {"AUTHOR": {}, "COMPANY": {}}
+        self._next_fake_id = -1     # dry run: ids of rows that would be created
+        self._pending = {}          # table -> ([insert rows], [update rows])
+        self._pending_count = 0
+        self._updated_ids = {}      # table -> IDs updated by this import
+
+    # ------------ setup ------------
+    def _open(self):
+        if self.dry_run:
+            if os.path.exists(self.database_name):
+                self.connection = sqlite_profiles.connect(self.database_name, "read-only-viewer")
+        else:
+            self.connection = sqlite_profiles.connect(self.database_name, "bulk-load")
+            sqlite3_database.bookcase_apply_schema(self.connection)
+        self._load_maps()
+
+    def _load_maps(self):
+        """Reads the AUTHOR, COMPANY and item keys of the library into dictionaries."""
+        if self.connection is None:
+            return
+        existing = {row[0] for row in self.connection.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+        if "AUTHOR" in existing:
+            for author_id, first, last in self.connection.execute("SELECT ID, FIRSTNAME, LASTNAME FROM AUTHOR"):
+                self.author_ids.setdefault(self._person_key(first, last), author_id)
+        if "COMPANY" in existing:
+            for company_id, name in self.connection.execute("SELECT ID, NAME FROM COMPANY"):
+                self.company_ids.setdefault((name or "").strip().casefold(), company_id)
+        for table_name, key_column in ITEM_KEYS.items():
+            keys = self.item_ids.setdefault(table_name, {})
+            if table_name in existing:
+                for item_id, value, title, person_id in self.connection.execute(
+                        f"SELECT ID, {key_column}, TITLE, {MAIN_REFERENCES[table_name]} FROM {table_name}"):
+                    key = self._item_key(value, title, person_id)
+                    if key:
+                        keys.setdefault(key, item_id)
+
+    @staticmethod
+    def _person_key(first, last):
+        return ((first or "").strip().casefold(), (last or "").strip().casefold())
+
+    @staticmethod
+    def _item_key(value, title, person_id):
+        """Normalized ISBN/EAN, or (title, main author ID) for items without one."""
+        if isinstance(value, str) and len(value) == 13 and value.isdigit():
+            return value
+        key = normalize_isbn(value) if value not in (None, "") else None
+        if key is None and title:
+            key = (str(title).strip().casefold(), person_id)
+        return key
+
+    # ------------ import ------------
+    def run(self, sources):
+        """
+        Imports a sequence of sources and returns the report:
+        {"tables": {table: {"inserted", "updated", "skipped"}}, "authors_created",
+         "companies_created", "conflicts": count, "conflict_samples": [...],
+         "unresolved": count, "unresolved_samples": [...], "seconds", "dry_run"}
+
+        :param sources: Iterables of (table, record), e.g. read_export(path).
+        """
+        start = time.perf_counter()
+        self.report = {
+            "tables": {table_name: {"inserted": 0, "updated": 0, "skipped": 0} for table_name in ITEM_TABLES},
+            "authors_created": 0, "companies_created": 0,
+            "conflicts": 0, "conflict_samples": [],
+            "unresolved": 0, "unresolved_samples": [],
+            "dry_run": self.dry_run,
+        }
+        self._open()
+        try:
+            for source in sources:
+                for table_name, record in source:
+                    if table_name == "AUTHOR":
+                        self._import_author(record)
+                    elif table_name == "COMPANY":
+                        self._import_company(record)
+                    else:
+                        self._import_item(table_name, record)
+                    if self._pending_count >= self.batch_size:
+                        self._flush()
+            self._flush()
+        except BaseException:
+            if self.connection is not None and self.connection.in_transaction:
+                self.connection.rollback()
+            raise
+        finally:
+            if self.connection is not None:
+                self.connection.close()
+                self.connection = None
+        self.report["seconds"] = time.perf_counter() - start
+        return self.report
+
+    def _new_id(self, sql, params):
+        """Inserts an AUTHOR/COMPANY row (or pretends to, in dry-run mode) and returns its ID."""
+        if self.dry_run:
+            self._next_fake_id -= 1
+            return self._next_fake_id
+        return self.connection.execute(sql, params).lastrowid
+
+    def _import_author(self, record):
+        first, last = record.get("FIRSTNAME"), record.get("LASTNAME")
+        author_id = self._author_id(first, last)
+        if record.get("ID") not in (None, ""):
+            self.source_ids["AUTHOR"][str(record["ID"])] = author_id
+
+    def _author_id(self, first, last):
+        key = self._person_key(first, last)
+        if key not in self.author_ids:
+            self.author_ids[key] = self._new_id(
+                "INSERT INTO AUTHOR (FIRSTNAME, LASTNAME) VALUES (?, ?)", (first or None, last or None)
+            )
+            self.report["authors_created"] += 1
+            self._pending_count += 1
+        return self.author_ids[key]
+
+    def _import_company(self, record):
+        company_id = self._company_id(record.get("NAME"))
+        if record.get("ID") not in (None, ""):
+            self.source_ids["COMPANY"][str(record["ID"])] = company_id
+
+    def _company_id(self, name):
+        key = (name or "").strip().casefold()
+        if key not in self.company_ids:
+            self.company_ids[key] = self._new_id("INSERT INTO COMPANY (NAME) VALUES (?)", ((name or "").strip() or None,))
+            self.report["companies_created"] += 1
+            self._pending_count += 1
+        return self.company_ids[key]
+
+    def _resolve_reference(self, table_name, column, referenced_table, value):
+        """
+        One reference -> library ID: export ids are looked up in source_ids,
+        names ("J.R.R. Tolkien", "Nintendo") are looked up or created.
+        """
+        if value in (None, ""):
+            return None
+        text = str(value).strip()
+        if text.isdigit():
+            library_id = self.source_ids[referenced_table].get(text)
+            if library_id is None:
+                self._report_sample("unresolved", f"{table_name}.{column}: {referenced_table} id {text} not in the export")
+            return library_id
+        if referenced_table == "AUTHOR":
+            return self._author_id(*split_person_name(text))
+        return self._company_id(text)
+
+    def _resolve_references(self, table_name, column, referenced_table, value):
+        """A list of references (JSON list or ';' separated names) -> JSON list of library IDs."""
+        if value in (None, ""):
+            return None
+        if isinstance(value, str) and value.strip().startswith("["):
+            values = json.loads(value)
+        else:
+            values = [part for part in str(value).split(";") if part.strip()]
+        ids = [self._resolve_reference(table_name, column, referenced_table, item) for item in values]
+        return json.dumps([library_id for library_id in ids if library_id is not None])
+
+    def _convert(self, table_name, column, value):
+        """Values from text exports -> the column type ('' -> NULL, 'true' -> 1, '440' -> 440)."""
+        if not isinstance(value, str):
+            return value
+        value = value.strip()
+        if value == "":
+            return None
+        if column in self.integer_columns[table_name]:
+            if value.lower() in _TRUE:
+                return 1
+            if value.lower() in _FALSE:
+                return 0
+            try:
+                return int(value)
+            except ValueError:
+                return value
+        return value
+
+    def _import_item(self, table_name, record):
+        values = []
+        main_reference = None
+        for column, referenced_table, is_list in self.plans[table_name]:
+            value = record.get(column)
+            if value is None or value == "[]":
+                pass
+            elif is_list:
+                value = self._resolve_references(table_name, column, referenced_table, value)
+            elif referenced_table:
+                value = main_reference = self._resolve_reference(table_name, column, referenced_table, value)
+            elif isinstance(value, str):
+                value = self._convert(table_name, column, value)
+            values.append(value)
+
+        counts = self.report["tables"][table_name]
+        title = record.get("TITLE")
+        key = self._item_key(record.get(ITEM_KEYS[table_name]), title, main_reference)
+        keys = self.item_ids.setdefault(table_name, {})
+        inserts, updates = self._pending.setdefault(table_name, ([], []))
+        described = f"{table_name} {ITEM_KEYS[table_name]} {key}" if isinstance(key, str) else table_name
+        if key and (keys.get(key) == 0 or keys.get(key) in self._updated_ids.get(table_name, ())):
+            self._report_sample("conflicts", f"{described} ('{title or ''}') appears twice in the export")
+            counts["skipped"] += 1
+            return
+        if key and key in keys:
+            existing_id = keys[key]
+            self._report_sample("conflicts", f"{described} ('{title or ''}') already in the library (ID {existing_id})")
+            if self.on_conflict == CONFLICT_UPDATE:
+                self._updated_ids.setdefault(table_name, set()).add(existing_id)
+                updates.append(values + [existing_id])
+                counts["updated"] += 1
+            else:
+                counts["skipped"] += 1
+                return
+        else:
+            inserts.append(values)
+            counts["inserted"] += 1
+            if key:
+                # 0 = inserted by this import (see the check above)
+                keys[key] = 0
+        self._pending_count += 1
+
+    def _report_sample(self, kind, message):
+        self.report[kind] += 1
+        samples = self.report[_SAMPLES[kind]]
+        if len(samples) < self.max_reported_conflicts:
+            samples.append(message)
+
+    def _flush(self):
+        """Writes the pending items and commits (one transaction per batch)."""
+        if not self.dry_run:
+            for table_name, (inserts, updates) in self._pending.items():
+                columns = [column for column in self.columns[table_name] if column != "ID"]
+                if inserts:
+                    self.connection.executemany(
+                        f"INSERT INTO {table_name} ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})",
+                        inserts
+                    )
+                if updates:
+                    self.connection.executemany(
+                        f"UPDATE {table_name} SET {', '.join(f'{column} = ?' for column in columns)} WHERE ID = ?",
+                        updates
+                    )
+            self.connection.commit()
+        self._pending = {}
+        self._pending_count = 0
+
+
+def print_report(report):
+    mode = "Dry run - nothing was written. " if report["dry_run"] else ""
+    print(f"{mode}Import took {report['seconds']:.2f} s.")
+    for table_name, counts in report["tables"].items():
+        if any(counts.values()):
+            print(f"  {table_name:12} inserted {counts['inserted']}, updated {counts['updated']}, "
+                  f"skipped {counts['skipped']}")
+    print(f"  authors created {report['authors_created']}, companies created {report['companies_created']}")
+    for kind, samples in _SAMPLES.items():
+        if report[kind]:
+            print(f"  {kind}: {report[kind]}")
+            for message in report[samples][:50]:
+                print(f"    {message}")
+
+
+if __name__ == "__main__":
+    # Usage: python mylibrary_import.py library.db export.db|export.xml|AUTHOR.csv BOOK.csv ... [--dry-run]
+    parser = argparse.ArgumentParser(description='Imports "My Library" exports (SQLite, CSV, XML).')
+    parser.add_argument("database", help="library file to import into")
+    parser.add_argument("sources", nargs="+", help="export files; CSV files are named after their table")
+    parser.add_argument("--dry-run", action="store_true", help="only report what would be imported")
+    parser.add_argument("--update", action="store_true", help="update items already in the library")
+    parser.add_argument("--batch-size", type=int, default=10000)
+    args = parser.parse_args()
+
+    # AUTHOR/COMPANY files first - the items refer to them
+    paths = sorted(args.sources, key=lambda path: os.path.basename(path).split(".")[0].upper() not in PEOPLE_TABLES)
+    importer = MyLibraryImporter(args.database, batch_size=args.batch_size,
+                                 on_conflict=CONFLICT_UPDATE if args.update else CONFLICT_SKIP,
+                                 dry_run=args.dry_run)
+    try:
+        print_report(importer.run(read_export(path) for path in paths))
+    except sqlite3.Error as error:
+        print(f"Import failed, the last batch was rolled back: {error}")
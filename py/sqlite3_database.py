@@ -1,7 +1,9 @@
 import sqlite3
 
+import sqlite_profiles
+
 def sqlite3_test_connect(database_name):
-    sqliteConnection = sqlite3.connect(database_name)
+    sqliteConnection = sqlite_profiles.connect(database_name, "read-only-viewer")
     cursor = sqliteConnection.cursor()
     print("Database created and Successfully Connected to SQLite")
 
@@ -10,256 +12,282 @@ def sqlite3_test_connect(database_name):
     record = cursor.fetchall()
     print("SQLite Database Version is: ", record)
     #cursor.close()
+    sqliteConnection.close()
 
 # sprawdzanie czy sa odpowiednie tablice ...
 # obowiązkowe: author, book, company
 # uzupełniające: comoc, ebook, movie, video_game
 
 def bookcase_test_database_structure(database_name):
-  sqliteConnection = sqlite3.connect(database_name)
+  sqliteConnection = sqlite_profiles.connect(database_name, "read-only-viewer")
   sql_query = """SELECT name FROM sqlite_master 
     WHERE type='table';"""
   cursor = sqliteConnection.cursor()
   cursor.execute(sql_query)
   print("List of tables\n")
   print(cursor.fetchall())
+  sqliteConnection.close()
 
 
 def bookcase_test_table_structure(database_name,table_name_for_test):
-  sqliteConnection = sqlite3.connect(database_name)
+  sqliteConnection = sqlite_profiles.connect(database_name, "read-only-viewer")
   sql_query = "PRAGMA table_info ("+str(table_name_for_test)+");"
   print(sql_query)
   cursor = sqliteConnection.cursor()
   cursor.execute(str(sql_query))
   print("Tables ",table_name_for_test," structure:\n")
   print(cursor.fetchall())
+  sqliteConnection.close()
 
 
-def bookcase_test_table_AUTHOR_structure(database_name):
-  sqliteConnection = sqlite3.connect(database_name)
-  sql_query = "PRAGMA table_info (AUTHOR);"
-  cursor = sqliteConnection.cursor()
-  cursor.execute(sql_query)
-#  print(sql_query)
-  print("Tables AUTHOR structure:\n")
-  print(cursor.fetchall())
+# Deklaratywny opis schematu biblioteczki: tabele (kolumny z typami),
+# indeksy i wyzwalacze. Na jego podstawie bookcase_create_database tworzy
+# nowy plik, a bookcase_schema_diff porównuje z nim istniejącą bazę.
+# EBOOK nie ma jeszcze ustalonej struktury, więc nie jest tworzona.
+_ITEM_COLUMNS = [
+  ("ID", "INTEGER PRIMARY KEY AUTOINCREMENT"),
+  ("ADDITIONAL_AUTHORS", "TEXT"),
+  ("AMAZON_URL", "TEXT"),
+  ("AUTHOR", "INTEGER"),
+  ("CATEGORIES", "TEXT"),
+  ("COMMENTS", "TEXT"),
+  ("COVER_PATH", "TEXT"),
+  ("FNAC_URL", "TEXT"),
+  ("TITLE", "TEXT"),
+  ("ISBN", "TEXT"),
+  ("PAGES", "INTEGER"),
+  ("PUBLISHED_DATE", "TEXT"),
+  ("PUBLISHER", "TEXT"),
+  ("SUMMARY", "TEXT"),
+  ("READING_DATES", "TEXT"),
+  ("SERIES", "TEXT"),
+  ("READ", "INTEGER"),
+  ("IN_WISHLIST", "INTEGER"),
+]
 
-def bookcase_test_table_BOOK_structure(database_name):
-  sqliteConnection = sqlite3.connect(database_name)
-  sql_query = "PRAGMA table_info (BOOK);"
-  cursor = sqliteConnection.cursor()
-  cursor.execute(sql_query)
-#  print(sql_query)
-  print("Tables BOOK structure:\n")
-  print(cursor.fetchall())
+BOOKCASE_SCHEMA = {
+  "tables": {
+    "AUTHOR": [
+      ("ID", "INTEGER PRIMARY KEY AUTOINCREMENT"),
+      ("FIRSTNAME", "TEXT"),
+      ("LASTNAME", "TEXT"),
+    ],
+    "BOOK": _ITEM_COLUMNS,
+    "COMIC": _ITEM_COLUMNS,
+    "COMPANY": [
+      ("ID", "INTEGER PRIMARY KEY AUTOINCREMENT"),
+      ("NAME", "TEXT"),
+    ],
+    "MOVIE": [
+      ("ID", "INTEGER PRIMARY KEY AUTOINCREMENT"),
+      ("ADDITIONAL_DIRECTORS", "TEXT"),
+      ("AMAZON_URL", "TEXT"),
+      ("CATEGORIES", "TEXT"),
+      ("COMMENTS", "TEXT"),
+      ("COVER_PATH", "TEXT"),
+      ("DIRECTOR", "INTEGER"),
+      ("EAN", "TEXT"),
+      ("FORMAT", "TEXT"),
+      ("IN_WISHLIST", "INTEGER"),
+      ("PRODUCTION_COMPANY", "TEXT"),
+      ("PUBLISHED_DATE", "TEXT"),
+      ("SEEN", "INTEGER"),
+      ("SERIES", "TEXT"),
+      ("SUMMARY", "TEXT"),
+      ("TITLE", "TEXT"),
+      ("VIEWING_DATES", "TEXT"),
+    ],
+    "VIDEO_GAME": [
+      ("ID", "INTEGER PRIMARY KEY AUTOINCREMENT"),
+      ("ADDITIONAL_DEVELOPERS", "TEXT"),
+      ("AMAZON_URL", "TEXT"),
+      ("CATEGORIES", "TEXT"),
+      ("COMMENTS", "TEXT"),
+      ("COVER_PATH", "TEXT"),
+      ("DEVELOPER", "INTEGER"),
+      ("EAN", "TEXT"),
+      ("TITLE", "TEXT"),
+      ("PLATFORM", "TEXT"),
+      ("SUMMARY", "TEXT"),
+      ("PLAYED_DATES", "TEXT"),
+      ("PUBLISHED_DATE", "TEXT"),
+      ("PUBLISHER", "TEXT"),
+      ("SERIES", "TEXT"),
+      ("PLAYED", "INTEGER"),
+      ("IN_WISHLIST", "INTEGER"),
+    ],
+    # wersje schematu nadane przez BOOKCASE_MIGRATIONS
+    "SCHEMA_MIGRATIONS": [
+      ("VERSION", "INTEGER PRIMARY KEY"),
+      ("DESCRIPTION", "TEXT"),
+      ("APPLIED_AT", "TEXT"),
+    ],
+  },
+  # nazwa -> pełne polecenie CREATE (bez IF NOT EXISTS, tak jak zapisuje je sqlite_master)
+  "indexes": {
+    "AUTHOR_NAME_IDX": "CREATE INDEX AUTHOR_NAME_IDX ON AUTHOR (LASTNAME, FIRSTNAME)",
+    "BOOK_AUTHOR_IDX": "CREATE INDEX BOOK_AUTHOR_IDX ON BOOK (AUTHOR)",
+    "BOOK_ISBN_IDX": "CREATE INDEX BOOK_ISBN_IDX ON BOOK (ISBN)",
+    "COMIC_AUTHOR_IDX": "CREATE INDEX COMIC_AUTHOR_IDX ON COMIC (AUTHOR)",
+    "COMIC_ISBN_IDX": "CREATE INDEX COMIC_ISBN_IDX ON COMIC (ISBN)",
+    "COMPANY_NAME_IDX": "CREATE INDEX COMPANY_NAME_IDX ON COMPANY (NAME)",
+  },
+  "triggers": {},
+}
 
-def bookcase_test_table_COMIC_structure(database_name):
-  sqliteConnection = sqlite3.connect(database_name)
-  sql_query = "PRAGMA table_info (COMIC);"
-  cursor = sqliteConnection.cursor()
-  cursor.execute(sql_query)
-#  print(sql_query)
-  print("Tables COMIC structure:\n")
-  print(cursor.fetchall())
+# Migracje: (wersja, opis, funkcja(connection)) dla zmian, których nie da się
+# opisać w BOOKCASE_SCHEMA (przekształcenia danych itp.). Nowe kolumny, tabele,
+# indeksy i wyzwalacze wystarczy dopisać do BOOKCASE_SCHEMA.
+# Wersja jest zapisywana w tabeli SCHEMA_MIGRATIONS, a nie w PRAGMA user_version,
+# bo user_version pliku z aplikacji na Androida należy do tej aplikacji.
+BOOKCASE_MIGRATIONS = []
 
-def bookcase_test_table_COMPANY_structure(database_name):
-  sqliteConnection = sqlite3.connect(database_name)
-  sql_query = "PRAGMA table_info (COMPANY);"
-  cursor = sqliteConnection.cursor()
-  cursor.execute(sql_query)
-#  print(sql_query)
-  print("Tables COMPANY structure:\n")
-  print(cursor.fetchall())
 
-def bookcase_test_table_EBOOK_structure(database_name):
-  sqliteConnection = sqlite3.connect(database_name)
-  sql_query = "PRAGMA table_info (EBOOK);"
-  cursor = sqliteConnection.cursor()
-  cursor.execute(sql_query)
-#  print(sql_query)
-  print("Tables EBOOK structure:\n")
-  print(cursor.fetchall())
+def _normalize_sql(sql):
+  return " ".join((sql or "").replace("(", " ( ").replace(")", " ) ").replace(",", " , ").split()).upper()
 
-def bookcase_test_table_MOVIE_structure(database_name):
-  sqliteConnection = sqlite3.connect(database_name)
-  sql_query = "PRAGMA table_info (MOVIE);"
-  cursor = sqliteConnection.cursor()
-  cursor.execute(sql_query)
-#  print(sql_query)
-  print("Tables MOVIE structure:\n")
-  print(cursor.fetchall())
 
-def bookcase_test_table_VIDEO_GAME_structure(database_name):
-  sqliteConnection = sqlite3.connect(database_name)
-  sql_query = "PRAGMA table_info (VIDEO_GAME);"
-  cursor = sqliteConnection.cursor()
-  cursor.execute(sql_query)
-#  print(sql_query)
-  print("Tables VIDEO_GAME structure:\n")
-  print(cursor.fetchall())
+def bookcase_table_sql(table_name, schema=None):
+  """
+  Returns the CREATE TABLE statement of a table declared in the schema
+  (BOOKCASE_SCHEMA by default).
+  """
+  columns = (schema or BOOKCASE_SCHEMA)["tables"][table_name]
+  return f"CREATE TABLE {table_name} ( " + ", ".join(f"{name} {declaration}" for name, declaration in columns) + " )"
 
-#def bookcase_test_table_XXXXX_structure(database_name):
-#  sqliteConnection = sqlite3.connect(database_name)
-#  sql_query = "PRAGMA table_info (XXXXX);"
-#  cursor = sqliteConnection.cursor()
-#  cursor.execute(sql_query)
-##  print(sql_query)
-#  print("Tables XXXXX structure:\n")
-#  print(cursor.fetchall())
 
+def bookcase_schema_diff(connection, schema=None):
+  """
+  Compares an open database with the declared schema (BOOKCASE_SCHEMA by
+  default), reading sqlite_master (with the columns of every table) once.
 
-def bookcase_create_AUTHOR_table(database_name):
-  sqliteConnection = sqlite3.connect(database_name)
-  sql_query = """ CREATE TABLE AUTHOR ( ID INTEGER PRIMARY KEY AUTOINCREMENT , FIRSTNAME TEXT, LASTNAME TEXT );"""
-  cursor = sqliteConnection.cursor()
-  cursor.execute(sql_query)
-  print("Created table\n")
-  print(cursor.fetchall())
+  Returns a dict:
+    missing_tables   - [table name]
+    missing_columns  - {table name: [(column, declaration)]}
+    missing_indexes  - [index name]
+    changed_indexes  - [index name] (different definition)
+    missing_triggers - [trigger name]
+    changed_triggers - [trigger name]
+    extra_tables     - [table name] not declared (never removed)
+  """
+  schema = schema or BOOKCASE_SCHEMA
+  rows = connection.execute("""
+    SELECT m.type, m.name, m.sql, c.name
+    FROM sqlite_master AS m
+    LEFT JOIN pragma_table_info(m.name) AS c ON m.type = 'table'
+    WHERE m.name NOT LIKE 'sqlite_%'
+  """).fetchall()
 
-def bookcase_create_BOOK_table(database_name):
-  sqliteConnection = sqlite3.connect(database_name)
-  sql_query = """CREATE TABLE BOOK ( ID INTEGER PRIMARY KEY AUTOINCREMENT , 
-                                      ADDITIONAL_AUTHORS TEXT, 
-                                      AMAZON_URL TEXT, 
-                                      AUTHOR INTEGER, 
-                                      CATEGORIES TEXT, 
-                                      COMMENTS TEXT, 
-                                      COVER_PATH TEXT, 
-                                      FNAC_URL TEXT, 
-                                      TITLE TEXT, 
-                                      ISBN TEXT, 
-                                      PAGES INTEGER, 
-                                      PUBLISHED_DATE TEXT, 
-                                      PUBLISHER TEXT, 
-                                      SUMMARY TEXT, 
-                                      READING_DATES TEXT, 
-                                      SERIES TEXT, 
-                                      READ INTEGER, 
-                                      IN_WISHLIST INTEGER );"""
-  cursor = sqliteConnection.cursor()
-  cursor.execute(sql_query)
-  print("Table ""BOOK"" created\n")
-  print(cursor.fetchall())
+  existing = {"table": {}, "index": {}, "trigger": {}}
+  columns = {}
+  for object_type, name, sql, column in rows:
+    if object_type in existing:
+      existing[object_type][name] = sql
+    if object_type == "table" and column is not None:
+      columns.setdefault(name, set()).add(column.upper())
 
-def bookcase_create_COMIC_table(database_name):
-  sqliteConnection = sqlite3.connect(database_name)
-  sql_query = """ CREATE TABLE COMIC ( ID INTEGER PRIMARY KEY AUTOINCREMENT , 
-                                      ADDITIONAL_AUTHORS TEXT, 
-                                      AMAZON_URL TEXT, 
-                                      AUTHOR INTEGER, 
-                                      CATEGORIES TEXT, 
-                                      COMMENTS TEXT, 
-                                      COVER_PATH TEXT, 
-                                      FNAC_URL TEXT, 
-                                      TITLE TEXT, 
-                                      ISBN TEXT, 
-                                      PAGES INTEGER, 
-                                      PUBLISHED_DATE TEXT, 
-                                      PUBLISHER TEXT, 
-                                      SUMMARY TEXT, 
-                                      READING_DATES TEXT, 
-                                      SERIES TEXT, 
-                                      READ INTEGER, 
-                                      IN_WISHLIST INTEGER );"""
-  cursor = sqliteConnection.cursor()
-  cursor.execute(sql_query)
-  print("Table ""COMIC"" created\n")
-  print(cursor.fetchall())
+  diff = {
+    "missing_tables": [],
+    "missing_columns": {},
+    "missing_indexes": [],
+    "changed_indexes": [],
+    "missing_triggers": [],
+    "changed_triggers": [],
+    "extra_tables": [name for name in existing["table"] if name not in schema["tables"]],
+  }
+  for table_name, declared_columns in schema["tables"].items():
+    if table_name not in existing["table"]:
+      diff["missing_tables"].append(table_name)
+      continue
+    missing = [(name, declaration) for name, declaration in declared_columns
+               if name.upper() not in columns.get(table_name, set())]
+    if missing:
+      diff["missing_columns"][table_name] = missing
 
-def bookcase_create_COMPANY_table(database_name):
-  sqliteConnection = sqlite3.connect(database_name)
-  sql_query = """ CREATE TABLE COMPANY ( ID INTEGER PRIMARY KEY AUTOINCREMENT , NAME TEXT );"""
-  cursor = sqliteConnection.cursor()
-  cursor.execute(sql_query)
-  print("Table ""COMPANY"" created\n")
-  print(cursor.fetchall())
+  for kind, key in (("indexes", "index"), ("triggers", "trigger")):
+    for name, sql in schema[kind].items():
+      if name not in existing[key]:
+        diff[f"missing_{kind}"].append(name)
+      elif _normalize_sql(existing[key][name]) != _normalize_sql(sql):
+        diff[f"changed_{kind}"].append(name)
+  return diff
 
-def bookcase_create_EBOOK_table(database_name):
-  sqliteConnection = sqlite3.connect(database_name)
-  sql_query = """ ;"""
-  cursor = sqliteConnection.cursor()
-  cursor.execute(sql_query)
-  print("Table ""EBOOK"" created\n")
-  print(cursor.fetchall())
 
-def bookcase_create_MOVIE_table(database_name):
-  sqliteConnection = sqlite3.connect(database_name)
-  sql_query = """ CREATE TABLE MOVIE ( ID INTEGER PRIMARY KEY AUTOINCREMENT , 
-                                        ADDITIONAL_DIRECTORS TEXT, 
-                                        AMAZON_URL TEXT, 
-                                        CATEGORIES TEXT, 
-                                        COMMENTS TEXT, 
-                                        COVER_PATH TEXT, 
-                                        DIRECTOR INTEGER, 
-                                        EAN TEXT, 
-                                        FORMAT TEXT, 
-                                        IN_WISHLIST INTEGER, 
-                                        PRODUCTION_COMPANY TEXT, 
-                                        PUBLISHED_DATE TEXT, 
-                                        SEEN INTEGER, 
-                                        SERIES TEXT, 
-                                        SUMMARY TEXT, 
-                                        TITLE TEXT, 
-                                        VIEWING_DATES TEXT );"""
-  cursor = sqliteConnection.cursor()
-  cursor.execute(sql_query)
-  print("Table ""MOVIE"" created\n")
-  print(cursor.fetchall())
+def bookcase_schema_version(connection):
+  """Version of the last migration applied to the database (0 if none)."""
+  try:
+    return connection.execute("SELECT MAX(VERSION) FROM SCHEMA_MIGRATIONS").fetchone()[0] or 0
+  except sqlite3.OperationalError:
+    return 0
+
+
+def bookcase_apply_schema(connection, schema=None, migrations=None):
+  """
+  Brings an open database to the declared schema in one transaction:
+  creates the missing tables, columns (ALTER TABLE ADD COLUMN), indexes
+  and triggers, recreates the changed indexes and triggers, then runs the
+  migrations newer than the stored version. Returns the diff that was applied.
+
+  Nothing is dropped: tables and columns not in the schema are kept.
+  """
+  schema = schema or BOOKCASE_SCHEMA
+  migrations = BOOKCASE_MIGRATIONS if migrations is None else migrations
+  new_database = False
+  connection.execute("BEGIN IMMEDIATE")
+  try:
+    diff = bookcase_schema_diff(connection, schema)
+    new_database = len(diff["missing_tables"]) == len(schema["tables"])
+
+    for table_name in diff["missing_tables"]:
+      connection.execute(bookcase_table_sql(table_name, schema))
+    for table_name, missing in diff["missing_columns"].items():
+      for name, declaration in missing:
+        if "PRIMARY KEY" in declaration.upper() or "UNIQUE" in declaration.upper():
+          raise Exception(f"Column {table_name}.{name} ({declaration}) cannot be added to an existing table.")
+        connection.execute(f"ALTER TABLE {table_name} ADD COLUMN {name} {declaration}")
+    for kind, drop in (("indexes", "DROP INDEX"), ("triggers", "DROP TRIGGER")):
+      for name in diff[f"changed_{kind}"]:
+        connection.execute(f"{drop} {name}")
+      for name in diff[f"missing_{kind}"] + diff[f"changed_{kind}"]:
+        connection.execute(schema[kind][name])
+
+    # nowy plik ma od razu najnowszą strukturę - migracje tylko się zapisuje
+    version = bookcase_schema_version(connection)
+    for migration_version, description, migrate in sorted(migrations, key=lambda migration: migration[0]):
+      if migration_version <= version:
+        continue
+      if not new_database:
+        migrate(connection)
+      connection.execute(
+        "INSERT INTO SCHEMA_MIGRATIONS (VERSION, DESCRIPTION, APPLIED_AT) VALUES (?, ?, datetime('now'))",
+        (migration_version, description)
+      )
+    connection.commit()
+  except BaseException:
+    connection.rollback()
+    raise
+  return diff
+
+
+def bookcase_create_database(database_name):
+  """
+  Creates (or updates) a library file: every declared table, index and
+  trigger and the migrations, in a single connection and transaction.
+  Returns the applied diff (see bookcase_schema_diff).
+  """
+  sqliteConnection = sqlite_profiles.connect(database_name, "interactive")
+  try:
+    return bookcase_apply_schema(sqliteConnection)
+  finally:
+    sqliteConnection.close()
 
-def bookcase_create_VIDEO_GAME_table(database_name):
-  sqliteConnection = sqlite3.connect(database_name)
-  sql_query = """ CREATE TABLE VIDEO_GAME ( ID INTEGER PRIMARY KEY AUTOINCREMENT , 
-                                            ADDITIONAL_DEVELOPERS TEXT, 
-                                            AMAZON_URL TEXT, 
-                                            CATEGORIES TEXT, 
-                                            COMMENTS TEXT, 
-                                            COVER_PATH TEXT, 
-                                            DEVELOPER INTEGER, 
-                                            EAN TEXT, 
-                                            TITLE TEXT, 
-                                            PLATFORM TEXT, 
-                                            SUMMARY TEXT, 
-                                            PLAYED_DATES TEXT, 
-                                            PUBLISHED_DATE TEXT, 
-                                            PUBLISHER TEXT, 
-                                            SERIES TEXT, 
-                                            PLAYED INTEGER, 
-                                            IN_WISHLIST INTEGER );"""
-  cursor = sqliteConnection.cursor()
-  cursor.execute(sql_query)
-  print("Table ""VIDEO_GAME"" created\n")
-  print(cursor.fetchall())
 
-#def bookcase_create_XXXXX_table(database_name):
-#  sqliteConnection = sqlite3.connect(database_name)
-#  sql_query = """ CREATE TABLE XXXXX ( // polecenie tworzace tabele tutaj // );"""
-#  cursor = sqliteConnection.cursor()
-#  cursor.execute(sql_query)
-#  print("Created table\n")
-#  print(cursor.fetchall())
-
-
-# tymczasowo dla testów
-sqlite3_test_connect('mylibrary.db')
-#bookcase_test_database_structure('mylibrary.db')
-#bookcase_test_table_AUTHOR_structure('mylibrary.db')
-#bookcase_test_table_BOOK_structure('mylibrary.db')
-#bookcase_test_table_COMIC_structure('mylibrary.db')
-#bookcase_test_table_COMPANY_structure('mylibrary.db')
-#bookcase_test_table_EBOOK_structure('mylibrary.db')
-#bookcase_test_table_MOVIE_structure('mylibrary.db')
-#bookcase_test_table_VIDEO_GAME_structure('mylibrary.db')
-#bookcase_test_table_XXXXX_structure('mylibrary.db')
-bookcase_test_table_structure('mylibrary.db','AUTHOR')
-bookcase_test_table_structure('mylibrary.db','BOOK')
-bookcase_test_table_structure('mylibrary.db','COMIC')
-bookcase_test_table_structure('mylibrary.db','COMPANY')
-bookcase_test_table_structure('mylibrary.db','AUTHOR')
-#bookcase_create_AUTHOR_table('mylibrary_test.db')
-#bookcase_create_BOOK_table('mylibrary_test.db')
-#bookcase_create_COMIC_table('mylibrary_test.db')
-#bookcase_create_COMPANY_table('mylibrary_test.db')
-#bookcase_create_EBOOK_table('mylibrary_test.db')
-#bookcase_create_MOVIE_table('mylibrary_test.db')
-#bookcase_create_VIDEO_GAME_table('mylibrary_test.db')
-##bookcase_create_XXXXX_table('mylibrary_test.db')
+# tymczasowo dla testów (tylko przy uruchomieniu skryptu, nie przy imporcie)
+if __name__ == "__main__":
+  sqlite3_test_connect('mylibrary.db')
+  #bookcase_test_database_structure('mylibrary.db')
+  bookcase_test_table_structure('mylibrary.db','AUTHOR')
+  bookcase_test_table_structure('mylibrary.db','BOOK')
+  bookcase_test_table_structure('mylibrary.db','COMIC')
+  bookcase_test_table_structure('mylibrary.db','COMPANY')
+  #print(bookcase_create_database('mylibrary_test.db'))
@@ -0,0 +1,259 @@
+import atexit
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import deque
+
+# Query-level instrumentation for the bookcase programs.
+# Lives only in py/; the programs in the other folders add py/ to sys.path to import it.
+#
+# When enabled, sqlite_profiles.connect() opens InstrumentedConnection objects,
+# which time every statement and count the rows fetched from it. Statements are
+# aggregated by their text (whitespace and "IN (?, ?, ...)" lists normalized),
+# statements slower than the threshold are kept in a slow-query log, optionally
+# with their EXPLAIN QUERY PLAN.
+#
+# Enable from code with enable(), or for any program with the environment
+# variable BOOKCASE_SQL_TRACE=<slow threshold in ms>; in that case a report is
+# printed when the program exits.
+
+_IN_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_statement(sql):
+    """Statement text used as the aggregation key."""
+    return _IN_LIST.sub("(?, ...)", _WHITESPACE.sub(" ", sql).strip())
+
+
+def params_shape(params, many=False):
+    """
+    Describes the parameters without their values, e.g. "tuple[3]",
+    "dict[id, title]", or "many" for executemany.
+    """
+    if many:
+        return "many"
+    if params is None:
+        return "none"
+    if isinstance(params, dict):
+        return f"dict[{', '.join(sorted(params))}]"
+    return f"{type(params).__name__}[{len(params)}]"
+
+
+class Instrumentation:
+    """
+    Collects statement statistics and the slow-query log. Thread-safe;
+    one instance is shared by all instrumented connections.
+    """
+    def __init__(self, slow_threshold_ms=100.0, explain_slow=True, slow_log_size=200, log_path=None):
+        """
+        :param slow_threshold_ms: Statements taking longer than this are logged as slow.
+        :param explain_slow: Capture EXPLAIN QUERY PLAN of slow SELECT statements.
+        :param slow_log_size: Number of slow statements kept in memory.
+        :param log_path: Optional JSON Lines file receiving every slow statement.
+        """
+        self.slow_threshold = slow_threshold_ms / 1000
+        self.explain_slow = explain_slow
+        self.log_path = log_path
+        self.slow_queries = deque(maxlen=slow_log_size)
+        self._statements = {}
+        self._lock = threading.Lock()
+
+    def record(self, sql, shape, duration, connection=None, params=None):
+        """
+        Adds one execution of `sql` and returns its statistics entry
+        (the cursor adds the fetched rows to it later).
+        """
+        key = normalize_statement(sql)
+        with self._lock:
+            entry = self._statements.get(key)
+            if entry is None:
+                entry = {"statement": key, "count": 0, "total_time": 0.0, "max_time": 0.0,
+                         "rows": 0, "slow": 0, "shapes": set()}
+                self._statements[key] = entry
+            entry["count"] += 1
+            entry["total_time"] += duration
+            entry["max_time"] = max(entry["max_time"], duration)
+            entry["shapes"].add(shape)
+            slow = duration >= self.slow_threshold
+            if slow:
+                entry["slow"] += 1
+
+        if slow:
+            self._log_slow(key, sql, shape, duration, connection, params)
+        return entry
+
+    def add_rows(self, entry, rows, duration):
+        """Adds rows fetched (and the time spent fetching them) to a statement."""
+        with self._lock:
+            entry["rows"] += rows
+            entry["total_time"] += duration
+
+    def _log_slow(self, statement, sql, shape, duration, connection, params):
+        record = {
+            "time": time.strftime("%Y-%m-%d %H:%M:%S"),
+            "statement": statement,
+            "params": shape,
+            "duration_ms": round(duration * 1000, 3),
+        }
+        if self.explain_slow and connection is not None and shape != "many" \
+                and statement.lstrip()[:6].upper() in ("SELECT", "WITH"):
+            record["plan"] = explain_query_plan(connection, sql, params)
+        with self._lock:
+            self.slow_queries.append(record)
+        if self.log_path:
+            with open(self.log_path, "a", encoding="utf-8") as log_file:
+                log_file.write(json.dumps(record) + "\n")
+
+    def stats(self):
+        """Returns the statement statistics, most expensive (total time) first."""
+        with self._lock:
+            entries = [dict(entry, shapes=sorted(entry["shapes"])) for entry in self._statements.values()]
+        return sorted(entries, key=lambda entry: entry["total_time"], reverse=True)
+
+    def reset(self):
+        with self._lock:
+            self._statements.clear()
+            self.slow_queries.clear()
+
+    def report(self, limit=20):
+        """Returns a text report of the `limit` most expensive statements and the slow ones."""
+        lines = [f"{'count':>8} {'total ms':>10} {'avg ms':>9} {'max ms':>9} {'rows':>9}  statement"]
+        for entry in self.stats()[:limit]:
+            lines.append(
+                f"{entry['count']:>8} {entry['total_time'] * 1000:>10.2f} "
+                f"{entry['total_time'] * 1000 / entry['count']:>9.3f} {entry['max_time'] * 1000:>9.3f} "
+                f"{entry['rows']:>9}  {entry['statement'][:120]}"
+            )
+        with self._lock:
+            slow_queries = list(self.slow_queries)
+        if slow_queries:
+            lines.append(f"\nSlow statements (>= {self.slow_threshold * 1000:g} ms):")
+            for record in slow_queries:
+                lines.append(f"  {record['duration_ms']:>9.3f} ms  {record['statement'][:120]}")
+                for step in record.get("plan", []):
+                    lines.append(f"      {step}")
+        return "\n".join(lines)
+
+
+def explain_query_plan(connection, sql, params=None):
+    """
+    Returns the EXPLAIN QUERY PLAN of a statement as a list of lines
+    ("SCAN books", "SEARCH books USING INTEGER PRIMARY KEY (rowid=?)", ...).
+    """
+    try:
+        # Plain cursor: the EXPLAIN itself is not instrumented
+        cursor = sqlite3.Cursor(connection)
+        rows = cursor.execute(f"EXPLAIN QUERY PLAN {sql}", params if params is not None else ()).fetchall()
+    except sqlite3.Error as error:
+        return [f"(no plan: {error})"]
+    return [row[-1] for row in rows]
+
+
+class InstrumentedCursor(sqlite3.Cursor):
+    """Cursor timing execute/executemany and counting the fetched rows."""
+    _entry = None
+
+    def execute(self, sql, parameters=()):
+        start = time.perf_counter()
+        try:
+            return super().execute(sql, parameters)
+        finally:
+            instrumentation = _active
+            if instrumentation is not None:
+                self._entry = instrumentation.record(sql, params_shape(parameters), time.perf_counter() - start,
+                                                     self.connection, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        start = time.perf_counter()
+        try:
+            return super().executemany(sql, seq_of_parameters)
+        finally:
+            instrumentation = _active
+            if instrumentation is not None:
+                self._entry = instrumentation.record(sql, params_shape(None, many=True),
+                                                     time.perf_counter() - start)
+
+    def _fetched(self, rows, start):
+        instrumentation = _active
+        if instrumentation is not None and self._entry is not None:
+            instrumentation.add_rows(self._entry, rows, time.perf_counter() - start)
+
+    def fetchone(self):
+        start = time.perf_counter()
+        row = super().fetchone()
+        self._fetched(0 if row is None else 1, start)
+        return row
+
+    def fetchmany(self, size=None):
+        start = time.perf_counter()
+        rows = super().fetchmany(self.arraysize if size is None else size)
+        self._fetched(len(rows), start)
+        return rows
+
+    def fetchall(self):
+        start = time.perf_counter()
+        rows = super().fetchall()
+        self._fetched(len(rows), start)
+        return rows
+
+    def __next__(self):
+        start = time.perf_counter()
+        row = super().__next__()
+        self._fetched(1, start)
+        return row
+
+
+class InstrumentedConnection(sqlite3.Connection):
+    """Connection whose cursors (including those of execute shortcuts) are instrumented."""
+    def cursor(self, factory=InstrumentedCursor):
+        return super().cursor(factory)
+
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self.cursor().executemany(sql, seq_of_parameters)
+
+
+_active = None
+
+
+def enable(slow_threshold_ms=100.0, explain_slow=True, slow_log_size=200, log_path=None):
+    """
+    Turns instrumentation on for connections opened from now on through
+    sqlite_profiles.connect(). Returns the Instrumentation collecting the data.
+    """
+    global _active
+    _active = Instrumentation(slow_threshold_ms, explain_slow, slow_log_size, log_path)
+    return _active
+
+
+def disable():
+    """Stops collecting (already instrumented connections keep working normally)."""
+    global _active
+    _active = None
+
+
+def get_instrumentation():
+    """Returns the active Instrumentation, or None when disabled."""
+    return _active
+
+
+def connection_factory():
+    """Connection class for sqlite3.connect(factory=...), None when disabled."""
+    return InstrumentedConnection if _active is not None else None
+
+
+def _print_report():
+    if _active is not None:
+        print("\n" + _active.report())
+
+
+if os.environ.get("BOOKCASE_SQL_TRACE"):
+    enable(slow_threshold_ms=float(os.environ["BOOKCASE_SQL_TRACE"]),
+           log_path=os.environ.get("BOOKCASE_SQL_TRACE_LOG"))
+    atexit.register(_print_report)
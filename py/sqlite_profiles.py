@@ -0,0 +1,110 @@
+import os
+import sqlite3
+import sqlite_instrumentation
+
+# Connection settings shared by every program opening the bookcase databases.
+# Lives only in py/; the programs in the other folders add py/ to sys.path to import it.
+#
+# The writing profiles switch the file to WAL, so readers (viewers) and one
+# writer (editor, importer) can work on it at the same time without "database
+# is locked" errors; busy_timeout makes a second writer wait instead of failing at once.
+PROFILES = {
+    # Editing from the GUI or CLI: durable at checkpoints, fast commits
+    "interactive": {
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",
+        "cache_size": -16000,             # KiB (negative value), i.e. ~16 MB
+        "mmap_size": 64 * 1024 * 1024,
+        "temp_store": "MEMORY",
+        "busy_timeout": 5000,             # ms
+    },
+    # Large imports: no fsync per commit, big cache. A crash may lose the
+    # last transactions (never corrupts the file in WAL mode).
+    "bulk-load": {
+        "journal_mode": "WAL",
+        "synchronous": "OFF",
+        "cache_size": -131072,
+        "mmap_size": 256 * 1024 * 1024,
+        "temp_store": "MEMORY",
+        "busy_timeout": 30000,
+    },
+    # Browsing only: large read cache, writes are refused. No journal_mode:
+    # changing it writes to the file, which a viewer must never do (the file
+    # may be read-only, or belong to another program).
+    "read-only-viewer": {
+        "synchronous": "NORMAL",
+        "cache_size": -32000,
+        "mmap_size": 256 * 1024 * 1024,
+        "temp_store": "MEMORY",
+        "busy_timeout": 5000,
+        "query_only": 1,
+    },
+}
+
+# Profile used when a program does not ask for one; can be changed with
+# the BOOKCASE_SQLITE_PROFILE environment variable.
+DEFAULT_PROFILE = os.environ.get("BOOKCASE_SQLITE_PROFILE", "interactive")
+
+
+def get_profile(profile=None):
+    """
+    Returns the settings of a named profile (DEFAULT_PROFILE if None).
+    """
+    name = profile or DEFAULT_PROFILE
+    if name not in PROFILES:
+        raise Exception(f"Unknown SQLite profile '{name}'. Known profiles: {', '.join(PROFILES)}.")
+    return PROFILES[name]
+
+
+def apply_profile(connection, profile=None):
+    """
+    Applies the PRAGMAs of a profile to an open connection.
+
+    journal_mode is only changed when it differs, so a profile can be
+    switched on a connection in use (e.g. "bulk-load" for the duration of
+    an import). SQLite refuses some of the PRAGMAs inside a transaction, so
+    the connection must not be in one: commit or roll back first.
+    Returns the connection.
+
+    :param connection: sqlite3 connection.
+    :param profile: Profile name (see PROFILES), DEFAULT_PROFILE if None.
+    """
+    settings = get_profile(profile)
+    if connection.in_transaction:
+        raise Exception("Cannot apply a SQLite profile inside a transaction - commit or roll back first.")
+    for pragma, value in settings.items():
+        if pragma == "journal_mode":
+            current = connection.execute("PRAGMA journal_mode").fetchone()[0]
+            if current.upper() == value.upper() or current.lower() == "memory":
+                continue
+            try:
+                connection.execute(f"PRAGMA journal_mode = {value}")
+            except sqlite3.OperationalError:
+                # e.g. a read-only file or directory - keep the current journal
+                pass
+            continue
+        connection.execute(f"PRAGMA {pragma} = {value}")
+    if "query_only" not in settings:
+        connection.execute("PRAGMA query_only = 0")
+    return connection
+
+
+def connect(database, profile=None, **kwargs):
+    """
+    sqlite3.connect() followed by apply_profile().
+
+    :param database: Path of the database file (or URI, with uri=True).
+    :param profile: Profile name (see PROFILES), DEFAULT_PROFILE if None.
+    :param kwargs: Passed on to sqlite3.connect.
+    """
+    kwargs.setdefault("timeout", get_profile(profile)["busy_timeout"] / 1000)
+    factory = sqlite_instrumentation.connection_factory()
+    if factory is not None:
+        # Query statistics / slow-query log (see sqlite_instrumentation)
+        kwargs.setdefault("factory", factory)
+    connection = sqlite3.connect(database, **kwargs)
+    try:
+        return apply_profile(connection, profile)
+    except sqlite3.Error:
+        connection.close()
+        raise
@@ -0,0 +1,91 @@
+import importlib.util
+import os
+import shutil
+import sqlite3
+import sys
+
+import pytest
+
+# The programs are plain script directories, not packages: make their modules importable
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# (py-db-viewer last: its gui_components would shadow the one of py/, see viewer_module)
+for directory in ("py-cli-db-edit", "py", "py-benchmarks", "py-db-viewer"):
+    path = os.path.join(ROOT, directory)
+    if path not in sys.path:
+        sys.path.append(path)
+
+import chatgpt_v1_connection_pool  # noqa: E402
+from chatgpt_v1_database import DatabaseManager  # noqa: E402
+
+
+@pytest.fixture(autouse=True)
+def close_pools():
+    """Every test starts with fresh connection pools (they are shared per file)."""
+    yield
+    chatgpt_v1_connection_pool.close_all_pools()
+
+
+@pytest.fixture
+def books_db(tmp_path):
+    """An empty DatabaseManager database in a temporary file."""
+    db = DatabaseManager()
+    db.create_database(str(tmp_path / "books.db"))
+    yield db
+    db.close()
+
+
+@pytest.fixture
+def legacy_library(tmp_path):
+    """Copy of py-cli-db-edit/library.db, created before any schema migration (user_version 0)."""
+    path = tmp_path / "library.db"
+    shutil.copy(os.path.join(ROOT, "py-cli-db-edit", "library.db"), path)
+    return str(path)
+
+
+def book(isbn_13, **fields):
+    """add_book / add_books_bulk arguments of a test book."""
+    values = dict(authors=["Ann Author"], title="Title", edition="1", language="EN", location="",
+                  publisher="Publisher", release_year="2000", isbn_13=isbn_13, pages="100",
+                  tags=["Fantasy"], description="", status="complete")
+    values.update(fields)
+    return values
+
+
+def viewer_module(name):
+    """Imports a module of py-db-viewer by path (names like gui_components also exist in py/)."""
+    return program_module("py-db-viewer", name, "viewer")
+
+
+def program_module(directory, name, prefix=None):
+    """Imports module `name` of the program folder `directory` by path, as <prefix>_<name>."""
+    module_name = f"{prefix or directory.replace('-', '_')}_{name}"
+    if module_name not in sys.modules:
+        spec = importlib.util.spec_from_file_location(module_name, os.path.join(ROOT, directory, f"{name}.py"))
+        module = importlib.util.module_from_spec(spec)
+        sys.modules[module_name] = module
+        spec.loader.exec_module(module)
+    return sys.modules[module_name]
+
+
+@pytest.fixture
+def numbers_db(tmp_path):
+    """SQLite file with a table `numbers` (n, word) of 1000 rows, for the viewer."""
+    path = str(tmp_path / "numbers.db")
+    with sqlite3.connect(path) as connection:
+        connection.execute("CREATE TABLE numbers (n INTEGER, word TEXT)")
+        connection.executemany("INSERT INTO numbers VALUES (?, ?)",
+                               [(n, f"word{n} item{n % 7}") for n in range(1000)])
+    return path
+
+
+@pytest.fixture
+def tk_root():
+    """A Tk root window; the test is skipped where no display is available."""
+    tkinter = pytest.importorskip("tkinter")
+    try:
+        root = tkinter.Tk()
+    except tkinter.TclError:
+        pytest.skip("no display available for Tk")
+    root.withdraw()
+    yield root
+    root.destroy()
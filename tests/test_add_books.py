@@ -0,0 +1,81 @@
+import sqlite3
+
+import pytest
+
+import sqlite_profiles
+from chatgpt_v1_database import (BULK_DUPLICATE, BULK_INSERTED, BULK_INVALID, BULK_UPDATED, CONFLICT_IGNORE,
+                                 CONFLICT_REPLACE, CONFLICT_UPDATE_MISSING)
+
+from .conftest import book
+
+
+def test_failed_add_book_leaves_no_open_transaction(books_db):
+    with pytest.raises(sqlite3.IntegrityError):
+        books_db.add_book(**book("9780000000002", title=None))
+    assert not books_db.connection.in_transaction
+
+    # the bulk import switches the profile of the same connection
+    assert books_db.add_books_bulk([book("9780000000019")]) == [BULK_INSERTED]
+
+
+def test_apply_profile_refuses_an_open_transaction(tmp_path):
+    connection = sqlite_profiles.connect(str(tmp_path / "profile.db"), "interactive")
+    try:
+        connection.execute("CREATE TABLE t (x)")
+        connection.execute("INSERT INTO t VALUES (1)")
+        assert connection.in_transaction
+        with pytest.raises(Exception, match="inside a transaction"):
+            sqlite_profiles.apply_profile(connection, "bulk-load")
+        connection.rollback()
+        sqlite_profiles.apply_profile(connection, "bulk-load")
+        assert connection.execute("PRAGMA synchronous").fetchone()[0] == 0
+    finally:
+        connection.close()
+
+
+def _stored(db):
+    return db.connection.execute("SELECT isbn_norm, title, description FROM books ORDER BY isbn_norm").fetchall()
+
+
+@pytest.mark.parametrize("on_conflict,conflict", [(CONFLICT_IGNORE, BULK_DUPLICATE),
+                                                  (CONFLICT_UPDATE_MISSING, BULK_UPDATED),
+                                                  (CONFLICT_REPLACE, BULK_UPDATED)])
+def test_bulk_outcomes_per_row(books_db, on_conflict, conflict):
+    books_db.add_book(**book("9780000000002", title="Stored", description=""))
+    rows = [
+        book("9780000000019", title="First"),
+        book("978-0-00-000001-9", title="Same ISBN, same chunk", description="second"),
+        book("9780000000002", title="Stored again", description="filled"),  # already in the database
+        book("9780000000026", title=None),                                   # no title
+        book("", title="No ISBN"),
+        "not a dict",
+        book("9780000000019", title="Same ISBN, next chunk", description="third"),
+    ]
+
+    outcomes = books_db.add_books_bulk(rows, chunk_size=2, on_conflict=on_conflict)
+
+    assert outcomes == [BULK_INSERTED, conflict, conflict, BULK_INVALID, BULK_INVALID, BULK_INVALID, conflict]
+    stored = dict((isbn, (title, description)) for isbn, title, description in _stored(books_db))
+    if on_conflict == CONFLICT_IGNORE:
+        assert stored == {"9780000000002": ("Stored", ""), "9780000000019": ("First", "")}
+    elif on_conflict == CONFLICT_UPDATE_MISSING:
+        assert stored == {"9780000000002": ("Stored", "filled"), "9780000000019": ("First", "second")}
+    else:
+        assert stored == {"9780000000002": ("Stored again", "filled"),
+                          "9780000000019": ("Same ISBN, next chunk", "third")}
+
+
+def test_failed_bulk_import_rolls_back_and_restores_the_profile(books_db):
+    def rows():
+        yield book("9780000000002")
+        yield book("9780000000019")
+        raise RuntimeError("broken input")
+
+    synchronous = books_db.connection.execute("PRAGMA synchronous").fetchone()[0]
+    with pytest.raises(RuntimeError, match="broken input"):
+        books_db.add_books_bulk(rows(), chunk_size=1)
+
+    assert _stored(books_db) == []
+    assert not books_db.connection.in_transaction
+    assert books_db.connection.execute("PRAGMA synchronous").fetchone()[0] == synchronous != 0
+    assert books_db.add_books_bulk([book("9780000000002")]) == [BULK_INSERTED]
@@ -0,0 +1,100 @@
+import copy
+import sqlite3
+
+import pytest
+
+import sqlite3_database
+from sqlite3_database import BOOKCASE_SCHEMA, bookcase_apply_schema, bookcase_schema_diff
+
+NO_CHANGES = {"missing_tables": [], "missing_columns": {}, "missing_indexes": [], "changed_indexes": [],
+              "missing_triggers": [], "changed_triggers": [], "extra_tables": []}
+
+
+@pytest.fixture
+def connection(tmp_path):
+    connection = sqlite3.connect(str(tmp_path / "bookcase.db"))
+    yield connection
+    connection.close()
+
+
+def _older_schema():
+    """BOOKCASE_SCHEMA without BOOK.IN_WISHLIST and without BOOK_ISBN_IDX."""
+    schema = copy.deepcopy(BOOKCASE_SCHEMA)
+    schema["tables"]["BOOK"] = [column for column in schema["tables"]["BOOK"] if column[0] != "IN_WISHLIST"]
+    del schema["indexes"]["BOOK_ISBN_IDX"]
+    return schema
+
+
+def _migrations(connection):
+    return connection.execute("SELECT VERSION, DESCRIPTION FROM SCHEMA_MIGRATIONS ORDER BY VERSION").fetchall()
+
+
+def test_fresh_database_has_the_declared_schema(tmp_path):
+    path = str(tmp_path / "bookcase.db")
+    applied = sqlite3_database.bookcase_create_database(path)
+    assert sorted(applied["missing_tables"]) == sorted(BOOKCASE_SCHEMA["tables"])
+    assert sorted(applied["missing_indexes"]) == sorted(BOOKCASE_SCHEMA["indexes"])
+
+    with sqlite3.connect(path) as connection:
+        assert bookcase_schema_diff(connection) == NO_CHANGES
+    connection.close()
+    assert sqlite3_database.bookcase_create_database(path) == NO_CHANGES
+
+
+def test_missing_column_and_changed_index_are_repaired(connection):
+    bookcase_apply_schema(connection, _older_schema(), migrations=[])
+    connection.execute("INSERT INTO BOOK (TITLE) VALUES ('kept')")
+    connection.execute("DROP INDEX AUTHOR_NAME_IDX")
+    connection.execute("CREATE INDEX AUTHOR_NAME_IDX ON AUTHOR (LASTNAME)")
+    connection.commit()
+
+    diff = bookcase_schema_diff(connection)
+    assert diff["missing_columns"] == {"BOOK": [("IN_WISHLIST", "INTEGER")]}
+    assert diff["missing_indexes"] == ["BOOK_ISBN_IDX"] and diff["changed_indexes"] == ["AUTHOR_NAME_IDX"]
+
+    assert bookcase_apply_schema(connection, migrations=[]) == diff
+    assert bookcase_schema_diff(connection) == NO_CHANGES
+    assert connection.execute("SELECT TITLE, IN_WISHLIST FROM BOOK").fetchall() == [("kept", None)]
+
+
+def test_migration_runs_once_and_is_recorded(connection):
+    bookcase_apply_schema(connection, migrations=[])
+    connection.execute("INSERT INTO BOOK (TITLE, READ) VALUES ('read', NULL)")
+    connection.commit()
+    calls = []
+
+    def mark_unread(connection):
+        calls.append(connection)
+        connection.execute("UPDATE BOOK SET READ = 0 WHERE READ IS NULL")
+
+    migrations = [(1, "READ is never NULL", mark_unread)]
+    bookcase_apply_schema(connection, migrations=migrations)
+    bookcase_apply_schema(connection, migrations=migrations)
+    assert len(calls) == 1
+    assert _migrations(connection) == [(1, "READ is never NULL")]
+    assert sqlite3_database.bookcase_schema_version(connection) == 1
+    assert connection.execute("SELECT READ FROM BOOK").fetchall() == [(0,)]
+
+
+def test_new_database_only_records_the_migrations(connection):
+    calls = []
+    bookcase_apply_schema(connection, migrations=[(1, "first", calls.append), (2, "second", calls.append)])
+    assert calls == []
+    assert _migrations(connection) == [(1, "first"), (2, "second")]
+
+
+def test_failing_migration_rolls_back_the_whole_schema_change(connection):
+    bookcase_apply_schema(connection, _older_schema(), migrations=[])
+
+    def failing(connection):
+        connection.execute("UPDATE BOOK SET READ = 1")
+        raise sqlite3.OperationalError("simulated failure")
+
+    with pytest.raises(sqlite3.OperationalError, match="simulated"):
+        bookcase_apply_schema(connection, migrations=[(1, "fails", failing)])
+
+    assert not connection.in_transaction
+    diff = bookcase_schema_diff(connection)
+    assert diff["missing_columns"] == {"BOOK": [("IN_WISHLIST", "INTEGER")]}
+    assert diff["missing_indexes"] == ["BOOK_ISBN_IDX"]
+    assert _migrations(connection) == []
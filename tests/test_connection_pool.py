@@ -0,0 +1,50 @@
+import sqlite3
+
+import pytest
+
+import chatgpt_v1_connection_pool
+from chatgpt_v1_database import DatabaseManager
+
+
+def test_more_managers_than_pooled_connections(tmp_path):
+    path = str(tmp_path / "books.db")
+    managers = []
+    for _ in range(7):
+        manager = DatabaseManager()
+        manager.create_database(path)
+        managers.append(manager)
+    pool = managers[0].pool
+    pool.timeout = 1
+    assert pool.max_size < len(managers)
+
+    for manager in managers:
+        assert manager.search_books("x") == []
+    assert pool._opened <= pool.max_size
+
+    for manager in managers:
+        manager.close()
+    assert not pool._dedicated
+
+
+def test_connections_released_after_close_are_closed(tmp_path):
+    pool = chatgpt_v1_connection_pool.get_pool(str(tmp_path / "books.db"))
+    in_use = pool.acquire()
+    idle = pool.acquire()
+    pool.release(idle)
+
+    chatgpt_v1_connection_pool.close_all_pools()
+    with pytest.raises(sqlite3.ProgrammingError):
+        idle.execute("SELECT 1")
+    pool.release(in_use)
+    with pytest.raises(sqlite3.ProgrammingError):
+        in_use.execute("SELECT 1")
+    assert pool._opened == 0 and pool._idle.empty()
+    assert chatgpt_v1_connection_pool.get_pool(str(tmp_path / "books.db")) is not pool
+
+
+def test_pool_with_another_profile_is_refused(tmp_path):
+    path = str(tmp_path / "books.db")
+    pool = chatgpt_v1_connection_pool.get_pool(path, profile="interactive")
+    assert chatgpt_v1_connection_pool.get_pool(path, profile="interactive") is pool
+    with pytest.raises(Exception, match="profile 'interactive'"):
+        chatgpt_v1_connection_pool.get_pool(path, profile="bulk-load")
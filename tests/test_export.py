@@ -0,0 +1,54 @@
+import csv
+import gzip
+import json
+import sqlite3
+
+import pytest
+
+import bookcase_export
+
+from .conftest import book
+
+
+def _read_back(path, export_format):
+    """Rows of an exported file as lists of values (CSV values stay text)."""
+    opener = gzip.open if path.endswith(".gz") else open
+    with opener(path, "rt", encoding="utf-8", newline="") as exported:
+        if export_format == "csv":
+            reader = csv.reader(exported)
+            return next(reader), [row for row in reader]
+        if export_format == "jsonl":
+            objects = [json.loads(line) for line in exported]
+            columns = list(objects[0]) if objects else []
+            return columns, [[obj[name] for name in columns] for obj in objects]
+        header, *batches = [json.loads(line) for line in exported]
+        rows = []
+        for batch in batches:
+            assert len(batch["data"]) == len(header["columns"])
+            rows += [list(row) for row in zip(*batch["data"])]
+        return header["columns"], rows
+
+
+@pytest.mark.parametrize("export_format", ["csv", "jsonl", "columns"])
+@pytest.mark.parametrize("compression,workers", [(None, 1), ("gzip", 2)])
+def test_export_round_trip(books_db, tmp_path, export_format, compression, workers):
+    books_db.add_books_bulk([book(f"97800000{n:05d}", title=f"Tytuł {n}", description='quote " comma ,')
+                             for n in range(25)])
+    books_db.add_series("Saga", [1, 2, 3], ["Fantasy"], "")
+    books_db.update_book(2, {"title": "Nowy tytuł"}, updated_by="test")
+
+    results = bookcase_export.export_database(books_db.db_path, str(tmp_path / "export"), export_format=export_format,
+                                              compression=compression, batch_size=7, workers=workers)
+
+    assert [result["table"] for result in results] == ["books", "series", "updates"]
+    with sqlite3.connect(books_db.db_path) as connection:
+        for result in results:
+            cursor = connection.execute(f'SELECT * FROM "{result["table"]}"')
+            expected = [list(row) for row in cursor.fetchall()]
+            columns, rows = _read_back(result["path"], export_format)
+            assert result["rows"] == len(expected)
+            assert columns == [description[0] for description in cursor.description]
+            if export_format == "csv":
+                expected = [["" if value is None else str(value) for value in row] for row in expected]
+            assert rows == expected
+    connection.close()
@@ -0,0 +1,89 @@
+import threading
+import time
+import types
+
+import pytest
+
+from .conftest import program_module
+
+
+@pytest.fixture
+def processor(monkeypatch):
+    """FileProcessor indexing 16 bytes per step, so lines cross chunk boundaries."""
+    module = program_module("py-file-viewer", "file_processing")
+    monkeypatch.setattr(module.FileProcessor, "INDEX_CHUNK_SIZE", 16)
+    processor = module.FileProcessor()
+    yield processor
+    processor.close()
+
+
+def _open(processor, tmp_path, data):
+    path = tmp_path / "text.txt"
+    path.write_bytes(data)
+    processor.open_file(str(path))
+    return processor
+
+
+def _all_lines(processor):
+    processor._ensure_indexed(10 ** 9)
+    return processor.get_lines_in_range(0, processor.get_total_lines() + 5)
+
+
+def test_lines_across_chunk_boundaries(processor, tmp_path):
+    lines = [f"line {n} " + "x" * (n * 3) + "\n" for n in range(40)]
+    _open(processor, tmp_path, "".join(lines).encode())
+    assert _all_lines(processor) == lines
+    assert processor.get_total_lines() == 40
+    assert processor.get_line(17) == lines[17]
+
+
+def test_crlf_and_last_line_without_newline(processor, tmp_path):
+    _open(processor, tmp_path, b"first\r\nsecond\r\nthird, no newline")
+    assert _all_lines(processor) == ["first\n", "second\n", "third, no newline"]
+
+
+def test_empty_file(processor, tmp_path):
+    _open(processor, tmp_path, b"")
+    assert processor.get_total_lines() == 0
+    assert processor.get_lines_in_range(0, 10) == []
+    assert processor.get_line(0) == ""
+    assert not processor.has_line(0)
+
+
+def test_ranges_past_the_end(processor, tmp_path):
+    _open(processor, tmp_path, b"a\nb\nc\n")
+    assert processor.get_lines_in_range(1, 10) == ["b\n", "c\n"]
+    assert processor.get_lines_in_range(3, 10) == []
+    assert processor.get_line(3) == ""
+    assert processor.has_line(2) and not processor.has_line(3)
+
+
+def test_close_while_indexing(processor, tmp_path, monkeypatch):
+    started = threading.Event()
+    index_next_chunk = processor._index_next_chunk
+
+    def slow_chunk():
+        started.set()
+        time.sleep(0.01)
+        return index_next_chunk()
+
+    monkeypatch.setattr(processor, "_index_next_chunk", slow_chunk)
+    _open(processor, tmp_path, b"line\n" * 1000)  # ~300 chunks, ~3 s
+    assert started.wait(5)
+    assert not processor.index_complete
+    processor.close()
+    assert processor._index_thread is None and processor.mapped is None and processor.file is None
+    assert processor.get_lines_in_range(0, 10) == []
+
+
+def test_page_down_reaches_lines_not_indexed_yet(processor, tmp_path, monkeypatch):
+    # no background indexing: every line is indexed on demand
+    monkeypatch.setattr(processor, "_build_index", lambda: None)
+    _open(processor, tmp_path, "".join(f"{n}\n" for n in range(25)).encode())
+    main_ui = program_module("py-file-viewer", "gui_components").MainUI
+    view = types.SimpleNamespace(file_processor=processor, current_start=0, update_display=lambda: None)
+
+    for expected in (10, 20, 20):
+        main_ui.page_down(view)
+        assert view.current_start == expected
+    assert processor.get_line(24) == "24\n"
@@ -0,0 +1,64 @@
+import sqlite3
+
+import pytest
+
+from .conftest import book
+
+
+@pytest.fixture
+def history_db(books_db):
+    """Three books with a known history: 30 entries, two editors, dated January 2024 and later."""
+    books_db.add_books_bulk([book(f"97800000{n:05d}", title=f"Book {n}") for n in range(3)])
+    with sqlite3.connect(books_db.db_path) as connection:
+        connection.execute("DELETE FROM updates")
+        connection.executemany(
+            "INSERT INTO updates (book_id, series_id, last_updated, updated_by, action, fields) "
+            "VALUES (?, NULL, ?, ?, 'update', '[\"title\"]')",
+            [(n % 3 + 1, f"2024-01-{n + 1:02d} 12:00:00", "alice" if n % 2 else "bob") for n in range(30)])
+    connection.close()
+    return books_db
+
+
+def _all_pages(db, page_size, **filters):
+    entries, key, pages = [], None, 0
+    while True:
+        page, key = db.get_update_history_page(page_size=page_size, after_key=key, **filters)
+        entries += page
+        pages += 1
+        if key is None:
+            return entries, pages
+
+
+def test_keyset_pages_cover_the_history_once(history_db):
+    entries, pages = _all_pages(history_db, page_size=7)
+    assert pages == 5
+    assert [entry["id"] for entry in entries] == sorted((entry["id"] for entry in entries), reverse=True)
+    assert len({entry["id"] for entry in entries}) == 30
+    assert entries[0]["fields"] == ["title"]
+
+    entries, _ = _all_pages(history_db, page_size=4, book_id=2, since="2024-01-10")
+    assert {entry["book_id"] for entry in entries} == {2}
+    assert all(entry["last_updated"] >= "2024-01-10" for entry in entries)
+    assert len(entries) == 7
+    assert history_db.get_update_history(book_id=2, limit=3) == entries[:3]
+
+
+def test_compaction_keeps_the_latest_entry_of_every_book(history_db):
+    latest = history_db.get_latest_updates()
+    assert history_db.compact_update_history("2024-01-29", chunk_size=4) == 27
+
+    assert history_db.get_latest_updates() == latest
+    remaining, _ = _all_pages(history_db, page_size=50)
+    assert len(remaining) == 3
+    snapshots = {snapshot["book_id"]: snapshot for snapshot in history_db.get_update_snapshots()}
+    assert sorted(snapshots) == [1, 2, 3]
+    assert sum(snapshot["update_count"] for snapshot in snapshots.values()) == 27
+    assert snapshots[1]["first_updated"] == "2024-01-01 12:00:00"
+    assert sorted(snapshots[1]["updated_by"]) == ["alice", "bob"]
+
+    # compacting again merges the new entries into the existing snapshots
+    history_db.update_book(1, {"title": "Book 0, revised"}, updated_by="carol")
+    assert history_db.compact_update_history("9999-01-01") == 1
+    snapshot, = history_db.get_update_snapshots(book_id=1)
+    assert snapshot["update_count"] == 10
+    assert sorted(snapshot["updated_by"]) == ["alice", "bob"]
@@ -0,0 +1,84 @@
+import json
+import os
+import sqlite3
+
+import pytest
+
+import bookcase_export
+import mylibrary_import
+import sqlite3_database
+
+BOOKS = [
+    # ID, AUTHOR, ADDITIONAL_AUTHORS, TITLE, ISBN, PAGES, PUBLISHER, READ
+    (1, 7, "[9]", "The Hobbit", "978-0-261-10221-7", 310, "HarperCollins", 1),
+    (2, 9, "[]", "Letters", "0-00-000000-0", 480, "HarperCollins", 0),
+    (3, 7, None, "Untitled draft", None, None, None, None),
+]
+
+
+@pytest.fixture
+def export_path(tmp_path):
+    """A "My Library" SQLite export with export ids that differ from the library's."""
+    path = str(tmp_path / "export.db")
+    sqlite3_database.bookcase_create_database(path)
+    with sqlite3.connect(path) as connection:
+        connection.executemany("INSERT INTO AUTHOR (ID, FIRSTNAME, LASTNAME) VALUES (?, ?, ?)",
+                               [(7, "J.R.R.", "Tolkien"), (9, "Christopher", "Tolkien")])
+        connection.executemany(
+            "INSERT INTO BOOK (ID, AUTHOR, ADDITIONAL_AUTHORS, TITLE, ISBN, PAGES, PUBLISHER, READ) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?)", BOOKS)
+    connection.close()
+    return path
+
+
+def _books(path):
+    """The BOOK rows of a library with the author ids replaced by names."""
+    with sqlite3.connect(path) as connection:
+        names = {author_id: f"{first} {last}" for author_id, first, last
+                 in connection.execute("SELECT ID, FIRSTNAME, LASTNAME FROM AUTHOR")}
+        rows = connection.execute(
+            "SELECT TITLE, ISBN, PAGES, PUBLISHER, READ, AUTHOR, ADDITIONAL_AUTHORS FROM BOOK ORDER BY TITLE").fetchall()
+    connection.close()
+    return [row[:5] + (names.get(row[5]), [names[i] for i in json.loads(row[6] or "[]")]) for row in rows]
+
+
+def _import(library, *sources, **options):
+    importer = mylibrary_import.MyLibraryImporter(library, batch_size=2, **options)
+    return importer.run([mylibrary_import.read_export(source) for source in sources])
+
+
+def test_sqlite_export_round_trip(export_path, tmp_path):
+    library = str(tmp_path / "library.db")
+    report = _import(library, export_path)
+
+    assert report["tables"]["BOOK"] == {"inserted": 3, "updated": 0, "skipped": 0}
+    assert report["authors_created"] == 2 and report["unresolved"] == 0
+    assert _books(library) == _books(export_path)
+    assert _books(library)[0][5:] == ("Christopher Tolkien", [])
+    assert _books(library)[1][5:] == ("J.R.R. Tolkien", ["Christopher Tolkien"])
+
+    # importing the same export again finds every book in the library
+    report = _import(library, export_path)
+    assert report["tables"]["BOOK"] == {"inserted": 0, "updated": 0, "skipped": 3}
+    assert report["conflicts"] == 3 and report["authors_created"] == 0
+    report = _import(library, export_path, on_conflict=mylibrary_import.CONFLICT_UPDATE)
+    assert report["tables"]["BOOK"] == {"inserted": 0, "updated": 3, "skipped": 0}
+    assert _books(library) == _books(export_path)
+
+
+def test_csv_export_round_trip(export_path, tmp_path):
+    # bookcase_export -> CSV files -> import: the same books as the SQLite export
+    results = bookcase_export.export_database(export_path, str(tmp_path / "csv"), tables=["AUTHOR", "BOOK"],
+                                              export_format="csv")
+    library = str(tmp_path / "library.db")
+    report = _import(library, *[result["path"] for result in results])
+
+    assert report["tables"]["BOOK"]["inserted"] == 3
+    assert _books(library) == _books(export_path)
+
+
+def test_dry_run_writes_nothing(export_path, tmp_path):
+    library = str(tmp_path / "library.db")
+    report = _import(library, export_path, dry_run=True)
+    assert report["tables"]["BOOK"]["inserted"] == 3 and report["authors_created"] == 2
+    assert not os.path.exists(library)
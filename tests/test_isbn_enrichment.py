@@ -0,0 +1,45 @@
+import json
+
+import pytest
+
+pytest.importorskip("requests")
+import isbn_enrichment  # noqa: E402
+import isbn_info  # noqa: E402
+
+GOOD = "9780000000002"
+BROKEN = "9780000000019"
+UNWRITABLE = "9780000000026"
+
+
+def fake_lookup(isbn, session=None, timeout=30):
+    if isbn == BROKEN:
+        raise RuntimeError("unexpected answer")
+    if isbn == UNWRITABLE:
+        return isbn_info.LOOKUP_OK, {"title": None}, None   # books.title is NOT NULL
+    return isbn_info.LOOKUP_OK, {"title": f"Book {isbn}", "authors": ["Ann Author"]}, None
+
+
+def read_progress(path):
+    with open(path, encoding="utf-8") as progress_file:
+        return {record["isbn"]: record for record in map(json.loads, progress_file)}
+
+
+def test_failed_isbns_are_recorded_and_retried(books_db, tmp_path, monkeypatch):
+    monkeypatch.setattr(isbn_info, "lookup_volume_info", fake_lookup)
+    progress_path = str(tmp_path / "isbns.progress")
+    pipeline = isbn_enrichment.EnrichmentPipeline(books_db, progress_path=progress_path, workers=2,
+                                                  rate=1000, max_retries=1, progress_callback=lambda stats: None)
+
+    stats = pipeline.run([GOOD, BROKEN, UNWRITABLE])
+
+    assert (stats["found"], stats["errors"], stats["inserted"]) == (1, 2, 1)
+    progress = read_progress(progress_path)
+    assert progress[GOOD]["status"] == isbn_info.LOOKUP_OK
+    assert progress[BROKEN]["status"] == isbn_info.LOOKUP_ERROR
+    assert "unexpected answer" in progress[BROKEN]["error"]
+    assert progress[UNWRITABLE]["status"] == isbn_info.LOOKUP_ERROR
+    assert books_db.get_known_isbns() == {GOOD}
+
+    # the failed ISBNs are not finished: the next run tries them again
+    assert pipeline.load_finished() == {GOOD}
+    assert pipeline.run([GOOD, BROKEN, UNWRITABLE])["total"] == 2
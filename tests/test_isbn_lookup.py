@@ -0,0 +1,89 @@
+import pytest
+
+import chatgpt_v1_database
+import isbn_cache
+
+
+class FakeResponse:
+    def __init__(self, status_code=200, payload=None, text=""):
+        self.status_code = status_code
+        self.headers = {}
+        self._payload = payload
+        self.text = text
+
+    def json(self):
+        if self._payload is None:
+            raise ValueError("Expecting value: line 1 column 1 (char 0)")
+        return self._payload
+
+
+class FakeSession:
+    """requests.Session stand-in answering every GET with the queued responses."""
+    def __init__(self, *responses):
+        self.responses = list(responses)
+        self.calls = 0
+
+    def get(self, url, params=None, timeout=None):
+        self.calls += 1
+        return self.responses.pop(0)
+
+
+@pytest.fixture
+def isbn_info():
+    """isbn_info needs requests; skipped where it is not installed."""
+    pytest.importorskip("requests")
+    import isbn_info
+    return isbn_info
+
+
+@pytest.fixture
+def cache(tmp_path, monkeypatch, isbn_info):
+    cache = isbn_cache.IsbnCache(str(tmp_path / "isbn_cache.db"))
+    monkeypatch.setattr(isbn_info, "_cache", cache)
+    yield cache
+    cache.close()
+
+
+def test_malformed_answer_is_an_error_and_not_cached(isbn_info, cache):
+    volume = {"title": "Dune"}
+    session = FakeSession(FakeResponse(text="<html>Service Unavailable</html>"),
+                          FakeResponse(payload={"error": {"code": 503}}),
+                          FakeResponse(payload={"totalItems": 1, "items": [{"volumeInfo": volume}]}))
+
+    assert isbn_info.lookup_volume_info("9780441013593", session=session)[0] == isbn_info.LOOKUP_ERROR
+    assert isbn_info.lookup_volume_info("9780441013593", session=session)[0] == isbn_info.LOOKUP_ERROR
+    assert cache.get("9780441013593") == (False, None)
+
+    status, info, _ = isbn_info.lookup_volume_info("9780441013593", session=session)
+    assert status == isbn_info.LOOKUP_OK and info == volume
+    assert session.calls == 3
+
+
+def test_explicit_not_found_is_cached(isbn_info, cache):
+    session = FakeSession(FakeResponse(payload={"kind": "books#volumes", "totalItems": 0}))
+    assert isbn_info.lookup_volume_info("9780441013593", session=session)[0] == isbn_info.LOOKUP_NOT_FOUND
+    assert isbn_info.lookup_volume_info("9780441013593", session=session)[0] == isbn_info.LOOKUP_NOT_FOUND
+    assert session.calls == 1
+
+
+def test_eviction_keeps_max_entries(tmp_path):
+    path = str(tmp_path / "isbn_cache.db")
+    cache = isbn_cache.IsbnCache(path, max_entries=5)
+    for n in range(8):
+        cache.put(f"97800000000{n:02d}", {"title": str(n)})
+    cache.put("9780000000007", {"title": "again"})  # replacing an entry does not grow the cache
+    assert cache._count == 5
+    assert cache._connection.execute("SELECT COUNT(*) FROM isbn_cache").fetchone()[0] == 5
+    assert cache.get("9780000000000") == (False, None)
+    cache.close()
+
+    reopened = isbn_cache.IsbnCache(path, max_entries=5)
+    assert reopened._count == 5
+    reopened.clear()
+    assert reopened._count == 0
+    reopened.close()
+
+
+def test_one_normalize_isbn():
+    assert chatgpt_v1_database.normalize_isbn is isbn_cache.normalize_isbn
+    assert isbn_cache.normalize_isbn("0-306-40615-2") == "9780306406157"
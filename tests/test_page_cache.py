@@ -0,0 +1,34 @@
+import json
+
+from .conftest import viewer_module
+
+SQL = 'SELECT rowid, * FROM "numbers" WHERE (rowid IN (SELECT value FROM json_each(?)) AND "word" LIKE ?) LIMIT ?'
+
+
+def _key(candidates, limit=10):
+    return SQL, (json.dumps(candidates), "%item%", limit)
+
+
+def test_narrowing_payload_is_not_kept_in_the_key():
+    page_cache = viewer_module("db_processing").PageCache(budget_bytes=64 * 1024)
+    page = ([1, 2], [(1, "a"), (2, "b")])
+    page_cache.put(_key(list(range(20000))), page)
+
+    assert page_cache.get(_key(list(range(20000)))) == page
+    assert page_cache.get(_key(list(range(19999)))) is None
+    assert page_cache.stats()["size_bytes"] < 4096
+
+
+def test_key_size_counts_against_the_budget():
+    db_processing = viewer_module("db_processing")
+    page = ([1], [(1, "a")])
+    short_key = ("SELECT 1", (1,))
+    long_key = ("SELECT 1 " + "x" * 4000, (1,))
+    assert (db_processing._estimate_key_size(db_processing._page_cache_key(long_key))
+            > db_processing._estimate_key_size(db_processing._page_cache_key(short_key)) + 4000)
+
+    page_cache = db_processing.PageCache(budget_bytes=16 * 1024)
+    for limit in range(10):
+        page_cache.put((long_key[0], (limit,)), page)
+    assert page_cache.stats()["size_bytes"] <= 16 * 1024
+    assert page_cache.stats()["evictions"] > 0
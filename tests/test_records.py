@@ -0,0 +1,80 @@
+import json
+
+import pytest
+
+import chatgpt_v1_records
+from chatgpt_v1_db_viewer import DatabaseViewer
+from chatgpt_v1_records import BookRecord, SeriesRecord
+
+from .conftest import book
+
+ROW = (7, '["Ann Author", "Bob Writer"]', "Title", "1", "EN", "", "Publisher", "2000", "9780000000002", "100",
+       '["Fantasy"]', "", "complete")
+
+
+@pytest.fixture
+def decoded(monkeypatch):
+    """Records the JSON values decoded by the records."""
+    calls = []
+
+    def decode_list(value):
+        calls.append(value)
+        return json.loads(value) if value else []
+
+    monkeypatch.setattr(chatgpt_v1_records, "_decode_list", decode_list)
+    return calls
+
+
+def test_json_fields_are_decoded_once_on_first_use(decoded):
+    record = BookRecord(ROW)
+    assert record.title == "Title" and record[1] == ROW[1]
+    assert decoded == []
+
+    assert record.authors == ["Ann Author", "Bob Writer"]
+    assert record["authors"] is record.authors
+    assert decoded == [ROW[1]]
+    assert record.get("tags") == ["Fantasy"] and record.get("shelf", "-") == "-"
+    assert decoded == [ROW[1], ROW[10]]
+
+
+def test_names_passed_in_are_not_decoded(decoded):
+    record = BookRecord(ROW, authors=["From junction"], tags=[])
+    assert (record.authors, record.tags) == (["From junction"], [])
+    series = SeriesRecord((1, "Saga", "[1, 2]", None, "About"))
+    assert (series.books_ids, series.tags) == ([1, 2], [])
+    assert decoded == ["[1, 2]", None]
+
+
+def test_records_have_no_instance_dict():
+    record = BookRecord(ROW)
+    assert not hasattr(record, "__dict__")
+    with pytest.raises(AttributeError):
+        record.shelf = "A1"
+    with pytest.raises(AttributeError):
+        record.title = "Another title"
+
+
+def test_records_equal_the_dicts_get_all_returned_before(books_db):
+    books_db.add_books_bulk([book("9780000000002", authors=["Ann Author", "Bob Writer"], tags=["Fantasy", "SF"]),
+                             book("9780000000019", title="Second", authors=[], tags=[])])
+    books_db.add_series("Saga", [2, 1], ["Fantasy"], "About")
+
+    viewer = DatabaseViewer(books_db.db_path)
+    try:
+        # the dicts built by get_all_books / get_all_series before BookRecord and SeriesRecord
+        rows = viewer.cursor.execute("SELECT id, title, authors, publisher, release_year, isbn_13, pages, tags, "
+                                     "description, status FROM books ORDER BY id").fetchall()
+        expected_books = [dict(zip(("id", "title", "authors", "publisher", "release_year", "isbn_13", "pages",
+                                    "tags", "description", "status"), row)) for row in rows]
+        for expected in expected_books:
+            expected["authors"], expected["tags"] = json.loads(expected["authors"]), json.loads(expected["tags"])
+        expected_series = [{"id": 1, "title": "Saga", "books_ids": [2, 1], "tags": ["Fantasy"], "description": "About"}]
+
+        assert viewer.get_all_books() == expected_books
+        assert [list(book) for book in viewer.get_all_books()] == [list(expected) for expected in expected_books]
+        assert viewer.get_all_series() == expected_series
+        assert list(viewer.iter_series()) == expected_series
+        assert [record.to_dict(tuple(expected)) for record, expected in zip(viewer.iter_books(), expected_books)] \
+            == expected_books
+    finally:
+        viewer.connection.close()
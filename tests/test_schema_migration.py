@@ -0,0 +1,60 @@
+import sqlite3
+
+import pytest
+
+import chatgpt_v1_connection_pool
+import chatgpt_v1_database
+from chatgpt_v1_database import SCHEMA_VERSION, DatabaseManager
+
+
+def _columns(path, table):
+    with sqlite3.connect(path) as connection:
+        return {row[1] for row in connection.execute(f"PRAGMA table_info({table})")}
+
+
+def _user_version(path):
+    with sqlite3.connect(path) as connection:
+        return connection.execute("PRAGMA user_version").fetchone()[0]
+
+
+def test_legacy_library_is_migrated(legacy_library):
+    with sqlite3.connect(legacy_library) as connection:
+        books_before = connection.execute("SELECT id, title FROM books ORDER BY id").fetchall()
+
+    db = DatabaseManager()
+    db.create_database(legacy_library)
+
+    assert _user_version(legacy_library) == SCHEMA_VERSION
+    assert {"isbn_norm", "deleted_at", "deleted_status"} <= _columns(legacy_library, "books")
+    assert {"action", "fields"} <= _columns(legacy_library, "updates")
+    with sqlite3.connect(legacy_library) as connection:
+        assert connection.execute("SELECT id, title FROM books ORDER BY id").fetchall() == books_before
+        # junction tables are filled from the JSON columns of the existing books
+        assert connection.execute("SELECT COUNT(*) FROM book_author").fetchone()[0] > 0
+    assert db.get_update_history(limit=1)
+
+
+def test_failed_step_is_rolled_back_and_retried(legacy_library, monkeypatch):
+    migrate_to_3 = DatabaseManager._migrate_to_3
+
+    def failing_step(self, cursor):
+        migrate_to_3(self, cursor)
+        raise sqlite3.OperationalError("simulated failure")
+
+    monkeypatch.setattr(DatabaseManager, "_migrate_to_3", failing_step)
+    with pytest.raises(sqlite3.OperationalError):
+        DatabaseManager().create_database(legacy_library)
+    chatgpt_v1_connection_pool.close_all_pools()
+
+    # versions 1 and 2 are kept, nothing of version 3 is left behind
+    assert _user_version(legacy_library) == 2
+    assert "action" not in _columns(legacy_library, "updates")
+
+    monkeypatch.setattr(DatabaseManager, "_migrate_to_3", migrate_to_3)
+    DatabaseManager().create_database(legacy_library)
+    assert _user_version(legacy_library) == SCHEMA_VERSION
+
+
+def test_every_version_has_a_step():
+    for version in range(1, SCHEMA_VERSION + 1):
+        assert hasattr(chatgpt_v1_database.DatabaseManager, f"_migrate_to_{version}")
@@ -0,0 +1,127 @@
+import sqlite3
+
+import pytest
+
+from .conftest import book
+
+
+@pytest.fixture
+def library(books_db):
+    books = [book(f"97800000{n:05d}", title=f"Dragon tale {n}" if n % 3 else f"Sea story {n}",
+                  authors=["Ann Author" if n % 2 else "Bob Writer"]) for n in range(40)]
+    books_db.add_books_bulk(books)
+    if not books_db.fts_enabled:
+        pytest.skip("SQLite without FTS5")
+    return books_db
+
+
+def _all_pages(db, term, page_size):
+    rows, key, pages = [], None, 0
+    while True:
+        page, key = db.search_books_page(term, page_size, key)
+        rows += page
+        pages += 1
+        if key is None:
+            return rows, pages
+
+
+@pytest.mark.parametrize("term", ["dragon", "author:Ann Author", "Sea sto"])
+def test_keyset_pages_cover_every_match_once(library, term):
+    rows, pages = _all_pages(library, term, 7)
+    ids = [row[0] for row in rows]
+    assert len(ids) == len(set(ids)) == library.count_search_results(term)
+    assert pages == -(-len(ids) // 7)
+    assert len(ids) > 7
+
+
+def test_fts_syntax_error_falls_back_for_that_search_only(library, monkeypatch):
+    # a MATCH expression FTS5 cannot parse
+    monkeypatch.setattr(library, "_build_fts_query", lambda term: '"dragon" AND')
+    assert library.count_search_results("dragon") == 26
+    rows, next_key = library.search_books_page("dragon", 100)
+    assert len(rows) == 26 and next_key is None
+    assert library.fts_enabled
+
+
+def test_missing_fts_index_turns_fts_off(library):
+    with library._get_connection() as conn:
+        for trigger in ("books_fts_ai", "books_fts_ad", "books_fts_au"):
+            conn.execute(f"DROP TRIGGER {trigger}")
+        conn.execute("DROP TABLE books_fts")
+    assert library.count_search_results("sea") == 14
+    assert not library.fts_enabled
+    assert len(library.search_books_page("sea", 100)[0]) == 14
+
+
+def test_fts_column_filter_falls_back(library, monkeypatch):
+    # FTS5 reads "shelf:" as a column filter, and the index has no such column
+    monkeypatch.setattr(library, "_build_fts_query", lambda term: 'shelf:"dragon"')
+    assert library.count_search_results("dragon") == 26
+    assert len(library.search_books("dragon")) == 26
+
+
+@pytest.mark.parametrize("message", ["database is locked", "datatype mismatch", "no such column: rank"])
+def test_other_errors_are_raised(library, monkeypatch, message):
+    def failing(*args, **kwargs):
+        raise sqlite3.OperationalError(message)
+
+    monkeypatch.setattr(library, "_count_search", failing)
+    monkeypatch.setattr(library, "_search_page", failing)
+    with pytest.raises(sqlite3.OperationalError, match=message):
+        library.count_search_results("dragon")
+    with pytest.raises(sqlite3.OperationalError, match=message):
+        library.search_books_page("dragon", 10)
+    assert library.fts_enabled
+
+
+@pytest.fixture
+def catalogue(books_db):
+    books_db.add_books_bulk([
+        book("9780000000002", title="Notes on gardening",
+             description="A long book about gardens, soil, seasons, tools and one wizard who helps with the roses."),
+        book("9780000000019", title="The Wizard of the Coast", description="Sea stories."),
+        book("9780000000026", title="Tolkien and his world", authors=["Tolkien Scholar"]),
+    ])
+    if not books_db.fts_enabled:
+        pytest.skip("SQLite without FTS5")
+    return books_db
+
+
+def _titles(rows):
+    return [row[2] for row in rows]  # books.*: id, authors, title, ...
+
+
+def _fts_check(db):
+    # FTS5 compares the external-content index with the rows of 'books'
+    with db._get_connection() as conn:
+        conn.execute("INSERT INTO books_fts (books_fts) VALUES ('integrity-check')")
+
+
+def test_title_hits_rank_above_description_hits(catalogue):
+    assert _titles(catalogue.search_books("wizard")) == ["The Wizard of the Coast", "Notes on gardening"]
+    rows, _ = catalogue.search_books_page("wizard", 10)
+    assert [row[0] for row in rows] == [2, 1]
+
+
+def test_words_match_as_prefixes(catalogue):
+    assert _titles(catalogue.search_books("tolk")) == ["Tolkien and his world"]
+    assert _titles(catalogue.search_books("wiz coa")) == ["The Wizard of the Coast"]
+    assert catalogue.search_books("olkien") == []  # prefixes, not substrings
+
+
+def test_index_follows_updates_deletes_and_purges(catalogue):
+    catalogue.update_book(2, {"title": "The Sorcerer of the Coast"})
+    assert _titles(catalogue.search_books("sorcerer")) == ["The Sorcerer of the Coast"]
+    assert _titles(catalogue.search_books("wizard")) == ["Notes on gardening"]
+    _fts_check(catalogue)
+
+    catalogue.delete_book(3)
+    assert catalogue.search_books("tolk") == []
+    catalogue.undelete_book(3)
+    assert _titles(catalogue.search_books("tolk")) == ["Tolkien and his world"]
+
+    catalogue.delete_book(3)
+    assert catalogue.purge_deleted_books() == 1
+    with catalogue._get_connection() as conn:
+        assert conn.execute("SELECT rowid FROM books_fts WHERE books_fts MATCH 'tolkien'").fetchall() == []
+    _fts_check(catalogue)
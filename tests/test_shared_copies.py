@@ -0,0 +1,48 @@
+import os
+import re
+import sqlite3
+
+import pytest
+
+import sqlite_profiles
+
+from .conftest import ROOT
+
+# Modules shared through sys.path (see their header comments): one file in py/ only
+SHARED = ("sqlite_profiles.py", "sqlite_instrumentation.py")
+# DBNavigator.get_table_columns, only in the py-cli-db-list copy of db_processing.py
+LIST_ONLY_METHOD = re.compile(r"\n \n    def get_table_columns\(.*?(?=\n    def |\nclass |\n$)", re.S)
+
+
+def _read(directory, name):
+    with open(os.path.join(ROOT, directory, name), encoding="utf-8") as source:
+        return source.read()
+
+
+@pytest.mark.parametrize("name", SHARED)
+def test_shared_modules_are_not_copied(name):
+    assert os.path.exists(os.path.join(ROOT, "py", name))
+    for directory in ("py-cli-db-edit", "py-cli-db-list", "py-db-viewer", "py-file-viewer"):
+        assert not os.path.exists(os.path.join(ROOT, directory, name)), f"{directory}/{name} is a copy"
+
+
+def test_db_processing_copies_differ_only_by_get_table_columns():
+    viewer = _read("py-db-viewer", "db_processing.py")
+    listing = _read("py-cli-db-list", "db_processing.py")
+    assert LIST_ONLY_METHOD.search(listing)
+    assert LIST_ONLY_METHOD.sub("", listing) == viewer
+
+
+def test_read_only_profile_does_not_write_the_file(tmp_path):
+    path = str(tmp_path / "viewer.db")
+    with sqlite3.connect(path) as connection:
+        connection.execute("CREATE TABLE t (x)")
+    connection.close()
+
+    connection = sqlite_profiles.connect(path, "read-only-viewer")
+    try:
+        assert connection.execute("PRAGMA journal_mode").fetchone()[0] == "delete"
+        with pytest.raises(sqlite3.OperationalError):
+            connection.execute("INSERT INTO t VALUES (1)")
+    finally:
+        connection.close()
@@ -0,0 +1,61 @@
+import sqlite3
+
+import pytest
+
+from chatgpt_v1_database import DatabaseManager
+
+from .conftest import book
+
+
+def _count(db, sql, params=()):
+    with sqlite3.connect(db.db_path) as connection:
+        count = connection.execute(sql, params).fetchone()[0]
+    connection.close()
+    return count
+
+
+def test_trashed_isbn_can_be_added_again(books_db):
+    books_db.add_books_bulk([book("9780000000002", title="Old copy"), book("9780000000019")])
+    books_db.delete_book(1)
+    assert books_db.get_known_isbns() == {"9780000000019"}
+
+    assert books_db.add_book(**book("978-0-00-000000-2", title="New copy"))
+    assert [deleted["title"] for deleted in books_db.get_deleted_books()] == ["Old copy"]
+    assert _count(books_db, "SELECT COUNT(*) FROM books WHERE isbn_norm = '9780000000002'") == 2
+
+    # the active copy is the one the UPSERT finds
+    assert books_db.add_books_bulk([book("9780000000002", title="Newer copy")], on_conflict="replace") == ["updated"]
+    assert books_db.get_book(3)[2] == "Newer copy"
+    with pytest.raises(sqlite3.IntegrityError):
+        books_db.undelete_book(1)
+    assert [deleted["id"] for deleted in books_db.get_deleted_books()] == [1]
+
+
+def test_purge_removes_the_history_of_the_purged_books(books_db):
+    books_db.add_books_bulk([book(f"97800000{n:05d}") for n in range(5)])
+    for book_id in range(1, 6):
+        books_db.update_book(book_id, {"pages": "200"}, updated_by="test")
+        books_db.update_book(book_id, {"pages": "300"}, updated_by="test")
+    books_db.compact_update_history("9999-01-01")
+    assert _count(books_db, "SELECT COUNT(*) FROM update_snapshots") == 5
+    for book_id in (1, 2, 3):
+        books_db.delete_book(book_id)
+
+    assert books_db.purge_deleted_books(chunk_size=2) == 3
+    assert _count(books_db, "SELECT COUNT(*) FROM updates WHERE book_id IN (1, 2, 3)") == 0
+    assert _count(books_db, "SELECT COUNT(*) FROM update_snapshots WHERE book_id IN (1, 2, 3)") == 0
+    assert _count(books_db, "SELECT COUNT(*) FROM updates WHERE book_id IN (4, 5)") == 2
+    assert books_db.get_deleted_books() == []
+
+
+def test_books_deleted_before_the_migration_can_be_undeleted(legacy_library):
+    with sqlite3.connect(legacy_library) as connection:
+        (book_id,), = connection.execute("SELECT MIN(id) FROM books").fetchall()
+        connection.execute("UPDATE books SET status = 'deleted' WHERE id = ?", (book_id,))
+    connection.close()
+
+    db = DatabaseManager()
+    db.create_database(legacy_library)
+    db.undelete_book(book_id)
+    assert _count(db, "SELECT COUNT(*) FROM books WHERE id = ? AND status = 'incomplete'", (book_id,)) == 1
+    db.close()
@@ -0,0 +1,92 @@
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+import sqlite_instrumentation
+import sqlite_profiles
+
+from .conftest import ROOT
+
+
+@pytest.fixture
+def instrumentation(tmp_path):
+    """Instrumentation logging every statement as slow (threshold 0 ms), off again after the test."""
+    active = sqlite_instrumentation.enable(slow_threshold_ms=0, log_path=str(tmp_path / "slow.jsonl"))
+    yield active
+    sqlite_instrumentation.disable()
+
+
+@pytest.fixture
+def connection(instrumentation, tmp_path):
+    connection = sqlite_profiles.connect(str(tmp_path / "trace.db"))
+    connection.execute("CREATE TABLE t (id INTEGER PRIMARY KEY, name TEXT)")
+    connection.executemany("INSERT INTO t (name) VALUES (?)", [(f"name {n}",) for n in range(10)])
+    instrumentation.reset()
+    yield connection
+    connection.close()
+
+
+def _entry(instrumentation, statement):
+    entry, = [entry for entry in instrumentation.stats() if entry["statement"] == statement]
+    return entry
+
+
+def test_statement_and_params_normalization():
+    assert sqlite_instrumentation.normalize_statement("SELECT *\n  FROM t WHERE id IN (?, ?,?)  AND x IN ( ? )") \
+        == "SELECT * FROM t WHERE id IN (?, ...) AND x IN ( ? )"
+    assert sqlite_instrumentation.params_shape((1, 2, 3)) == "tuple[3]"
+    assert sqlite_instrumentation.params_shape({"title": 1, "id": 2}) == "dict[id, title]"
+    assert sqlite_instrumentation.params_shape(None) == "none"
+    assert sqlite_instrumentation.params_shape([(1,), (2,)], many=True) == "many"
+
+
+def test_rows_are_counted_however_they_are_fetched(instrumentation, connection):
+    select = "SELECT id FROM t WHERE id IN (?, ?, ?)"
+    connection.execute(select, (1, 2, 3)).fetchall()
+    cursor = connection.execute(select, [4, 5, 6])
+    cursor.fetchone()
+    cursor.fetchmany(1)
+    assert sum(1 for _ in cursor) == 1
+
+    entry = _entry(instrumentation, "SELECT id FROM t WHERE id IN (?, ...)")
+    assert entry["count"] == 2 and entry["rows"] == 6
+    assert entry["shapes"] == ["list[3]", "tuple[3]"]
+    assert entry["slow"] == 2
+
+
+def test_slow_statements_are_logged_with_their_plan(instrumentation, connection, tmp_path):
+    connection.execute("SELECT name FROM t WHERE id = ?", (3,)).fetchone()
+    connection.executemany("UPDATE t SET name = ? WHERE id = ?", [("x", 1), ("y", 2)])
+
+    select, update = instrumentation.slow_queries
+    assert select["params"] == "tuple[1]"
+    assert any("USING INTEGER PRIMARY KEY" in step for step in select["plan"])
+    assert update["params"] == "many" and "plan" not in update
+    with open(tmp_path / "slow.jsonl", encoding="utf-8") as log_file:
+        logged = [json.loads(line)["statement"] for line in log_file]
+    assert logged[-2:] == [select["statement"], update["statement"]]
+    assert "Slow statements (>= 0 ms):" in instrumentation.report()
+
+
+def test_disabled_connections_are_plain(tmp_path):
+    assert sqlite_instrumentation.get_instrumentation() is None
+    connection = sqlite_profiles.connect(str(tmp_path / "plain.db"))
+    try:
+        assert type(connection).__name__ == "Connection"
+    finally:
+        connection.close()
+
+
+def test_environment_variable_prints_a_report_at_exit(tmp_path):
+    script = ("import sqlite_profiles\n"
+              "connection = sqlite_profiles.connect(':memory:')\n"
+              "connection.execute('SELECT 1').fetchall()\n")
+    environment = dict(os.environ, BOOKCASE_SQL_TRACE="0", BOOKCASE_SQL_TRACE_LOG=str(tmp_path / "slow.jsonl"),
+                       PYTHONPATH=os.path.join(ROOT, "py"))
+    result = subprocess.run([sys.executable, "-c", script], env=environment, capture_output=True, text=True,
+                            check=True)
+    assert "SELECT 1" in result.stdout and "Slow statements" in result.stdout
+    assert os.path.exists(tmp_path / "slow.jsonl")
@@ -0,0 +1,108 @@
+import sqlite3
+
+import pytest
+
+import bookcase_sync
+import chatgpt_v1_connection_pool
+
+from .conftest import book
+
+
+@pytest.fixture
+def sync(books_db, tmp_path):
+    books_db.add_books_bulk([book("9780000000002", title="First", authors=["Ann Author", "Bob Writer"]),
+                             book("9780000000019", title="Second")])
+    return bookcase_sync.BookcaseSync(books_db.db_path, str(tmp_path / "bookcase.db"))
+
+
+def _bookcase(sync, sql, params=()):
+    with sqlite3.connect(sync.bookcase_database) as connection:
+        rows = connection.execute(sql, params).fetchall()
+    connection.close()
+    return rows
+
+
+def test_round_trip_both_ways(books_db, sync):
+    report = sync.run(full=True)
+    assert report["to_bookcase"]["inserted"] == 2
+    (book_id,), = _bookcase(sync, "SELECT ID FROM BOOK WHERE TITLE = 'First'")
+    assert _bookcase(sync, "SELECT FIRSTNAME, LASTNAME FROM AUTHOR ORDER BY ID") == [("Ann", "Author"), ("Bob", "Writer")]
+
+    with sqlite3.connect(sync.bookcase_database) as connection:
+        connection.execute("UPDATE BOOK SET TITLE = 'First, revised', PUBLISHED_DATE = '05/01/2000' WHERE ID = ?",
+                           (book_id,))
+    connection.close()
+    report = sync.run()
+    assert report["to_books"]["updated"] == 1
+    assert books_db.get_book(1)[2] == "First, revised"  # BookRecord.FIELDS: id, authors, title
+
+    books_db.update_book(2, {"title": "Second, revised"})
+    assert sync.run()["to_bookcase"]["updated"] == 1
+    assert _bookcase(sync, "SELECT TITLE FROM BOOK ORDER BY ID") == [("First, revised",), ("Second, revised",)]
+
+
+def test_trash_keeps_the_pair_until_purge(books_db, sync):
+    sync.run(full=True)
+    (book_id,), = _bookcase(sync, "SELECT ID FROM BOOK WHERE ISBN = '9780000000002'")
+    with sqlite3.connect(sync.bookcase_database) as connection:
+        connection.execute("UPDATE BOOK SET PUBLISHED_DATE = '05/01/2000', COMMENTS = 'signed' WHERE ID = ?", (book_id,))
+    connection.close()
+    sync.run()
+
+    books_db.delete_book(1)
+    assert sync.run()["to_bookcase"]["deleted"] == 0
+    assert _bookcase(sync, "SELECT BOOKS_ID FROM SYNC_MAP WHERE BOOK_ID = ?", (book_id,)) == [(1,)]
+
+    books_db.undelete_book(1)
+    books_db.update_book(1, {"pages": "123"})
+    assert sync.run()["to_bookcase"] == {"inserted": 0, "updated": 1, "deleted": 0}
+    assert _bookcase(sync, "SELECT ID, PUBLISHED_DATE, COMMENTS, PAGES FROM BOOK WHERE ISBN = '9780000000002'") == \
+        [(book_id, "05/01/2000", "signed", 123)]
+
+    books_db.delete_book(1)
+    sync.run()
+    assert books_db.purge_deleted_books() == 1
+    assert sync.run()["to_bookcase"]["deleted"] == 1
+    assert _bookcase(sync, "SELECT COUNT(*) FROM BOOK WHERE ID = ?", (book_id,)) == [(0,)]
+    assert _bookcase(sync, "SELECT COUNT(*) FROM SYNC_MAP") == [(1,)]
+
+
+def test_installed_once_without_changing_the_books_journal_mode(books_db, sync, monkeypatch):
+    # the books file as another program may keep it: no WAL
+    books_db.close()
+    chatgpt_v1_connection_pool.close_all_pools()
+    with sqlite3.connect(sync.books_database) as connection:
+        assert connection.execute("PRAGMA journal_mode = DELETE").fetchone()[0] == "delete"
+    connection.close()
+
+    sync.run(full=True)
+    calls = []
+    monkeypatch.setattr(bookcase_sync.BookcaseSync, "install", lambda self: calls.append(self))
+    bookcase_sync.BookcaseSync(sync.books_database, sync.bookcase_database).run()
+    assert calls == []
+
+    with sqlite3.connect(sync.books_database) as connection:
+        assert connection.execute("PRAGMA journal_mode").fetchone()[0] == "delete"
+    connection.close()
+
+
+@pytest.mark.parametrize("conflicts", [1, 600])
+def test_conflicting_changes_keep_the_preferred_side(books_db, sync, conflicts):
+    books_db.add_books_bulk([book(f"97811111{n:05d}", title=f"Book {n}") for n in range(conflicts)])
+    sync.run(full=True)
+    with sqlite3.connect(sync.books_database) as connection:
+        connection.execute("UPDATE books SET title = title || ', books' WHERE title LIKE 'Book %' OR title = 'First'")
+    connection.close()
+    with sqlite3.connect(sync.bookcase_database) as connection:
+        connection.execute("UPDATE BOOK SET TITLE = TITLE || ', bookcase' WHERE TITLE LIKE 'Book %' "
+                           "OR TITLE = 'Second'")
+    connection.close()
+
+    report = bookcase_sync.BookcaseSync(sync.books_database, sync.bookcase_database,
+                                       prefer=bookcase_sync.PREFER_BOOKCASE).run()
+    assert report["conflicts"] == conflicts
+    assert report["to_bookcase"]["updated"] == 1 and report["to_books"]["updated"] == conflicts + 1
+    titles = _bookcase(sync, "SELECT TITLE FROM BOOK")
+    assert ("First, books",) in titles and ("Second, bookcase",) in titles
+    assert all(title.endswith(", bookcase") for title, in titles if title.startswith("Book "))
+    assert books_db.get_book(1)[2] == "First, books" and books_db.get_book(2)[2] == "Second, bookcase"
@@ -0,0 +1,74 @@
+import json
+
+import pytest
+
+from chatgpt_v1_database import (BULK_DUPLICATE, BULK_INSERTED, BULK_UPDATED, CONFLICT_IGNORE,
+                                 CONFLICT_POLICIES, CONFLICT_REPLACE, CONFLICT_UPDATE_MISSING, DatabaseManager)
+
+from .conftest import book
+
+ISBN = "978-0-306-40615-7"
+
+
+def _names(db, book_id):
+    return db.get_authors_for_books([book_id])[book_id], db.get_tags_for_books([book_id])[book_id]
+
+
+@pytest.mark.parametrize("on_conflict", CONFLICT_POLICIES)
+def test_add_book_again_with_shared_authors_and_tags(books_db, on_conflict):
+    books_db.add_book(**book(ISBN, authors=["Ann Author", "Bob Writer"], tags=["Fantasy"], description=""))
+    books_db.add_book(**book("9780000000002", authors=["Ann Author"], tags=["fantasy"]))
+
+    books_db.add_book(**book("0306406152", authors=["ann author", "Bob Writer", "Cy New"],
+                             tags=["Fantasy", "Classic"], title="New title", description="Filled"),
+                      on_conflict=on_conflict)
+
+    (book_id, title, description), = books_db.connection.execute(
+        "SELECT id, title, description FROM books WHERE isbn_norm = '9780306406157'").fetchall()
+    authors, tags = _names(books_db, book_id)
+    if on_conflict == CONFLICT_IGNORE:
+        assert (title, description) == ("Title", "")
+        assert (authors, tags) == (["Ann Author", "Bob Writer"], ["Fantasy"])
+    elif on_conflict == CONFLICT_UPDATE_MISSING:
+        assert (title, description) == ("Title", "Filled")
+        assert (authors, tags) == (["Ann Author", "Bob Writer"], ["Fantasy"])
+    else:
+        assert (title, description) == ("New title", "Filled")
+        assert (authors, tags) == (["Ann Author", "Bob Writer", "Cy New"], ["Fantasy", "Classic"])
+    # names are shared case-insensitively, never duplicated
+    assert books_db.connection.execute("SELECT COUNT(*) FROM tags WHERE name = 'fantasy'").fetchone()[0] == 1
+
+
+@pytest.mark.parametrize("on_conflict", CONFLICT_POLICIES)
+def test_add_books_bulk_again_with_shared_authors_and_tags(books_db, on_conflict):
+    assert books_db.add_books_bulk([book(ISBN), book("9780000000002", tags=["Fantasy", "SF"])]) == [BULK_INSERTED] * 2
+
+    outcomes = books_db.add_books_bulk([
+        book(ISBN, authors=["Ann Author", "ANN AUTHOR"], tags=["SF", "Fantasy"], title="New title"),
+        book("9780000000019", tags=["sf"]),
+    ], on_conflict=on_conflict)
+
+    expected = BULK_DUPLICATE if on_conflict == CONFLICT_IGNORE else BULK_UPDATED
+    assert outcomes == [expected, BULK_INSERTED]
+    book_id = books_db.connection.execute("SELECT id FROM books WHERE isbn_norm = '9780306406157'").fetchone()[0]
+    if on_conflict == CONFLICT_REPLACE:
+        assert _names(books_db, book_id) == (["Ann Author"], ["SF", "Fantasy"])
+    else:
+        assert _names(books_db, book_id) == (["Ann Author"], ["Fantasy"])
+    tagged = {row[8] for row in books_db.search_books_by_tag("SF")}  # books.isbn_13
+    assert tagged == ({ISBN} if on_conflict == CONFLICT_REPLACE else set()) | {"9780000000002", "9780000000019"}
+
+
+def test_migrated_database_gets_the_new_triggers(legacy_library):
+    # the junction triggers of schema version 2 used INSERT OR IGNORE
+    db = DatabaseManager()
+    db.create_database(legacy_library)
+    try:
+        isbn, authors, tags = db.connection.execute(
+            "SELECT isbn_13, authors, tags FROM books WHERE isbn_norm IS NOT NULL ORDER BY id LIMIT 1").fetchone()
+        assert db.add_book(**book(isbn, authors=json.loads(authors), tags=json.loads(tags)),
+                           on_conflict=CONFLICT_UPDATE_MISSING)
+        triggers = db.connection.execute("SELECT group_concat(sql) FROM sqlite_master WHERE type = 'trigger'").fetchone()[0]
+        assert "OR IGNORE" not in triggers
+    finally:
+        db.close()
@@ -0,0 +1,70 @@
+import sqlite3
+
+import pytest
+
+from .conftest import viewer_module
+
+
+class FakeExecutor:
+    """QueryExecutor stand-in: jobs run when deliver() is called, on the test's thread."""
+    def __init__(self, path):
+        self.connection = sqlite3.connect(path)
+        self.jobs = []
+        self.generations = {}
+
+    def submit(self, key, work, on_done, on_error=None):
+        self.generations[key] = self.generations.get(key, 0) + 1
+        self.jobs.append((key, self.generations[key], work, on_done))
+        return self.generations[key]
+
+    def cancel(self, key):
+        self.generations[key] = self.generations.get(key, 0) + 1
+
+    def is_current(self, key, generation):
+        return self.generations.get(key) == generation
+
+    def deliver(self):
+        jobs, self.jobs = self.jobs, []
+        for key, generation, work, on_done in jobs:
+            if self.is_current(key, generation):
+                on_done(work(self.connection))
+
+
+@pytest.fixture
+def navigator(numbers_db):
+    db_processing = viewer_module("db_processing")
+    db_handler = db_processing.DatabaseHandler()
+    db_handler.load_file(numbers_db)
+    navigator = db_processing.DBNavigator(db_handler, prefetch=False)
+    navigator.reset_navigation()
+    yield navigator
+    db_handler.connection.close()
+
+
+def test_count_is_submitted_once_for_every_waiting_callback(navigator, numbers_db):
+    executor = FakeExecutor(numbers_db)
+    scrollbar, file_end = [], []
+    for _ in range(3):
+        navigator.count_rows_async(executor, scrollbar.append)   # refresh after refresh
+    navigator.count_rows_async(executor, file_end.append)
+
+    assert len(executor.jobs) == 1
+    executor.deliver()
+    assert scrollbar == [1000] and file_end == [1000]
+    assert navigator.get_cached_row_count() == 1000
+
+
+def test_count_of_another_query_replaces_the_running_one(navigator, numbers_db):
+    executor = FakeExecutor(numbers_db)
+    old, new = [], []
+    navigator.count_rows_async(executor, old.append)
+    navigator.search_text_in_current_table("item3")
+    navigator.count_rows_async(executor, new.append)
+
+    assert len(executor.jobs) == 2
+    executor.deliver()
+    assert old == [] and new == [143]
+    # the finished count is not waited for any more
+    navigator.clear_search()
+    navigator.count_rows_async(executor, new.append)
+    assert len(executor.jobs) == 1
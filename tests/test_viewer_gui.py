@@ -0,0 +1,29 @@
+from types import SimpleNamespace
+
+from .conftest import viewer_module
+
+
+def _main_ui(tk_root, path, pagination_mode="keyset"):
+    db_processing = viewer_module("db_processing")
+    gui_components = viewer_module("gui_components")
+    db_handler = db_processing.DatabaseHandler()
+    db_handler.load_file(path)
+    navigator = db_processing.DBNavigator(db_handler, pagination_mode=pagination_mode, prefetch=False)
+    navigator.reset_navigation()
+    main_ui = gui_components.MainUI(tk_root, db_handler, navigator)
+    main_ui.on_database_loaded()
+    return main_ui, navigator
+
+
+def test_resize_reloads_rows_in_offset_mode(tk_root, numbers_db):
+    main_ui, navigator = _main_ui(tk_root, numbers_db, pagination_mode="offset")
+    try:
+        page_sizes = []
+        for height in (600, 80):
+            main_ui.on_listbox_resize(SimpleNamespace(height=height))
+            page_sizes.append(navigator.page_size)
+            assert len(navigator.current_rows) == navigator.page_size
+            assert main_ui.listbox.size() == navigator.page_size
+        assert page_sizes[0] > page_sizes[1]
+    finally:
+        main_ui.destroy()
@@ -0,0 +1,104 @@
+import sqlite3
+
+import pytest
+
+from .conftest import book, viewer_module
+
+
+@pytest.fixture
+def navigator(books_db):
+    books_db.add_books_bulk([
+        book("9780000000002", title="The Dragon Reborn"),
+        book("9780000000019", title="Sea of Dragons"),
+        book("9780000000026", title="Snapdragon", location="Drawer"),
+        book("9780000000033", title="Harbour", location="Dragon shelf"),
+    ])
+    if not books_db.fts_enabled:
+        pytest.skip("SQLite without FTS5")
+    db_processing = viewer_module("db_processing")
+    db_handler = db_processing.DatabaseHandler()
+    db_handler.load_file(books_db.db_path)
+    navigator = db_processing.DBNavigator(db_handler, prefetch=False)
+    navigator.reset_navigation()
+    navigator.set_table("books")
+    navigator.page_size = 50
+    yield navigator
+    db_handler.connection.close()
+
+
+def _titles(navigator, text, mode):
+    navigator.search_text_in_current_table(text, mode)
+    title = [name for name, _, _ in navigator.get_columns()].index("title")
+    return sorted(row[title] for row in navigator.current_rows)
+
+
+def test_contains_finds_substrings_in_every_text_column(navigator):
+    # "location" is not in books_fts, "Snapdragon" contains "dragon" inside a word
+    assert _titles(navigator, "ragon", "contains") == ["Harbour", "Sea of Dragons", "Snapdragon", "The Dragon Reborn"]
+    assert navigator.get_row_count() == 4
+
+
+def test_words_uses_the_fts_index(navigator):
+    assert "MATCH" in navigator._build_search_filter("drag", "words")["sql"]
+    assert _titles(navigator, "drag", "words") == ["Sea of Dragons", "The Dragon Reborn"]
+    assert "MATCH" not in navigator._build_search_filter("drag", "contains")["sql"]
+
+
+ODD_TABLE = 'order "items"'
+
+
+@pytest.fixture
+def odd_navigator(tmp_path):
+    """Navigator on a table whose name needs quoting: a space, a keyword and '"' in it."""
+    path = str(tmp_path / "odd.db")
+    connection = sqlite3.connect(path)
+    connection.execute('CREATE TABLE "order ""items""" ("item name" TEXT, "select" INTEGER)')
+    connection.executemany('INSERT INTO "order ""items""" VALUES (?, ?)',
+                           [(f"dragon {n}" if n % 10 == 0 else f"item {n}", n) for n in range(120)])
+    connection.commit()
+    connection.close()
+    db_processing = viewer_module("db_processing")
+    db_handler = db_processing.DatabaseHandler()
+    db_handler.load_file(path)
+    navigator = db_processing.DBNavigator(db_handler, prefetch=False)
+    navigator.reset_navigation()
+    navigator.page_size = 50
+    navigator.set_table(ODD_TABLE)
+    yield navigator
+    db_handler.connection.close()
+
+
+def test_table_names_are_quoted(odd_navigator):
+    navigator = odd_navigator
+    assert navigator._uses_keyset()
+    assert [row[1] for row in navigator.current_rows] == list(range(50))
+    navigator.page_down()
+    navigator.page_down()
+    assert [row[1] for row in navigator.current_rows] == list(range(100, 120))
+    assert navigator.get_row_count() == 120
+    assert [name for name, _, _ in navigator.get_columns()] == ["item name", "select"]
+
+    assert sorted(row[1] for row in _search(navigator, "dragon", "contains")) == list(range(0, 120, 10))
+    assert navigator.get_row_count() == 12
+    assert [row[1] for row in _search(navigator, "107", "contains")] == [107]
+
+
+def test_suggested_indexes_on_a_table_whose_name_needs_quoting(odd_navigator):
+    navigator = odd_navigator
+    for _ in range(3):
+        _search(navigator, "drag", "contains")
+        _search(navigator, "item 1", "prefix")
+    suggestions = navigator.get_index_suggestions()
+    assert {(suggestion["kind"], tuple(suggestion["columns"])) for suggestion in suggestions} \
+        == {("fts", ("item name",)), ("btree", ("item name",))}
+    for suggestion in suggestions:
+        navigator.create_suggested_index(suggestion)
+    assert navigator.get_index_suggestions() == []
+
+    assert "MATCH" in navigator._build_search_filter("drag", "words")["sql"]
+    assert sorted(row[1] for row in _search(navigator, "drag", "words")) == list(range(0, 120, 10))
+
+
+def _search(navigator, text, mode):
+    navigator.search_text_in_current_table(text, mode)
+    return navigator.current_rows